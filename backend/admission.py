@@ -0,0 +1,242 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List
+
+from fastapi import HTTPException, Request
+
+from cache import TTLCache
+from config import settings
+from metrics import Counter, Gauge, Summary
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_IN_USE = Gauge("admission_in_use", "Запросы, выполняющиеся под ограничителем")
+ADMISSION_QUEUE_DEPTH = Gauge("admission_queue_depth", "Запросы, ожидающие в очереди ограничителя")
+ADMISSION_SHED = Counter("admission_shed_total", "Запросы, отклонённые с 503 (queue_full, evicted, timeout)")
+RATE_LIMITED = Counter("rate_limited_total", "Запросы, отклонённые с 429 ограничением частоты по клиенту")
+ADMISSION_WAIT = Summary("admission_wait_seconds", "Время ожидания в очереди ограничителя")
+
+# Меньше — важнее: дешёвые (кешируемые) маршруты обслуживаются первыми
+PRIORITY_HIGH = 0
+PRIORITY_LOW = 1
+
+
+class Overloaded(Exception):
+    def __init__(self, limiter: str, reason: str):
+        super().__init__(f"{limiter}: {reason}")
+        self.limiter = limiter
+        self.reason = reason
+
+
+class PriorityLimiter:
+    """
+    Семафор с ограниченной очередью ожидания по приоритету.
+    Освободившийся слот получает самый приоритетный (затем самый ранний) ожидающий.
+    При переполненной очереди новый запрос вытесняет наименее приоритетного
+    ожидающего, если сам важнее его, иначе отклоняется сразу.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self._in_use = 0
+        self._waiters: List[list] = []  # куча [priority, seq, future]
+        self._seq = itertools.count()
+
+    def _update_metrics(self):
+        ADMISSION_IN_USE.set(self._in_use, limiter=self.name)
+        ADMISSION_QUEUE_DEPTH.set(len(self._waiters), limiter=self.name)
+
+    def _shed(self, reason: str) -> Overloaded:
+        ADMISSION_SHED.inc(limiter=self.name, reason=reason)
+        return Overloaded(self.name, reason)
+
+    def _remove(self, entry: list):
+        self._waiters.remove(entry)
+        heapq.heapify(self._waiters)
+
+    async def acquire(self, priority: int, timeout: float):
+        if self._in_use < self.limit and not self._waiters:
+            self._in_use += 1
+            self._update_metrics()
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            worst = max(self._waiters)
+            if worst[0] <= priority:
+                raise self._shed("queue_full")
+            self._remove(worst)
+            worst[2].set_exception(self._shed("evicted"))
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._seq), future]
+        heapq.heappush(self._waiters, entry)
+        self._update_metrics()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait({future}, timeout=timeout)
+        except asyncio.CancelledError:
+            # Клиент ушёл: слот, который мог успеть достаться, отдаём дальше
+            if future.done() and not future.cancelled() and future.exception() is None:
+                self.release()
+            elif entry in self._waiters:
+                self._remove(entry)
+                future.cancel()
+            self._update_metrics()
+            raise
+        ADMISSION_WAIT.observe(time.perf_counter() - started, limiter=self.name)
+
+        if not future.done():
+            self._remove(entry)
+            future.cancel()
+            self._update_metrics()
+            raise self._shed("timeout")
+        # Исключение «evicted» уже учтено в метриках
+        future.result()
+
+    def release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # Слот переходит ожидающему, _in_use не меняется
+                future.set_result(None)
+                self._update_metrics()
+                return
+        self._in_use -= 1
+        self._update_metrics()
+
+
+def _parse_limits(value: str) -> Dict[str, int]:
+    limits = {}
+    for part in value.split(","):
+        name, _, limit = part.partition("=")
+        if name.strip() and limit.strip():
+            limits[name.strip()] = int(limit)
+    return limits
+
+
+ROUTE_LIMITS = _parse_limits(settings.ADMISSION_ROUTE_LIMITS)
+
+# Общий ограничитель по числу соединений пула БД: запросы ждут здесь, а не в пуле SQLAlchemy.
+# Часть пула (ADMISSION_DB_RESERVED) остаётся для путей, которые идут в БД в обход admission
+db_limiter = PriorityLimiter(
+    "db",
+    max(settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW - settings.ADMISSION_DB_RESERVED, 1),
+    settings.ADMISSION_QUEUE_SIZE,
+)
+_route_limiters: Dict[str, PriorityLimiter] = {}
+
+
+def _route_limiter(route: str) -> PriorityLimiter:
+    limiter = _route_limiters.get(route)
+    if limiter is None:
+        limit = ROUTE_LIMITS.get(route, ROUTE_LIMITS.get("default", db_limiter.limit))
+        limiter = PriorityLimiter(route, limit, settings.ADMISSION_QUEUE_SIZE)
+        _route_limiters[route] = limiter
+    return limiter
+
+
+@asynccontextmanager
+async def admission(route: str, priority: int = PRIORITY_LOW, use_db: bool = True):
+    """
+    Слот маршрута route (ADMISSION_ROUTE_LIMITS) и общий слот БД на время блока.
+    Если за ADMISSION_QUEUE_TIMEOUT слот не получен или очередь переполнена,
+    сразу выбрасывает HTTPException 503 с Retry-After.
+    use_db=False — только ограничение маршрута (запрос сам не держит соединение с БД).
+    """
+    if not settings.ADMISSION_ENABLED:
+        yield
+        return
+    deadline = time.monotonic() + settings.ADMISSION_QUEUE_TIMEOUT
+    route_limiter = _route_limiter(route)
+    try:
+        await route_limiter.acquire(priority, settings.ADMISSION_QUEUE_TIMEOUT)
+    except Overloaded as e:
+        raise _overloaded_response(e)
+    try:
+        if not use_db:
+            yield
+            return
+        try:
+            await db_limiter.acquire(priority, max(deadline - time.monotonic(), 0.0))
+        except Overloaded as e:
+            raise _overloaded_response(e)
+        try:
+            yield
+        finally:
+            db_limiter.release()
+    finally:
+        route_limiter.release()
+
+
+def admit(route: str, priority: int = PRIORITY_LOW, use_db: bool = True):
+    """
+    Зависимость FastAPI: запрос выполняется под admission(route, priority, use_db).
+    Для потоковых ответов не подходит — слот нужно держать, пока отдаётся тело
+    (см. export.export_room_types).
+    """
+    async def dependency():
+        async with admission(route, priority, use_db):
+            yield
+
+    return dependency
+
+
+def _overloaded_response(error: Overloaded) -> HTTPException:
+    logger.debug(f"Запрос отклонён ограничителем {error.limiter}: {error.reason}")
+    return HTTPException(
+        status_code=503,
+        detail="Сервис перегружен, повторите запрос позже",
+        headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)},
+    )
+
+
+class ClientRateLimiter:
+    """
+    Ограничение частоты по клиенту: не больше limit запросов за window секунд
+    (скользящее окно). Счётчики живут в памяти процесса, поэтому лимит действует
+    на каждую реплику API отдельно.
+    """
+
+    def __init__(self, name: str, limit: int, window: float, max_clients: int = 10000):
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self._hits = TTLCache(maxsize=max_clients, ttl=window)
+
+    def hit(self, client: str) -> float:
+        """Учитывает запрос клиента; 0 — запрос разрешён, иначе через сколько секунд повторить"""
+        now = time.monotonic()
+        hits = [t for t in self._hits.get(client, ()) if t > now - self.window]
+        if len(hits) >= self.limit:
+            RATE_LIMITED.inc(limiter=self.name)
+            return hits[0] + self.window - now
+        hits.append(now)
+        self._hits.set(client, hits)
+        return 0.0
+
+
+def rate_limit(name: str, limit: int, window: float):
+    """Зависимость FastAPI: 429 с Retry-After, если клиент (по IP) превысил limit запросов за window секунд"""
+    limiter = ClientRateLimiter(name, limit, window)
+
+    async def dependency(request: Request):
+        if limit <= 0:
+            return
+        client = request.client.host if request.client else "unknown"
+        retry_after = limiter.hit(client)
+        if retry_after:
+            logger.debug(f"Клиент {client} превысил лимит {name}")
+            raise HTTPException(
+                status_code=429,
+                detail="Слишком много запросов, повторите позже",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    return dependency
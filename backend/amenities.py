@@ -0,0 +1,89 @@
+import logging
+from typing import Dict, Iterable, Optional, Set
+
+from repository import get_repository
+
+logger = logging.getLogger(__name__)
+
+
+class AmenityIndex:
+    """
+    Битовые маски удобств: каждому коду удобства соответствует номер бита,
+    каждому типу номера — маска из всех его удобств (целое произвольной длины).
+    Фильтр «есть все выбранные удобства» — побитовое И по маскам.
+    """
+
+    def __init__(self, bits: Dict[str, int], masks: Dict[str, int]):
+        self.bits = bits
+        self.codes = {bit: code for code, bit in bits.items()}
+        self.masks = masks
+
+    def mask_for(self, codes: Iterable[str]) -> Optional[int]:
+        """Маска для набора кодов; None, если какой-то код не встречается в каталоге"""
+        mask = 0
+        for code in codes:
+            bit = self.bits.get(code)
+            if bit is None:
+                return None
+            mask |= 1 << bit
+        return mask
+
+    def matching(self, required: int) -> Set[str]:
+        return {room_id for room_id, mask in self.masks.items() if mask & required == required}
+
+    def facets(self, room_ids: Iterable[str]) -> Dict[str, int]:
+        """Количество типов номеров с каждым удобством среди room_ids"""
+        counts = [0] * len(self.bits)
+        for room_id in room_ids:
+            mask = self.masks.get(room_id, 0)
+            while mask:
+                low = mask & -mask
+                counts[low.bit_length() - 1] += 1
+                mask ^= low
+        return {self.codes[bit]: count for bit, count in enumerate(counts) if count}
+
+
+def assign_amenity_bits(codes: Iterable[str]) -> Dict[str, int]:
+    """Номера битов по отсортированным кодам (стабильны, пока набор кодов не меняется)"""
+    return {code: bit for bit, code in enumerate(sorted(set(c for c in codes if c)))}
+
+
+def build_mask(bits: Dict[str, int], codes: Iterable[str]) -> int:
+    mask = 0
+    for code in codes:
+        if code in bits:
+            mask |= 1 << bits[code]
+    return mask
+
+
+def encode_mask(mask: int) -> str:
+    return format(mask, "x")
+
+
+def decode_mask(value: Optional[str]) -> int:
+    return int(value, 16) if value else 0
+
+
+_index: Optional[AmenityIndex] = None
+
+
+def set_amenity_index(index: AmenityIndex):
+    global _index
+    _index = index
+
+
+def reset_amenity_index():
+    """Индекс перечитается из репозитория при следующем обращении (после замены снимка каталога)"""
+    global _index
+    _index = None
+
+
+async def get_amenity_index() -> AmenityIndex:
+    """Индекс удобств; при первом обращении загружается из репозитория (amenity_mask + amenity_bits)"""
+    if _index is None:
+        repository = get_repository()
+        bits = await repository.get_amenity_bits()
+        records = await repository.list_room_types()
+        set_amenity_index(AmenityIndex(bits, {record.id: decode_mask(record.amenity_mask) for record in records}))
+        logger.info(f"get_amenity_index: загружено {len(bits)} удобств для {len(records)} типов номеров")
+    return _index
@@ -0,0 +1,78 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from config import settings
+from storage import object_storage
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_PREFIX = "sync-payloads/property"
+
+# Последний архивированный payload: не проверяем MinIO повторно, пока каталог не изменился
+_last_digest: Optional[str] = None
+
+
+def payload_object_name(digest: str) -> str:
+    return f"{ARCHIVE_PREFIX}/{digest}.json.gz"
+
+
+def encode_payload(data: dict) -> Tuple[str, bytes]:
+    """
+    Канонический JSON (ключи отсортированы) → (sha256, gzip).
+    Одинаковые по содержимому ответы TravelLine получают один ключ.
+    """
+    body = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(body).hexdigest(), gzip.compress(body, compresslevel=6)
+
+
+def decode_payload(blob: bytes) -> dict:
+    if blob[:2] == b"\x1f\x8b":
+        blob = gzip.decompress(blob)
+    return json.loads(blob)
+
+
+async def archive_payload(data: dict) -> Optional[str]:
+    """
+    Сохраняет ответ TravelLine в MinIO под ключом по содержимому (если такого ещё нет)
+    и удаляет устаревшие архивы. Возвращает имя объекта.
+    """
+    global _last_digest
+    digest, blob = await asyncio.to_thread(encode_payload, data)
+    object_name = payload_object_name(digest)
+    if digest == _last_digest:
+        return object_name
+    if not await object_storage.exists(object_name):
+        await object_storage.put_bytes(object_name, blob, content_type="application/gzip")
+        logger.info(f"archive_payload: сохранён {object_name} ({len(blob)} байт)")
+        await prune_archive(keep=object_name)
+    _last_digest = digest
+    return object_name
+
+
+async def list_archived_payloads() -> list:
+    """Архивированные payload, от новых к старым"""
+    objects = await object_storage.list_objects(ARCHIVE_PREFIX + "/")
+    return sorted(objects, key=lambda obj: obj.last_modified, reverse=True)
+
+
+async def prune_archive(keep: Optional[str] = None):
+    """
+    Удаляет архивы старше PAYLOAD_ARCHIVE_RETENTION_DAYS и сверх PAYLOAD_ARCHIVE_MAX_OBJECTS.
+    keep — текущий payload, он не удаляется, даже если был сохранён давно.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.PAYLOAD_ARCHIVE_RETENTION_DAYS)
+    objects = [obj for obj in await list_archived_payloads() if obj.object_name != keep]
+    limit = max(settings.PAYLOAD_ARCHIVE_MAX_OBJECTS - (1 if keep else 0), 0)
+    expired = [
+        obj for i, obj in enumerate(objects)
+        if i >= limit or obj.last_modified < cutoff
+    ]
+    for obj in expired:
+        await object_storage.remove(obj.object_name)
+    if expired:
+        logger.info(f"prune_archive: удалено {len(expired)} устаревших payload")
@@ -0,0 +1,142 @@
+import logging
+from datetime import date, timedelta
+from typing import List, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy import select
+
+from config import settings
+from database import async_session
+from models import RoomType, Occupancy
+from upstream import traveline_request, search_breaker
+from schemas import AvailableRoomType
+
+logger = logging.getLogger(__name__)
+
+
+class AvailabilityGrid:
+    """
+    Кеш доступности: матрица room×day с количеством свободных номеров.
+    Строка — тип номера, столбец — день начиная с start.
+    """
+
+    def __init__(
+        self,
+        start: date,
+        room_ids: List[str],
+        names: List[str],
+        capacity: np.ndarray,
+        free: np.ndarray,
+    ):
+        self.start = start
+        self.room_ids = room_ids
+        self.names = names
+        self.capacity = capacity  # (rooms, 2): adult_bed, extra_bed
+        self.free = free  # (rooms, days)
+
+    @property
+    def days(self) -> int:
+        return self.free.shape[1]
+
+    def search(self, date_from: date, date_to: date, nights: int, guests: int) -> List[AvailableRoomType]:
+        """
+        Ищет типы номеров, свободные на nights ночей с заездом в любой день
+        из [date_from, date_to] и вмещающие guests гостей.
+        """
+        # Заезды в прошлом и за горизонтом кеша отбрасываем
+        first = max((date_from - self.start).days, 0)
+        last = min((date_to - self.start).days, self.days - nights)
+        if last < first or not self.room_ids:
+            return []
+
+        # Минимум свободных номеров в каждом окне из nights дней: (rooms, arrivals)
+        windows = sliding_window_view(self.free, nights, axis=1)[:, first:last + 1]
+        window_min = windows.min(axis=2)
+
+        fits = self.capacity.sum(axis=1) >= guests
+        bookable = (window_min > 0) & fits[:, None]
+
+        result = []
+        for row in np.flatnonzero(bookable.any(axis=1)):
+            arrivals = np.flatnonzero(bookable[row])
+            result.append(AvailableRoomType(
+                id=self.room_ids[row],
+                name=self.names[row],
+                adult_bed=int(self.capacity[row, 0]),
+                extra_bed=int(self.capacity[row, 1]),
+                free_units=int(window_min[row, arrivals].max()),
+                arrival_dates=[self.start + timedelta(days=first + int(i)) for i in arrivals],
+            ))
+        return result
+
+
+_grid: Optional[AvailabilityGrid] = None
+
+
+def get_availability_grid() -> Optional[AvailabilityGrid]:
+    return _grid
+
+
+async def fetch_availability_data(jwt: str, start: date, end: date) -> dict:
+    """
+    Получает доступность из TravelLine API.
+    Ожидаемый формат ответа:
+    {"roomTypes": [{"id": "...", "availability": [{"date": "YYYY-MM-DD", "freeCount": 2}, ...]}]}
+    """
+    url = f"{settings.TRAVELINE_AVAILABILITY_API_BASE_URL}/v1/properties/{settings.PROPERTY_ID}/availability"
+    headers = {"Authorization": f"Bearer {jwt}"}
+    params = {"startDate": start.isoformat(), "endDate": end.isoformat()}
+    try:
+        resp = await traveline_request(search_breaker, "GET", url, headers=headers, params=params)
+        logger.info("fetch_availability_data: доступность успешно получена из TravelLine API")
+        return resp.json()
+    except Exception as e:
+        logger.error(f"fetch_availability_data: ошибка получения доступности: {e}")
+        raise
+
+
+def build_availability_grid(start: date, days: int, rooms: list, data: dict) -> AvailabilityGrid:
+    """
+    Собирает матрицу доступности.
+    rooms: список кортежей (id, name, adult_bed, extra_bed) из БД
+    """
+    room_ids = [r[0] for r in rooms]
+    row_by_id = {room_id: i for i, room_id in enumerate(room_ids)}
+    capacity = np.array([[r[2] or 0, r[3] or 0] for r in rooms], dtype=np.int32).reshape(len(rooms), 2)
+    free = np.zeros((len(rooms), days), dtype=np.int32)
+
+    for rt in data.get("roomTypes", []):
+        row = row_by_id.get(rt.get("id"))
+        if row is None:
+            continue
+        for day in rt.get("availability", []):
+            try:
+                col = (date.fromisoformat(day["date"]) - start).days
+            except (KeyError, TypeError, ValueError):
+                continue
+            if 0 <= col < days:
+                free[row, col] = max(int(day.get("freeCount") or 0), 0)
+
+    return AvailabilityGrid(start, room_ids, [r[1] for r in rooms], capacity, free)
+
+
+async def refresh_availability():
+    """Обновляет кеш доступности (вызывается из цикла синхронизации)"""
+    global _grid
+    start = date.today()
+    days = settings.AVAILABILITY_HORIZON_DAYS
+
+    async with async_session() as session:
+        query = select(RoomType.id, RoomType.name, Occupancy.adult_bed, Occupancy.extra_bed).outerjoin(
+            Occupancy, RoomType.id == Occupancy.room_type_id
+        ).order_by(RoomType.position)
+        rooms = (await session.execute(query)).all()
+
+    # parser тянет синхронизацию каталога целиком — импортируем только при обновлении
+    from parser import fetch_jwt
+
+    jwt = await fetch_jwt()
+    data = await fetch_availability_data(jwt, start, start + timedelta(days=days - 1))
+    _grid = build_availability_grid(start, days, rooms, data)
+    logger.info(f"refresh_availability: кеш доступности обновлён ({len(rooms)}×{days})")
@@ -0,0 +1,79 @@
+"""
+Сравнение сериализации ответов API: размер тела и CPU на запрос.
+
+    python bench_responses.py [--items 200] [--repeat 300]
+
+"before" — путь FastAPI по умолчанию: повторная валидация по response_model,
+jsonable_encoder и JSONResponse. Остальные строки — responses.encode_body
+для разных форматов и кодировок.
+"""
+import argparse
+import time
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from responses import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPES, brotli, encode_body, msgpack, orjson
+from schemas import CatalogRoomType
+
+
+def make_catalog(count: int) -> List[CatalogRoomType]:
+    return [
+        CatalogRoomType(
+            id=f"room-{i}",
+            name=f"Апартаменты с видом на море №{i}",
+            description="Просторный номер с кухней, балконом и панорамными окнами. " * 4,
+            price=2700,
+            amenities=["free_wifi", "air_conditioner", "tv", "kitchen", "balcony"][: 1 + i % 5],
+            image=f"https://example.com/images/{i}.jpg",
+            image_variants={w: f"https://cdn.example.com/images/{i:064x}/{w}.jpg" for w in ("320", "640", "1280")},
+            size=20.0 + i % 40,
+            category="Апартаменты",
+            adult_bed=1 + i % 4,
+        )
+        for i in range(count)
+    ]
+
+
+def measure(fn, repeat: int):
+    fn()
+    started = time.process_time()
+    for _ in range(repeat):
+        body = fn()
+    return len(body), (time.process_time() - started) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=300)
+    args = parser.parse_args()
+
+    catalog = make_catalog(args.items)
+    adapter = TypeAdapter(List[CatalogRoomType])
+
+    def before():
+        validated = adapter.validate_python(catalog, from_attributes=True)
+        return JSONResponse(jsonable_encoder(validated)).body
+
+    cases = [("before: response_model + jsonable_encoder", before)]
+    variants = [(JSON_MEDIA_TYPE, None), (JSON_MEDIA_TYPE, "gzip")]
+    if brotli is not None:
+        variants.append((JSON_MEDIA_TYPE, "br"))
+    if msgpack is not None:
+        variants += [(MSGPACK_MEDIA_TYPES[0], None), (MSGPACK_MEDIA_TYPES[0], "gzip")]
+    for media_type, encoding in variants:
+        label = f"after: {media_type}" + (f" + {encoding}" if encoding else "")
+        cases.append((label, lambda m=media_type, e=encoding: encode_body(catalog, m, e)[0]))
+
+    print(f"{args.items} CatalogRoomType, {args.repeat} повторов, orjson={'да' if orjson else 'нет'}")
+    print(f"{'вариант':<50}{'байт':>10}{'мкс CPU':>12}")
+    for label, fn in cases:
+        size, cpu = measure(fn, args.repeat)
+        print(f"{label:<50}{size:>10}{cpu:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
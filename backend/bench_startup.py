@@ -0,0 +1,66 @@
+"""
+Замер холодного старта API: время импорта main и выполнения lifespan.
+
+    python bench_startup.py [--runs 5] [--top 15]
+
+Каждый прогон выполняется в новом интерпретаторе (как при запуске контейнера).
+Дополнительно выводятся модули с наибольшим собственным временем импорта
+(по данным python -X importtime).
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = r"""
+import asyncio, json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def run_lifespan():
+    async with main.app.router.lifespan_context(main.app):
+        ready = time.perf_counter()
+    return ready, time.perf_counter()
+
+ready, stopped = asyncio.run(run_lifespan())
+print(json.dumps({"import": imported - started, "startup": ready - imported, "shutdown": stopped - ready}))
+"""
+
+
+def run_probe() -> dict:
+    result = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def top_imports(limit: int):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((int(self_us), int(cumulative_us), name))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    samples = [run_probe() for _ in range(args.runs)]
+    print(f"{args.runs} прогонов (медиана / минимум, мс)")
+    for key in ("import", "startup", "shutdown"):
+        values = [s[key] * 1000 for s in samples]
+        print(f"  {key:<10}{statistics.median(values):>10.1f}{min(values):>10.1f}")
+
+    print("\nСамые долгие импорты (собственное время, мс):")
+    for self_us, cumulative_us, name in top_imports(args.top):
+        print(f"  {self_us / 1000:>8.1f}  {cumulative_us / 1000:>8.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from metrics import Counter, Gauge
+
+COALESCE_CALLS = Counter(
+    "coalesce_calls_total",
+    "Вызовы сервисных функций: leader — выполнен запрос, coalesced — дождался чужого, cache — из кеша",
+)
+COALESCE_IN_FLIGHT = Gauge("coalesce_in_flight", "Выполняющиеся вычисления, которые могут разделить несколько вызовов")
+
+
+class TTLCache:
+    """
+    Простой in-process LRU кеш с ограничением времени жизни записей.
+    Рассчитан на использование из одного event loop (без блокировок).
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self):
+        self._data.clear()
+
+
+_MISSING = object()
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+class SingleFlight:
+    """
+    Объединение одинаковых конкурентных вызовов асинхронных функций:
+    вызовы с той же функцией и аргументами ждут одно вычисление и получают
+    общий результат, который затем живёт в TTL LRU кеше до clear().
+
+    Вычисление выполняется отдельной задачей, поэтому отмена первого вызова
+    (клиент закрыл соединение) не отменяет его для остальных.
+    Результаты общие — вызывающий код не должен их изменять.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        self.results = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        # Вычисление, начатое до clear(), не должно попасть в кеш после него
+        self._generation = 0
+
+    def __call__(self, fn):
+        name = fn.__name__
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            key = (name, _freeze(args), _freeze(kwargs))
+            cached = self.results.get(key, _MISSING)
+            if cached is not _MISSING:
+                COALESCE_CALLS.inc(function=name, result="cache")
+                return cached
+            task = self._in_flight.get(key)
+            if task is not None:
+                COALESCE_CALLS.inc(function=name, result="coalesced")
+            else:
+                COALESCE_CALLS.inc(function=name, result="leader")
+                task = asyncio.ensure_future(fn(*args, **kwargs))
+                self._in_flight[key] = task
+                COALESCE_IN_FLIGHT.inc()
+                task.add_done_callback(functools.partial(self._done, key, self._generation))
+            return await asyncio.shield(task)
+
+        return wrapper
+
+    def _done(self, key: Hashable, generation: int, task: asyncio.Task):
+        COALESCE_IN_FLIGHT.dec()
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        if generation == self._generation:
+            self.results.set(key, task.result())
+
+    def clear(self):
+        """Сбрасывает кеш результатов (например, после синхронизации каталога)"""
+        self._generation += 1
+        self.results.clear()
+        # Новые вызовы не должны присоединяться к вычислениям по старым данным
+        self._in_flight.clear()
@@ -0,0 +1,261 @@
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+import redis.asyncio as redis
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache import TTLCache
+from config import settings
+from database import async_session
+from models import RoomType, CatalogVersion
+from schemas import CatalogChanges
+from service import get_room_type_infos
+from repository import get_repository
+
+logger = logging.getLogger(__name__)
+
+CATALOG_CHANNEL = "catalog:changes"
+
+# Эндпоинты, отдающие данные каталога (им добавляется заголовок X-Catalog-Age)
+CATALOG_PATH_PREFIXES = (
+    "/api/main/", "/api/catalog/room-types", "/api/catalog/changes",
+    "/api/info/", "/api/similar/", "/api/search/", "/api/export/",
+)
+
+_synced_at_cache = TTLCache(maxsize=1, ttl=5)
+
+
+# --- Версии каталога (вызывается из parser.save_room_types_to_db) ---
+
+def room_fingerprint(room_type: dict) -> str:
+    """Отпечаток данных типа номера из API: меняется при любом изменении полей"""
+    payload = json.dumps(room_type, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def diff_catalog(previous: Dict[str, Optional[str]], current: Dict[str, str]) -> Tuple[List[str], List[str], List[str]]:
+    """(added, changed, removed) по отпечаткам до и после синхронизации"""
+    added = sorted(set(current) - set(previous))
+    removed = sorted(set(previous) - set(current))
+    changed = sorted(room_id for room_id in set(current) & set(previous) if current[room_id] != previous[room_id])
+    return added, changed, removed
+
+
+async def load_fingerprints(session: AsyncSession) -> Dict[str, Optional[str]]:
+    return dict((await session.execute(select(RoomType.id, RoomType.content_hash))).all())
+
+
+async def record_catalog_version(
+    session: AsyncSession, added: List[str], changed: List[str], removed: List[str]
+) -> Optional[CatalogVersion]:
+    """
+    Добавляет версию в текущую транзакцию (если что-то изменилось) и удаляет
+    версии старше CATALOG_VERSIONS_KEEP последних.
+    """
+    if not (added or changed or removed):
+        return None
+    version = CatalogVersion(added=added, changed=changed, removed=removed)
+    session.add(version)
+    await session.flush()
+    await session.execute(
+        delete(CatalogVersion).where(CatalogVersion.version <= version.version - settings.CATALOG_VERSIONS_KEEP)
+    )
+    return version
+
+
+def version_payload(version: CatalogVersion) -> dict:
+    return {
+        "version": version.version,
+        "added": version.added,
+        "changed": version.changed,
+        "removed": version.removed,
+    }
+
+
+async def publish_catalog_version(version: CatalogVersion):
+    """Оповещает все процессы API о новой версии (ошибки Redis не ломают синхронизацию)"""
+    client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+    try:
+        await client.publish(CATALOG_CHANNEL, json.dumps(version_payload(version)))
+    except Exception as e:
+        logger.error(f"publish_catalog_version: ошибка публикации версии {version.version}: {e}")
+    finally:
+        await client.close()
+
+
+# --- Чтение изменений ---
+
+async def get_current_version() -> int:
+    _, current = await get_repository().get_catalog_version_range()
+    return current
+
+
+async def get_catalog_changes(since: int) -> CatalogChanges:
+    """
+    Изменения каталога после версии since: актуальные данные добавленных/изменённых
+    номеров и id удалённых. Если since старше хранимых версий, возвращается
+    весь каталог с full_resync=True.
+    """
+    repository = get_repository()
+    oldest, current = await repository.get_catalog_version_range()
+    if since >= current:
+        return CatalogChanges(version=current, since=since)
+    if oldest is None or since < oldest - 1:
+        room_ids = [record.id for record in await repository.list_room_types()]
+        full = await get_room_type_infos(room_ids)
+        return CatalogChanges(version=current, since=since, full_resync=True, items=full.items)
+    async with async_session() as session:
+        versions = (await session.execute(
+            select(CatalogVersion).where(CatalogVersion.version > since).order_by(CatalogVersion.version)
+        )).scalars().all()
+
+    # Сворачиваем цепочку версий в итоговое состояние
+    upserted: Set[str] = set()
+    removed: Set[str] = set()
+    for version in versions:
+        for room_id in (*version.added, *version.changed):
+            removed.discard(room_id)
+            upserted.add(room_id)
+        for room_id in version.removed:
+            upserted.discard(room_id)
+            removed.add(room_id)
+
+    batch = await get_room_type_infos(sorted(upserted))
+    return CatalogChanges(
+        version=current,
+        since=since,
+        items=batch.items,
+        removed=sorted(removed | set(batch.missing)),
+    )
+
+
+# --- Рассылка версий подписчикам SSE ---
+
+class CatalogBroadcaster:
+    """
+    Одна подписка на Redis на процесс, раздающая версии локальным очередям
+    SSE-клиентов. Слушатель запускается при первом подписчике и
+    переподключается при ошибках Redis.
+    """
+
+    QUEUE_SIZE = 16
+
+    def __init__(self):
+        self._queues: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        self._queues.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._queues.discard(queue)
+
+    def _dispatch(self, payload: dict):
+        for queue in self._queues:
+            if queue.full():
+                # Медленный клиент: старые версии не нужны, важна последняя
+                queue.get_nowait()
+            queue.put_nowait(payload)
+
+    async def _listen(self):
+        while self._queues:
+            client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+            pubsub = client.pubsub()
+            try:
+                await pubsub.subscribe(CATALOG_CHANNEL)
+                while self._queues:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message:
+                        self._dispatch(json.loads(message["data"]))
+            except Exception as e:
+                logger.error(f"CatalogBroadcaster: ошибка подписки на {CATALOG_CHANNEL}: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
+                await client.close()
+
+
+broadcaster = CatalogBroadcaster()
+
+
+def _sse_event(payload: dict) -> str:
+    return f"id: {payload['version']}\nevent: catalog\ndata: {json.dumps(payload)}\n\n"
+
+
+async def catalog_event_stream(last_event_id: Optional[int], is_disconnected) -> AsyncIterator[str]:
+    """
+    Поток Server-Sent Events с версиями каталога. Сразу отправляет текущую версию
+    (если клиент её ещё не видел), затем — каждую новую; между ними keepalive-комментарии.
+    """
+    queue = broadcaster.subscribe()
+    try:
+        current = await get_current_version()
+        if last_event_id is None or last_event_id < current:
+            yield _sse_event({"version": current})
+        while not await is_disconnected():
+            try:
+                payload = await asyncio.wait_for(queue.get(), timeout=settings.CATALOG_SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield _sse_event(payload)
+    finally:
+        broadcaster.unsubscribe(queue)
+
+
+# --- Возраст каталога ---
+
+async def get_catalog_synced_at() -> Optional[datetime]:
+    """Время последней удачной синхронизации (для снимка — синхронизации, с которой он снят)"""
+    synced_at = _synced_at_cache.get("synced_at")
+    if synced_at is None:
+        synced_at = await get_repository().get_catalog_synced_at()
+        if synced_at is not None:
+            _synced_at_cache.set("synced_at", synced_at)
+    return synced_at
+
+
+class CatalogAgeMiddleware:
+    """
+    Добавляет к ответам эндпоинтов каталога X-Catalog-Age (секунды с последней
+    удачной синхронизации) и X-Catalog-Stale: true, если возраст больше
+    CATALOG_STALE_AFTER_SECONDS — например, пока TravelLine недоступен
+    и API отдаёт последний удачный каталог.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(CATALOG_PATH_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+        try:
+            synced_at = await get_catalog_synced_at()
+        except Exception as e:
+            logger.error(f"CatalogAgeMiddleware: не удалось определить возраст каталога: {e}")
+            synced_at = None
+        if synced_at is None:
+            await self.app(scope, receive, send)
+            return
+
+        age = max(int((datetime.now(timezone.utc) - synced_at).total_seconds()), 0)
+        extra = [(b"x-catalog-age", str(age).encode())]
+        if age > settings.CATALOG_STALE_AFTER_SECONDS:
+            extra.append((b"x-catalog-stale", b"true"))
+
+        async def send_with_age(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + extra
+            await send(message)
+
+        await self.app(scope, receive, send_with_age)
@@ -0,0 +1,224 @@
+import asyncio
+import csv
+import importlib.util
+import io
+import logging
+from typing import AsyncIterator, Dict, List
+
+from admission import admission, PRIORITY_LOW
+from config import settings
+from repository import get_repository
+from responses import dumps_json
+from schemas import RoomTypeRecord
+
+logger = logging.getLogger(__name__)
+
+
+EXPORT_COLUMNS = [
+    "id", "name", "description", "category", "size", "position", "price", "adult_bed", "extra_bed",
+    "image", "images", "amenities",
+    "country_code", "region", "city_name", "address_line", "postal_code", "latitude", "longitude",
+]
+
+# Формат → (media type, расширение файла)
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# Разделитель списков (images, amenities) в CSV
+CSV_LIST_SEPARATOR = "|"
+
+# Последняя строка выгрузки NDJSON ({"error": ...}) или CSV, если чтение каталога оборвалось
+EXPORT_ERROR_MARKER = "#export-truncated"
+
+
+def export_row(record: RoomTypeRecord) -> Dict:
+    """Плоская строка выгрузки: адрес — отдельными колонками, изображения и удобства — списками"""
+    return {
+        "id": record.id,
+        "name": record.name,
+        "description": record.description,
+        "category": record.category,
+        "size": record.size,
+        "position": record.position,
+        "price": 2700,
+        "adult_bed": record.adult_bed,
+        "extra_bed": record.extra_bed,
+        "image": record.images[0] if record.images else None,
+        "images": record.images,
+        "amenities": record.amenities,
+        "country_code": record.country_code,
+        "region": record.region,
+        "city_name": record.city_name,
+        "address_line": record.address_line,
+        "postal_code": record.postal_code,
+        "latitude": record.latitude,
+        "longitude": record.longitude,
+    }
+
+
+def parquet_available() -> bool:
+    # Необязательная зависимость: pyarrow импортируется только при выгрузке в Parquet
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+async def export_room_types(fmt: str, batch_size: int = 0) -> AsyncIterator[bytes]:
+    """
+    Выгрузка всего каталога в формате fmt (см. EXPORT_FORMATS) частями по мере чтения:
+    в памяти одновременно не больше batch_size (EXPORT_BATCH_SIZE) типов номеров.
+
+    Слот admission ("export") держится, пока генератор не завершится или не будет закрыт,
+    то есть на всё время отдачи тела ответа. Если чтение оборвалось на середине,
+    ошибка пишется в лог, в NDJSON/CSV добавляется последняя строка-маркер
+    (EXPORT_ERROR_MARKER), и исключение пробрасывается дальше — соединение закрывается
+    без штатного завершения ответа.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат выгрузки: {fmt}")
+    async with admission("export", PRIORITY_LOW):
+        batches = get_repository().iter_room_types(batch_size or settings.EXPORT_BATCH_SIZE)
+        if fmt == "ndjson":
+            chunks = _ndjson_chunks(batches)
+        elif fmt == "csv":
+            chunks = _csv_chunks(batches)
+        else:
+            chunks = _parquet_chunks(batches)
+        sent = 0
+        try:
+            async for chunk in chunks:
+                sent += len(chunk)
+                yield chunk
+        except Exception as e:
+            logger.error(f"export_room_types: выгрузка {fmt} прервана после {sent} байт: {e}")
+            if not sent:
+                # Ответ ещё не начат (см. start_export): клиент получит код ошибки
+                raise
+            if fmt == "ndjson":
+                yield dumps_json({"error": EXPORT_ERROR_MARKER}) + b"\n"
+            elif fmt == "csv":
+                yield f"{EXPORT_ERROR_MARKER}\r\n".encode("utf-8")
+            raise
+
+
+async def start_export(fmt: str, batch_size: int = 0) -> AsyncIterator[bytes]:
+    """
+    Запускает выгрузку до отправки заголовков ответа: слот admission и первая порция
+    получаются здесь, поэтому перегрузка (503) и недоступная БД видны клиенту
+    как статус ответа, а не как пустой файл с кодом 200.
+    """
+    chunks = export_room_types(fmt, batch_size)
+    first = await anext(chunks, b"")
+    return _prepend(first, chunks)
+
+
+async def _prepend(first: bytes, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    try:
+        yield first
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        # Клиент ушёл: закрываем выгрузку сразу, чтобы освободить слот и курсор БД
+        await chunks.aclose()
+
+
+async def _ndjson_chunks(batches: AsyncIterator[List[RoomTypeRecord]]) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        yield b"".join(dumps_json(export_row(record)) + b"\n" for record in batch)
+
+
+async def _csv_chunks(batches: AsyncIterator[List[RoomTypeRecord]]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    # Заголовок уходит вместе с первой порцией строк (или один, если каталог пуст)
+    writer.writeheader()
+    async for batch in batches:
+        for record in batch:
+            row = export_row(record)
+            row["images"] = CSV_LIST_SEPARATOR.join(row["images"])
+            row["amenities"] = CSV_LIST_SEPARATOR.join(row["amenities"])
+            writer.writerow(row)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.getvalue():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Файл только для записи, из которого можно забирать записанное: ParquetWriter
+    пишет сюда row group за row group, а выгрузка сразу отдаёт байты клиенту.
+    tell() считает от начала файла, чтобы смещения в футере Parquet были верны.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.string()),
+        ("name", pa.string()),
+        ("description", pa.string()),
+        ("category", pa.string()),
+        ("size", pa.float64()),
+        ("position", pa.int32()),
+        ("price", pa.int32()),
+        ("adult_bed", pa.int32()),
+        ("extra_bed", pa.int32()),
+        ("image", pa.string()),
+        ("images", pa.list_(pa.string())),
+        ("amenities", pa.list_(pa.string())),
+        ("country_code", pa.string()),
+        ("region", pa.string()),
+        ("city_name", pa.string()),
+        ("address_line", pa.string()),
+        ("postal_code", pa.string()),
+        ("latitude", pa.float64()),
+        ("longitude", pa.float64()),
+    ])
+
+
+async def _parquet_chunks(batches: AsyncIterator[List[RoomTypeRecord]]) -> AsyncIterator[bytes]:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Для выгрузки в Parquet нужен pyarrow")
+    schema = _parquet_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        async for batch in batches:
+            # Каждая порция — отдельная row group; кодирование не держит event loop
+            table = pa.Table.from_pylist([export_row(record) for record in batch], schema=schema)
+            await asyncio.to_thread(writer.write_table, table)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    # Футер с метаданными row groups
+    yield sink.drain()
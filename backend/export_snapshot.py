@@ -0,0 +1,46 @@
+"""
+Снимок каталога и отзывов из Postgres для read-only реплик (REPOSITORY_BACKEND=snapshot).
+
+    python export_snapshot.py                       # в MinIO: catalog-snapshots/latest.json.gz
+    python export_snapshot.py --output snapshot.json.gz
+
+Реплика загружает снимок при старте из CATALOG_SNAPSHOT_SOURCE (файл или объект MinIO).
+Тот же файл подходит для тестов и бенчмарков сервисных функций без Postgres:
+set_repository(SnapshotRepository(decode_snapshot(blob), writable=True)).
+"""
+import argparse
+import asyncio
+import time
+
+
+async def export(args):
+    from database import engine
+    from repository import PostgresRepository, SNAPSHOT_OBJECT, encode_snapshot
+    from storage import object_storage
+
+    started = time.perf_counter()
+    snapshot = await PostgresRepository().export_snapshot()
+    blob = encode_snapshot(snapshot)
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(blob)
+        target = args.output
+    else:
+        await object_storage.put_bytes(SNAPSHOT_OBJECT, blob, content_type="application/gzip")
+        target = SNAPSHOT_OBJECT
+    await engine.dispose()
+    print(
+        f"{target}: {len(snapshot.room_types)} типов номеров, {len(snapshot.feedbacks)} текстовых "
+        f"и {len(snapshot.video_feedbacks)} видео отзывов, версия каталога {snapshot.catalog_version}, "
+        f"{len(blob)} байт за {time.perf_counter() - started:.1f} с"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="записать снимок в файл вместо MinIO")
+    asyncio.run(export(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import logging
+import math
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from config import settings
+from schemas import GeoRoomType, MainRoomType
+from service import get_room_types
+from repository import get_repository
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+Cell = Tuple[int, int]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _lon_ranges(min_lon: float, max_lon: float) -> List[Tuple[float, float]]:
+    """
+    Диапазон долгот, который может выходить за ±180° (поиск у антимеридиана, например
+    на Чукотке), как непересекающиеся диапазоны внутри [-180, 180]
+    """
+    if max_lon - min_lon >= 360:
+        return [(-180.0, 180.0)]
+    ranges = []
+    if min_lon < -180:
+        ranges.append((min_lon + 360, 180.0))
+        min_lon = -180.0
+    if max_lon > 180:
+        ranges.append((-180.0, max_lon - 360))
+        max_lon = 180.0
+    ranges.append((min_lon, max_lon))
+    return ranges
+
+
+class GeoIndex:
+    """
+    Равномерная сетка по широте/долготе: ячейка -> [(room_id, lat, lon)].
+    Запрос просматривает только ячейки, пересекающие область поиска,
+    и считает точное расстояние лишь для адресов из них.
+    """
+
+    def __init__(self, points: List[Tuple[str, float, float]], docs: Dict[str, MainRoomType], cell_deg: float):
+        self.cell_deg = cell_deg
+        self.docs = docs
+        self.cells: Dict[Cell, List[Tuple[str, float, float]]] = defaultdict(list)
+        for room_id, lat, lon in points:
+            self.cells[self._cell(lat, lon)].append((room_id, lat, lon))
+        self.cells = dict(self.cells)
+        self.size = len(points)
+
+    def _cell(self, lat: float, lon: float) -> Cell:
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def _candidates(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float):
+        lat_lo, lon_lo = self._cell(min_lat, min_lon)
+        lat_hi, lon_hi = self._cell(max_lat, max_lon)
+        span = (lat_hi - lat_lo + 1) * (lon_hi - lon_lo + 1)
+        if span > len(self.cells):
+            # Область больше, чем занятых ячеек (например, карта всего мира) — обходим только занятые
+            keys = [
+                key for key in self.cells
+                if lat_lo <= key[0] <= lat_hi and lon_lo <= key[1] <= lon_hi
+            ]
+        else:
+            keys = [(i, j) for i in range(lat_lo, lat_hi + 1) for j in range(lon_lo, lon_hi + 1)]
+        for key in keys:
+            yield from self.cells.get(key, ())
+
+    def _ranked(self, hits: Dict[str, float], limit: int) -> List[GeoRoomType]:
+        ranked = sorted(hits.items(), key=lambda item: item[1])
+        return [
+            GeoRoomType(**self.docs[room_id].model_dump(), distance_km=round(distance, 3))
+            for room_id, distance in ranked if room_id in self.docs
+        ][:limit]
+
+    def nearby(self, lat: float, lon: float, radius_km: float, limit: int) -> List[GeoRoomType]:
+        """Типы номеров в радиусе radius_km от точки, от ближайших к дальним"""
+        d_lat = radius_km / KM_PER_DEGREE_LAT
+        cos_lat = math.cos(math.radians(min(abs(lat) + d_lat, 89.9)))
+        d_lon = min(radius_km / (KM_PER_DEGREE_LAT * cos_lat), 180.0)
+        hits: Dict[str, float] = {}
+        for min_lon, max_lon in _lon_ranges(lon - d_lon, lon + d_lon):
+            for room_id, p_lat, p_lon in self._candidates(lat - d_lat, min_lon, lat + d_lat, max_lon):
+                distance = haversine_km(lat, lon, p_lat, p_lon)
+                # У номера может быть несколько адресов — берём ближайший
+                if distance <= radius_km and distance < hits.get(room_id, math.inf):
+                    hits[room_id] = distance
+        return self._ranked(hits, limit)
+
+    def within_bbox(
+        self, min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+        lat: float, lon: float, limit: int,
+    ) -> List[GeoRoomType]:
+        """Типы номеров внутри прямоугольника, отсортированные по расстоянию до (lat, lon)"""
+        hits: Dict[str, float] = {}
+        for room_id, p_lat, p_lon in self._candidates(min_lat, min_lon, max_lat, max_lon):
+            if not (min_lat <= p_lat <= max_lat and min_lon <= p_lon <= max_lon):
+                continue
+            distance = haversine_km(lat, lon, p_lat, p_lon)
+            if distance < hits.get(room_id, math.inf):
+                hits[room_id] = distance
+        return self._ranked(hits, limit)
+
+
+_index: Optional[GeoIndex] = None
+
+
+def get_geo_index() -> Optional[GeoIndex]:
+    return _index
+
+
+async def rebuild_geo_index():
+    """Перестраивает индекс по адресам типов номеров (вызывается после синхронизации)"""
+    global _index
+    room_types = await get_room_types()
+    points = [
+        (record.id, record.latitude, record.longitude) for record in await get_repository().list_room_types()
+        if record.latitude is not None and record.longitude is not None
+        and -90 <= record.latitude <= 90 and -180 <= record.longitude <= 180
+    ]
+    _index = GeoIndex(points, {rt.id: rt for rt in room_types}, settings.GEO_GRID_CELL_DEGREES)
+    logger.info(f"rebuild_geo_index: проиндексировано {len(points)} адресов в {len(_index.cells)} ячейках")
@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import io
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from database import async_session
+from models import ImageMirror
+from storage import object_storage
+from workers import run_in_process
+
+logger = logging.getLogger(__name__)
+
+IMAGE_PREFIX = "images"
+
+
+def variant_widths() -> List[int]:
+    return sorted(int(w) for w in settings.IMAGE_VARIANT_WIDTHS.split(",") if w.strip())
+
+
+def variant_object_name(content_hash: str, width: int) -> str:
+    return f"{IMAGE_PREFIX}/{content_hash}/{width}.jpg"
+
+
+def variant_url(content_hash: str, width: int) -> str:
+    return f"{settings.MEDIA_PUBLIC_BASE_URL.rstrip('/')}/{variant_object_name(content_hash, width)}"
+
+
+# --- Ресайз (выполняется в пуле процессов) ---
+
+def resize_image(data: bytes, widths: List[int]) -> Dict[int, bytes]:
+    """
+    Уменьшает изображение до каждой из ширин (с сохранением пропорций) и кодирует в JPEG.
+    Ширины больше оригинала пропускаются; если оригинал меньше всех ширин,
+    сохраняется одна копия под наименьшей шириной.
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as img:
+        img = img.convert("RGB")
+        targets = [w for w in widths if w <= img.width] or widths[:1]
+        variants = {}
+        for width in targets:
+            if width < img.width:
+                height = max(1, round(img.height * width / img.width))
+                resized = img.resize((width, height), Image.LANCZOS)
+            else:
+                resized = img
+            out = io.BytesIO()
+            resized.save(out, format="JPEG", quality=82, optimize=True, progressive=True)
+            variants[width] = out.getvalue()
+        return variants
+
+
+# --- Зеркалирование (event loop) ---
+
+async def _mirror_one(client: httpx.AsyncClient, url: str, known_hashes: Dict[str, str]) -> Optional[ImageMirror]:
+    resp = await client.get(url)
+    resp.raise_for_status()
+    data = resp.content
+    content_hash = hashlib.sha256(data).hexdigest()
+
+    # Такое же содержимое уже зеркалировано под другим URL — переиспользуем варианты
+    widths = known_hashes.get(content_hash)
+    if widths is None:
+        variants = await run_in_process(resize_image, data, variant_widths())
+        for width, body in variants.items():
+            await object_storage.put_bytes(variant_object_name(content_hash, width), body, content_type="image/jpeg")
+        widths = ",".join(str(w) for w in sorted(variants))
+        known_hashes[content_hash] = widths
+
+    return ImageMirror(source_url=url, content_hash=content_hash, widths=widths)
+
+
+async def mirror_images(urls: Iterable[str]):
+    """
+    Скачивает новые изображения, дедуплицирует их по sha256 содержимого и сохраняет
+    уменьшенные варианты в MinIO. Уже зеркалированные URL пропускаются.
+    """
+    urls = {u for u in urls if u}
+    if not urls:
+        return
+
+    async with async_session() as session:
+        result = await session.execute(select(ImageMirror.source_url, ImageMirror.content_hash, ImageMirror.widths))
+        rows = result.all()
+    mirrored = {row.source_url for row in rows}
+    known_hashes = {row.content_hash: row.widths for row in rows}
+
+    new_urls = sorted(urls - mirrored)
+    if not new_urls:
+        return
+
+    semaphore = asyncio.Semaphore(settings.IMAGE_MIRROR_CONCURRENCY)
+    created = []
+
+    async def mirror(client: httpx.AsyncClient, url: str):
+        async with semaphore:
+            try:
+                created.append(await _mirror_one(client, url, known_hashes))
+            except Exception as e:
+                logger.error(f"mirror_images: ошибка обработки изображения {url}: {e}")
+
+    await object_storage.set_public_read(IMAGE_PREFIX)
+    async with httpx.AsyncClient(timeout=30) as client:
+        await asyncio.gather(*(mirror(client, url) for url in new_urls))
+
+    if created:
+        async with async_session() as session:
+            session.add_all(created)
+            await session.commit()
+    logger.info(f"mirror_images: зеркалировано {len(created)} из {len(new_urls)} новых изображений")
+
+
+async def get_image_variants(session: AsyncSession, urls: Iterable[str]) -> Dict[str, Dict[str, str]]:
+    """Возвращает {исходный URL: {ширина: URL варианта}} для зеркалированных изображений"""
+    urls = list({u for u in urls if u})
+    if not urls:
+        return {}
+    result = await session.execute(
+        select(ImageMirror.source_url, ImageMirror.content_hash, ImageMirror.widths)
+        .where(ImageMirror.source_url.in_(urls))
+    )
+    return {
+        row.source_url: {
+            width: variant_url(row.content_hash, int(width))
+            for width in row.widths.split(",") if width
+        }
+        for row in result.all()
+    }
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+from config import settings
+from metrics import Counter, Gauge, Summary
+from schemas import Feedback, FeedbackCreate
+from service import create_feedbacks
+
+logger = logging.getLogger(__name__)
+
+FEEDBACK_BUFFER_DEPTH = Gauge("feedback_buffer_depth", "Отзывы в буфере, ожидающие записи в БД")
+FEEDBACK_BATCH_SIZE = Summary("feedback_batch_size", "Количество отзывов в одном INSERT")
+FEEDBACK_FLUSH_SECONDS = Summary("feedback_flush_seconds", "Время записи пакета отзывов")
+FEEDBACK_REJECTED = Counter("feedback_rejected_total", "Отзывы, не принятые в буфер (full, closed) или не записанные (error)")
+
+
+class BufferFull(Exception):
+    """Буфер переполнен или закрыт: отзыв не принят"""
+
+
+class FeedbackBuffer:
+    """
+    Буфер публичных отзывов: запросы складывают отзывы в ограниченную очередь,
+    фоновая задача пишет их пакетами до max_batch строк, собирая пакет не дольше
+    interval секунд. submit возвращает отзыв только после коммита его пакета;
+    если очередь полна дольше put_timeout, отзыв отклоняется (BufferFull).
+    """
+
+    def __init__(self, max_batch: int, interval: float, max_pending: int, put_timeout: float):
+        self.max_batch = max_batch
+        self.interval = interval
+        self.max_pending = max_pending
+        self.put_timeout = put_timeout
+        self._pending: Deque[Tuple[FeedbackCreate, asyncio.Future]] = deque()
+        self._has_items = asyncio.Event()
+        self._has_space = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    async def submit(self, data: FeedbackCreate) -> Feedback:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.put_timeout
+        while len(self._pending) >= self.max_pending and not self._closed:
+            self._has_space.clear()
+            try:
+                await asyncio.wait_for(self._has_space.wait(), max(deadline - loop.time(), 0))
+            except asyncio.TimeoutError:
+                FEEDBACK_REJECTED.inc(reason="full")
+                raise BufferFull("буфер отзывов переполнен")
+        if self._closed:
+            FEEDBACK_REJECTED.inc(reason="closed")
+            raise BufferFull("буфер отзывов закрыт")
+
+        future = loop.create_future()
+        self._pending.append((data, future))
+        FEEDBACK_BUFFER_DEPTH.set(len(self._pending))
+        self._has_items.set()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        # Отключение клиента не отменяет запись: отзыв уже в пакете
+        return await asyncio.shield(future)
+
+    async def _run(self):
+        while True:
+            await self._has_items.wait()
+            if not self._pending:
+                if self._closed:
+                    return
+                self._has_items.clear()
+                continue
+            if len(self._pending) < self.max_batch and not self._closed:
+                # Даём пакету набраться, но не дольше interval
+                await asyncio.sleep(self.interval)
+            batch = [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+            FEEDBACK_BUFFER_DEPTH.set(len(self._pending))
+            self._has_space.set()
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Tuple[FeedbackCreate, asyncio.Future]]):
+        FEEDBACK_BATCH_SIZE.observe(len(batch))
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            created = await create_feedbacks([data for data, _ in batch])
+        except Exception as e:
+            logger.error(f"Не удалось записать пакет из {len(batch)} отзывов: {e}")
+            FEEDBACK_REJECTED.inc(len(batch), reason="error")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        FEEDBACK_FLUSH_SECONDS.observe(loop.time() - started)
+        for (_, future), feedback in zip(batch, created):
+            if not future.done():
+                future.set_result(feedback)
+
+    async def close(self):
+        """Перестаёт принимать отзывы и дописывает уже принятые"""
+        self._closed = True
+        self._has_space.set()
+        self._has_items.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+
+_buffer: Optional[FeedbackBuffer] = None
+
+
+def get_feedback_buffer() -> FeedbackBuffer:
+    global _buffer
+    if _buffer is None:
+        _buffer = FeedbackBuffer(
+            max_batch=settings.FEEDBACK_BATCH_SIZE,
+            interval=settings.FEEDBACK_BATCH_INTERVAL_MS / 1000,
+            max_pending=settings.FEEDBACK_BUFFER_SIZE,
+            put_timeout=settings.FEEDBACK_SUBMIT_TIMEOUT,
+        )
+    return _buffer
+
+
+async def close_feedback_buffer():
+    if _buffer is not None:
+        await _buffer.close()
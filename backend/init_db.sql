@@ -7,6 +7,8 @@ CREATE TABLE IF NOT EXISTS room_types (
     category_code VARCHAR(100),
     category_name VARCHAR(255),
     position INTEGER,
+    amenity_mask VARCHAR(256),  -- битовая маска удобств (hex)
+    content_hash VARCHAR(64),  -- sha256 данных из API
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
@@ -28,6 +30,12 @@ CREATE TABLE IF NOT EXISTS amenities (
     FOREIGN KEY (room_type_id) REFERENCES room_types(id) ON DELETE CASCADE
 );
 
+-- Создание таблицы amenity_bits
+CREATE TABLE IF NOT EXISTS amenity_bits (
+    code VARCHAR(100) PRIMARY KEY,
+    bit INTEGER NOT NULL UNIQUE
+);
+
 -- Создание таблицы addresses
 CREATE TABLE IF NOT EXISTS addresses (
     id SERIAL PRIMARY KEY,
@@ -80,10 +88,46 @@ CREATE TABLE IF NOT EXISTS video_feedbacks (
     uuid VARCHAR(36) PRIMARY KEY,
     file VARCHAR(1024) NOT NULL,
     rate INTEGER NOT NULL CHECK (rate >= 0 AND rate <= 5),
+    telegram_file_id VARCHAR(255),
+    duration FLOAT,
+    width INTEGER,
+    height INTEGER,
+    bitrate INTEGER,
+    poster VARCHAR(1024),
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Создание таблицы rating_aggregates
+CREATE TABLE IF NOT EXISTS rating_aggregates (
+    kind VARCHAR(10) PRIMARY KEY,
+    count INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL DEFAULT 0,
+    rate_0 INTEGER NOT NULL DEFAULT 0,
+    rate_1 INTEGER NOT NULL DEFAULT 0,
+    rate_2 INTEGER NOT NULL DEFAULT 0,
+    rate_3 INTEGER NOT NULL DEFAULT 0,
+    rate_4 INTEGER NOT NULL DEFAULT 0,
+    rate_5 INTEGER NOT NULL DEFAULT 0
+);
+
+-- Создание таблицы image_mirrors
+CREATE TABLE IF NOT EXISTS image_mirrors (
+    source_url VARCHAR(1024) PRIMARY KEY,
+    content_hash VARCHAR(64) NOT NULL,
+    widths VARCHAR(255) NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Создание таблицы catalog_versions
+CREATE TABLE IF NOT EXISTS catalog_versions (
+    version SERIAL PRIMARY KEY,
+    added JSON NOT NULL DEFAULT '[]',
+    changed JSON NOT NULL DEFAULT '[]',
+    removed JSON NOT NULL DEFAULT '[]',
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Создание индексов для улучшения производительности
 CREATE INDEX IF NOT EXISTS idx_room_type_images_room_type_id ON room_type_images(room_type_id);
 CREATE INDEX IF NOT EXISTS idx_amenities_room_type_id ON amenities(room_type_id);
@@ -92,6 +136,9 @@ CREATE INDEX IF NOT EXISTS idx_feedbacks_rate ON feedbacks(rate);
 CREATE INDEX IF NOT EXISTS idx_feedbacks_created_at ON feedbacks(created_at);
 CREATE INDEX IF NOT EXISTS idx_video_feedbacks_rate ON video_feedbacks(rate);
 CREATE INDEX IF NOT EXISTS idx_video_feedbacks_created_at ON video_feedbacks(created_at);
+CREATE INDEX IF NOT EXISTS idx_image_mirrors_content_hash ON image_mirrors(content_hash);
+CREATE INDEX IF NOT EXISTS idx_feedbacks_created_at_id ON feedbacks(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_video_feedbacks_created_at_uuid ON video_feedbacks(created_at, uuid);
 
 -- Создание триггера для автоматического обновления updated_at
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -1,44 +1,104 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import logging
 import asyncio
 
-from parser import fetch_and_save_room_types
 from router import router
-from scheduler import start_sync_task
 from database import engine
-from models import Base
-from telegram import start_bot_task
+from config import settings
+from sqlalchemy import text
+from models import Base, SCHEMA_UPGRADES
+from repository import ensure_rating_aggregates
+from metrics import render_metrics
+from workers import shutdown_process_pool
+from monitoring import loop_monitor
+from catalog import CatalogAgeMiddleware
+from upstream import close_http_client
+from ingest import close_feedback_buffer
+from service import start_feedback_cache_listener, stop_feedback_cache_listener
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
+async def start_primary():
     logger.info("App startup: creating database tables...")
-    try:
-        # Создаем таблицы в БД
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-        logger.info("Database tables created successfully")
-        
+    # Создаем таблицы в БД
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for statement in SCHEMA_UPGRADES:
+            await conn.execute(text(statement))
+    logger.info("Database tables created successfully")
+    await ensure_rating_aggregates()
+    # Отзывы пишет и процесс бота: его изменения сбрасывают кеш отзывов здесь
+    start_feedback_cache_listener()
+    
+    # Синхронизация и её зависимости импортируются, только если включены
+    if settings.SYNC_ENABLED:
+        from parser import fetch_and_save_room_types
+        from scheduler import start_sync_task
+
         logger.info("Fetching and saving room types from TravelLine API...")
-        await fetch_and_save_room_types()
-        logger.info("Room types successfully fetched and saved.")
+        try:
+            await fetch_and_save_room_types()
+            logger.info("Room types successfully fetched and saved.")
+        except Exception as e:
+            # TravelLine недоступен: отдаём последний удачный каталог из БД, синхронизация повторится в фоне
+            logger.error(f"Initial sync failed, serving last good catalog: {e}")
         
         # Запускаем задачу синхронизации в фоне
         start_sync_task()
         logger.info("Синхронизация запущена в фоне")
-        
-        # Запускаем Telegram бота
+    else:
+        # Каталог синхронизирует другой процесс; поиск, геоиндекс и доступность нужны и здесь
+        from scheduler import start_refresh_task
+
+        start_refresh_task()
+        logger.info("Обновление индексов запущено в фоне")
+    
+    # Telegram бот по умолчанию работает отдельным процессом (run_bot.py),
+    # чтобы его обработчики не делили event loop с HTTP API
+    if settings.TELEGRAM_BOT_EMBEDDED:
+        from telegram import start_bot_task
         start_bot_task()
         logger.info("Telegram bot запущен")
-        
-    except Exception as e:
-        logger.error(f"Error during startup: {e}")
+
+
+async def start_snapshot_replica():
+    """
+    Read-only реплика: каталог и отзывы из снимка в памяти, без БД, синхронизации и бота.
+    Снимок периодически перечитывается (CATALOG_SNAPSHOT_RELOAD_SECONDS). Доступность
+    в снимок не входит: /api/search/availability на реплике отвечает 503.
+    """
+    from repository import load_snapshot_repository
+    from scheduler import apply_snapshot, start_snapshot_reload_task
+
+    await load_snapshot_repository(settings.CATALOG_SNAPSHOT_SOURCE)
+    await apply_snapshot()
+    start_snapshot_reload_task()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    if settings.REPOSITORY_BACKEND == "snapshot":
+        # Без снимка реплике нечего отдавать: ошибка загрузки не даёт ей запуститься
+        await start_snapshot_replica()
+    else:
+        try:
+            await start_primary()
+        except Exception as e:
+            logger.error(f"Error during startup: {e}")
     yield
+    if settings.LOOP_MONITOR_ENABLED:
+        await loop_monitor.stop()
+    shutdown_process_pool()
+    await close_feedback_buffer()
+    await stop_feedback_cache_listener()
+    await close_http_client()
     logger.info("App shutdown.")
 
 app = FastAPI(lifespan=lifespan)
@@ -50,11 +110,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Catalog-Age", "X-Catalog-Stale"],
 )
+app.add_middleware(CatalogAgeMiddleware)
 
 # Подключаем роутер с префиксом api/
 app.include_router(router, prefix="/api")
 
 @app.get("/health/")
 async def root():
-    return {"message": "TravelLine Integration API is running"}
\ No newline at end of file
+    return {"message": "TravelLine Integration API is running"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return render_metrics()
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+from typing import Optional
+
+from config import settings
+from service import set_video_feedback_metadata
+from storage import object_storage
+from workers import run_in_process
+
+logger = logging.getLogger(__name__)
+
+# Фоновые задачи обработки (храним ссылки, чтобы их не собрал GC)
+_background_tasks: set = set()
+
+
+# --- Разбор MP4 (выполняется в пуле процессов) ---
+
+def _iter_boxes(data: bytes, offset: int = 0, end: Optional[int] = None):
+    """Итерирует боксы ISO BMFF внутри data[offset:end]: (type, payload_start, box_end)"""
+    end = len(data) if end is None else end
+    while offset + 8 <= end:
+        size, box_type = struct.unpack(">I4s", data[offset:offset + 8])
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", data[offset + 8:offset + 16])[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            break
+        yield box_type, offset + header, min(offset + size, end)
+        offset += size
+
+
+def _find_box(data: bytes, box_type: bytes, start: int, end: int):
+    for t, payload, box_end in _iter_boxes(data, start, end):
+        if t == box_type:
+            return payload, box_end
+    return None
+
+
+def _read_moov(path: str) -> Optional[bytes]:
+    """Читает только бокс moov (метаданные), не загружая медиаданные в память"""
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        offset = 0
+        while offset + 8 <= file_size:
+            f.seek(offset)
+            header = f.read(16)
+            size, box_type = struct.unpack(">I4s", header[:8])
+            header_size = 8
+            if size == 1:
+                size = struct.unpack(">Q", header[8:16])[0]
+                header_size = 16
+            elif size == 0:
+                size = file_size - offset
+            if size < header_size:
+                return None
+            if box_type == b"moov":
+                f.seek(offset)
+                return f.read(size)
+            offset += size
+    return None
+
+
+def parse_mp4_metadata(path: str) -> dict:
+    """
+    Извлекает из MP4 длительность (сек), размеры видео-дорожки и средний битрейт (бит/с).
+    Поля, которые не удалось определить, равны None.
+    """
+    metadata = {"duration": None, "width": None, "height": None, "bitrate": None}
+    moov = _read_moov(path)
+    if moov is None:
+        return metadata
+
+    moov_payload = 8 if struct.unpack(">I", moov[:4])[0] != 1 else 16
+    mvhd = _find_box(moov, b"mvhd", moov_payload, len(moov))
+    if mvhd:
+        pos = mvhd[0]
+        version = moov[pos]
+        if version == 1:
+            timescale, duration = struct.unpack(">IQ", moov[pos + 20:pos + 32])
+        else:
+            timescale, duration = struct.unpack(">II", moov[pos + 12:pos + 20])
+        if timescale:
+            metadata["duration"] = round(duration / timescale, 3)
+
+    for box_type, start, end in _iter_boxes(moov, moov_payload, len(moov)):
+        if box_type != b"trak":
+            continue
+        mdia = _find_box(moov, b"mdia", start, end)
+        hdlr = _find_box(moov, b"hdlr", *mdia) if mdia else None
+        if not hdlr or moov[hdlr[0] + 8:hdlr[0] + 12] != b"vide":
+            continue
+        tkhd = _find_box(moov, b"tkhd", start, end)
+        if tkhd:
+            # Ширина/высота — последние 8 байт tkhd в формате 16.16
+            width, height = struct.unpack(">II", moov[tkhd[1] - 8:tkhd[1]])
+            metadata["width"] = width >> 16
+            metadata["height"] = height >> 16
+        break
+
+    if metadata["duration"]:
+        metadata["bitrate"] = int(os.path.getsize(path) * 8 / metadata["duration"])
+    return metadata
+
+
+def extract_poster(video_path: str, poster_path: str, at_second: float = 1.0) -> bool:
+    """Сохраняет кадр видео в JPEG с помощью ffmpeg (если он установлен)"""
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        return False
+    cmd = [
+        ffmpeg, "-v", "error", "-y",
+        "-ss", str(at_second), "-i", video_path,
+        "-frames:v", "1", "-vf", f"scale='min({settings.MEDIA_POSTER_WIDTH},iw)':-2",
+        poster_path,
+    ]
+    try:
+        subprocess.run(cmd, check=True, timeout=60, capture_output=True)
+    except (subprocess.SubprocessError, OSError):
+        return False
+    return os.path.exists(poster_path) and os.path.getsize(poster_path) > 0
+
+
+def analyze_video(video_path: str, poster_path: str) -> dict:
+    """Задача для пула процессов: метаданные + постер"""
+    metadata = parse_mp4_metadata(video_path)
+    at_second = 1.0 if (metadata["duration"] or 0) > 1 else 0.0
+    metadata["has_poster"] = extract_poster(video_path, poster_path, at_second)
+    return metadata
+
+
+# --- Оркестрация (event loop) ---
+
+async def extract_video_metadata(feedback_uuid: str, object_name: str):
+    """
+    Скачивает загруженное видео во временный файл, разбирает его в пуле процессов,
+    кладёт постер в MinIO и сохраняет метаданные в БД.
+    """
+    with tempfile.TemporaryDirectory(prefix="video-") as tmp:
+        video_path = os.path.join(tmp, "video.mp4")
+        poster_path = os.path.join(tmp, "poster.jpg")
+        await object_storage.download_file(object_name, video_path)
+        metadata = await run_in_process(analyze_video, video_path, poster_path)
+
+        poster_object = None
+        if metadata.pop("has_poster"):
+            poster_object = f"posters/{feedback_uuid}.jpg"
+            await object_storage.upload_file(poster_object, poster_path, content_type="image/jpeg")
+
+    await set_video_feedback_metadata(feedback_uuid, poster=poster_object, **metadata)
+    logger.info("Метаданные видео %s сохранены: %s", feedback_uuid, metadata)
+
+
+def schedule_video_metadata_extraction(feedback_uuid: str, object_name: str):
+    """Запускает извлечение метаданных в фоне (ошибки только логируются)"""
+    async def run():
+        try:
+            await extract_video_metadata(feedback_uuid, object_name)
+        except Exception as e:
+            logger.exception("Ошибка извлечения метаданных видео %s: %s", feedback_uuid, e)
+
+    task = asyncio.create_task(run())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
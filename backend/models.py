@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, Boolean, Index, JSON
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -18,6 +18,8 @@ class RoomType(Base):
     category_code = Column(String(100))
     category_name = Column(String(255))
     position = Column(Integer)
+    amenity_mask = Column(String(256))  # битовая маска удобств (hex), биты — в amenity_bits
+    content_hash = Column(String(64))  # sha256 данных из API, для поиска изменений между синхронизациями
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
@@ -52,6 +54,14 @@ class Amenity(Base):
     room_type = relationship("RoomType", back_populates="amenities")
 
 
+class AmenityBit(Base):
+    """Соответствие кода удобства номеру бита в RoomType.amenity_mask"""
+    __tablename__ = "amenity_bits"
+    
+    code = Column(String(100), primary_key=True)
+    bit = Column(Integer, nullable=False, unique=True)
+
+
 class Address(Base):
     __tablename__ = "addresses"
     
@@ -101,6 +111,9 @@ class Placement(Base):
 
 class Feedback(Base):
     __tablename__ = "feedbacks"
+    __table_args__ = (
+        Index("idx_feedbacks_created_at_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     text = Column(Text, nullable=False)
@@ -111,9 +124,67 @@ class Feedback(Base):
 
 class VideoFeedback(Base):
     __tablename__ = "video_feedbacks"
+    __table_args__ = (
+        Index("idx_video_feedbacks_created_at_uuid", "created_at", "uuid"),
+    )
     
     uuid = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     file = Column(String(1024), nullable=False)  # путь к файлу в MinIO
     rate = Column(Integer, nullable=False)  # от 0 до 5
+    telegram_file_id = Column(String(255))  # file_id после первой отправки в Telegram
+    duration = Column(Float)  # секунды
+    width = Column(Integer)
+    height = Column(Integer)
+    bitrate = Column(Integer)  # бит/с
+    poster = Column(String(1024))  # путь к постеру в MinIO
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class RatingAggregate(Base):
+    """Агрегаты рейтинга, обновляются инкрементально при создании/удалении отзывов"""
+    __tablename__ = "rating_aggregates"
+    
+    kind = Column(String(10), primary_key=True)  # "text" | "video"
+    count = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=False, default=0)  # сумма оценок
+    rate_0 = Column(Integer, nullable=False, default=0)
+    rate_1 = Column(Integer, nullable=False, default=0)
+    rate_2 = Column(Integer, nullable=False, default=0)
+    rate_3 = Column(Integer, nullable=False, default=0)
+    rate_4 = Column(Integer, nullable=False, default=0)
+    rate_5 = Column(Integer, nullable=False, default=0)
+
+
+class ImageMirror(Base):
+    """Локальная копия изображения TravelLine с уменьшенными вариантами в MinIO"""
+    __tablename__ = "image_mirrors"
+    
+    source_url = Column(String(1024), primary_key=True)
+    content_hash = Column(String(64), nullable=False, index=True)  # sha256 содержимого
+    widths = Column(String(255), nullable=False)  # ширины вариантов через запятую
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class CatalogVersion(Base):
+    """Версия каталога: что изменилось в результате синхронизации"""
+    __tablename__ = "catalog_versions"
+    
+    version = Column(Integer, primary_key=True, autoincrement=True)
+    added = Column(JSON, nullable=False, default=list)  # id добавленных типов номеров
+    changed = Column(JSON, nullable=False, default=list)
+    removed = Column(JSON, nullable=False, default=list)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# Изменения схемы для уже существующих таблиц (create_all не добавляет новые колонки)
+SCHEMA_UPGRADES = [
+    "ALTER TABLE room_types ADD COLUMN IF NOT EXISTS amenity_mask VARCHAR(256)",
+    "ALTER TABLE room_types ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+    "ALTER TABLE video_feedbacks ADD COLUMN IF NOT EXISTS telegram_file_id VARCHAR(255)",
+    "ALTER TABLE video_feedbacks ADD COLUMN IF NOT EXISTS duration FLOAT",
+    "ALTER TABLE video_feedbacks ADD COLUMN IF NOT EXISTS width INTEGER",
+    "ALTER TABLE video_feedbacks ADD COLUMN IF NOT EXISTS height INTEGER",
+    "ALTER TABLE video_feedbacks ADD COLUMN IF NOT EXISTS bitrate INTEGER",
+    "ALTER TABLE video_feedbacks ADD COLUMN IF NOT EXISTS poster VARCHAR(1024)",
+]
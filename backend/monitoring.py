@@ -0,0 +1,167 @@
+import asyncio
+import functools
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from config import settings
+from metrics import Counter, Gauge, Summary
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG = Gauge("event_loop_lag_seconds", "Последняя измеренная задержка event loop")
+LOOP_LAG_OBSERVED = Summary("event_loop_lag_observed_seconds", "Задержки event loop")
+LOOP_BLOCKED = Counter("event_loop_blocked_total", "Блокировки event loop дольше порога")
+BLOCKING_CALLS = Counter("event_loop_blocking_calls_total", "Синхронный ввод-вывод внутри event loop (debug)")
+
+
+class LoopMonitor:
+    """
+    Следит за задержкой event loop:
+    - корутина-проба раз в interval засыпает и измеряет, насколько позже она проснулась;
+    - поток-сторож проверяет «пульс» пробы и, если loop не отвечает дольше block_threshold,
+      логирует стек кода, который его заблокировал;
+    - в debug режиме включает asyncio debug и отслеживает синхронный ввод-вывод в потоке loop
+      (подключения сокетов, открытие файлов, запросы urllib3 — в т.ч. MinIO).
+    """
+
+    def __init__(self, interval: float, block_threshold: float, debug: bool = False):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.debug = debug
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = time.monotonic()
+        self._probe_task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._probe_task = asyncio.create_task(self._probe())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        if self.debug:
+            self._loop.set_debug(True)
+            self._loop.slow_callback_duration = self.block_threshold
+            _install_blocking_io_detector(self._loop_thread_id)
+        logger.info(
+            "Мониторинг event loop запущен (interval=%.3fs, threshold=%.3fs, debug=%s)",
+            self.interval, self.block_threshold, self.debug,
+        )
+
+    async def stop(self):
+        self._stopped.set()
+        _blocking_detector["thread_id"] = None
+        if self._probe_task:
+            self._probe_task.cancel()
+            await asyncio.gather(self._probe_task, return_exceptions=True)
+
+    async def _probe(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - started - self.interval, 0.0)
+            self._heartbeat = time.monotonic()
+            LOOP_LAG.set(lag)
+            LOOP_LAG_OBSERVED.observe(lag)
+            if lag > self.block_threshold:
+                logger.warning("Event loop задержан на %.3f с", lag)
+
+    def _watch(self):
+        reported_at = None
+        while not self._stopped.wait(self.block_threshold / 2):
+            stalled = time.monotonic() - self._heartbeat - self.interval
+            if stalled <= self.block_threshold:
+                reported_at = None
+                continue
+            # Одна блокировка — одно сообщение
+            if reported_at == self._heartbeat:
+                continue
+            reported_at = self._heartbeat
+            LOOP_BLOCKED.inc()
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else "<стек недоступен>"
+            logger.warning("Event loop заблокирован дольше %.3f с, текущий стек:\n%s", stalled, stack)
+
+
+# --- Детектор синхронного ввода-вывода (debug) ---
+
+_blocking_detector = {"thread_id": None, "installed": False}
+_reentry = threading.local()
+
+
+def _report_blocking_call(event: str):
+    if getattr(_reentry, "active", False):
+        return
+    _reentry.active = True
+    try:
+        BLOCKING_CALLS.inc(event=event)
+        stack = "".join(traceback.format_stack()[:-2])
+        logger.warning("Синхронный вызов %s в потоке event loop:\n%s", event, stack)
+    finally:
+        _reentry.active = False
+
+
+def _audit_hook(event: str, args):
+    thread_id = _blocking_detector["thread_id"]
+    if thread_id is None or threading.get_ident() != thread_id:
+        return
+    if event == "socket.connect":
+        sock = args[0]
+        # Неблокирующие сокеты (asyncio, asyncpg) имеют timeout 0.0
+        if sock.gettimeout() == 0.0:
+            return
+    elif event == "open":
+        # Ленивые импорты модулей тоже открывают файлы — это не то, что мы ищем
+        if isinstance(args[0], str) and args[0].endswith((".py", ".pyc", ".so")):
+            return
+    elif event != "socket.getaddrinfo":
+        return
+    _report_blocking_call(event)
+
+
+def _wrap_blocking(owner, name: str, event: str):
+    """
+    Оборачивает известную блокирующую точку входа: запросы по уже открытым
+    keep-alive соединениям (MinIO через urllib3) не вызывают socket.connect
+    и аудит-хуком не видны.
+    """
+    original = getattr(owner, name)
+
+    @functools.wraps(original)
+    def wrapper(*args, **kwargs):
+        thread_id = _blocking_detector["thread_id"]
+        if thread_id is not None and threading.get_ident() == thread_id:
+            _report_blocking_call(event)
+        return original(*args, **kwargs)
+
+    setattr(owner, name, wrapper)
+
+
+def _install_blocking_io_detector(loop_thread_id: int):
+    _blocking_detector["thread_id"] = loop_thread_id
+    # Аудит-хук нельзя удалить, поэтому устанавливаем его один раз и выключаем через thread_id
+    if not _blocking_detector["installed"]:
+        sys.addaudithook(_audit_hook)
+        try:
+            from urllib3.connectionpool import HTTPConnectionPool
+        except ImportError:
+            pass
+        else:
+            _wrap_blocking(HTTPConnectionPool, "urlopen", "urllib3.urlopen")
+        _blocking_detector["installed"] = True
+
+
+loop_monitor = LoopMonitor(
+    interval=settings.LOOP_MONITOR_INTERVAL,
+    block_threshold=settings.LOOP_MONITOR_BLOCK_THRESHOLD,
+    debug=settings.LOOP_MONITOR_DEBUG,
+)
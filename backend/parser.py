@@ -1,14 +1,23 @@
-import httpx
 import asyncio
+import collections
+import time
+from typing import Any, Dict, Optional
 import redis.asyncio as redis
-from config import Settings
+from config import settings
 from database import async_session
-from models import RoomType, RoomTypeImage, Amenity, Address, Occupancy, Placement
+from models import RoomType, RoomTypeImage, Amenity, AmenityBit, Address, Occupancy, Placement
+from images import mirror_images
+from archive import archive_payload
+from upstream import traveline_request, auth_breaker, content_breaker
+from amenities import AmenityIndex, assign_amenity_bits, build_mask, encode_mask, set_amenity_index
+from service import catalog_calls
+from catalog import (
+    room_fingerprint, diff_catalog, load_fingerprints, record_catalog_version, publish_catalog_version,
+)
 from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
-settings = Settings()
 logger = logging.getLogger(__name__)
 
 async def get_redis_client():
@@ -17,52 +26,86 @@ async def get_redis_client():
 
 async def fetch_jwt():
     cache_key = "traveline_access_token"
+    redis_client = await get_redis_client()
     try:
-        redis_client = await get_redis_client()
         token = await redis_client.get(cache_key)
         if token:
             logger.info("fetch_jwt: token получен из кеша")
-            await redis_client.close()
             return token
 
-        async with httpx.AsyncClient() as client:
-            data = {
-                "grant_type": "client_credentials",
-                "client_id": settings.TRAVELINE_CLIENT_ID,
-                "client_secret": settings.TRAVELINE_CLIENT_SECRET,
-            }
-            resp = await client.post(settings.TRAVELINE_AUTH_URL, data=data)
-            resp.raise_for_status()
-            token = resp.json()["access_token"]
-            await redis_client.set(cache_key, token, ex=14 * 60)
-            await redis_client.close()
-            logger.info("fetch_jwt: token успешно получен через API и сохранён в кеш")
-            return token
+        data = {
+            "grant_type": "client_credentials",
+            "client_id": settings.TRAVELINE_CLIENT_ID,
+            "client_secret": settings.TRAVELINE_CLIENT_SECRET,
+        }
+        resp = await traveline_request(auth_breaker, "POST", settings.TRAVELINE_AUTH_URL, data=data)
+        token = resp.json()["access_token"]
+        await redis_client.set(cache_key, token, ex=14 * 60)
+        logger.info("fetch_jwt: token успешно получен через API и сохранён в кеш")
+        return token
     except Exception as e:
         logger.error(f"fetch_jwt: ошибка получения токена: {e}")
         raise
+    finally:
+        await redis_client.close()
 
 async def fetch_property_data(jwt: str):
     url = f"{settings.TRAVELINE_API_BASE_URL}/v1/properties/{settings.PROPERTY_ID}"
     headers = {"Authorization": f"Bearer {jwt}"}
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, headers=headers)
-            resp.raise_for_status()
-            logger.info("fetch_property_data: данные успешно получены из TravelLine API")
-            return resp.json()
+        resp = await traveline_request(content_breaker, "GET", url, headers=headers)
+        logger.info("fetch_property_data: данные успешно получены из TravelLine API")
+        return resp.json()
     except Exception as e:
         logger.error(f"fetch_property_data: ошибка получения данных: {e}")
         raise
 
-async def save_room_types_to_db(data: dict):
+async def save_room_types_to_db(
+    data: dict,
+    stats: Optional[Dict[str, Any]] = None,
+    mirror: bool = True,
+    publish: bool = True,
+):
+    """
+    Заменяет каталог в БД данными TravelLine.
+    stats (если передан) заполняется длительностью этапов и количеством строк по таблицам —
+    используется replay_sync.py; mirror/publish выключают зеркалирование изображений
+    и публикацию версии каталога (для офлайн-прогонов).
+    """
+    version = None
+    timings = stats.setdefault("timings", {}) if stats is not None else {}
+    started = time.perf_counter()
+
+    def mark(stage: str):
+        nonlocal started
+        now = time.perf_counter()
+        timings[stage] = now - started
+        started = now
+
     try:
         async with async_session() as session:
-            # Очищаем старые данные (если нужно)
+            # Отпечатки до синхронизации — чтобы записать, что изменилось
+            previous = await load_fingerprints(session)
+            mark("load_previous")
+            room_types = data.get("roomTypes", [])
+            # Пустой ответ при непустом каталоге — скорее сбой upstream: оставляем последний удачный каталог
+            if not room_types and previous:
+                raise ValueError("TravelLine вернул пустой список roomTypes")
+
+            # Старые данные заменяются в той же транзакции: при ошибке остаётся прежний каталог
             await session.execute(delete(RoomType))
-            await session.commit()
+            await session.execute(delete(AmenityBit))
+            mark("delete")
+
+            # Биты удобств назначаются по всем кодам каталога
+            amenity_bits = assign_amenity_bits(
+                amenity.get("code") for rt in room_types for amenity in rt.get("amenities", [])
+            )
+            for code, bit in amenity_bits.items():
+                session.add(AmenityBit(code=code, bit=bit))
+            amenity_masks = {}
+            fingerprints = {}
 
-            room_types = data.get("roomTypes", [])
             for rt in room_types:
                 # Используем ID из API
                 room_type_id = rt.get("id")
@@ -70,6 +113,9 @@ async def save_room_types_to_db(data: dict):
                     logger.warning(f"RoomType без ID пропущен: {rt.get('name', 'Unknown')}")
                     continue
                 
+                amenity_mask = build_mask(amenity_bits, (a.get("code") for a in rt.get("amenities", [])))
+                amenity_masks[room_type_id] = amenity_mask
+                fingerprints[room_type_id] = room_fingerprint(rt)
                 room_type = RoomType(
                     id=room_type_id,  # Используем ID из API
                     name=rt.get("name"),
@@ -78,6 +124,8 @@ async def save_room_types_to_db(data: dict):
                     category_code=rt.get("categoryCode"),
                     category_name=rt.get("categoryName"),
                     position=rt.get("position"),
+                    amenity_mask=encode_mask(amenity_mask),
+                    content_hash=fingerprints[room_type_id],
                 )
                 session.add(room_type)
 
@@ -133,13 +181,51 @@ async def save_room_types_to_db(data: dict):
                         max_age=placement.get("maxAge"),
                     ))
 
+            if stats is not None:
+                stats["rows"] = dict(collections.Counter(obj.__tablename__ for obj in session.new))
+            mark("build")
+            await session.flush()
+            mark("insert")
+            version = await record_catalog_version(session, *diff_catalog(previous, fingerprints))
             await session.commit()
+            mark("commit")
+            set_amenity_index(AmenityIndex(amenity_bits, amenity_masks))
+            catalog_calls.clear()
             logger.info(f"save_room_types_to_db: успешно сохранено {len(room_types)} RoomType в БД")
     except Exception as e:
         logger.error(f"save_room_types_to_db: ошибка сохранения данных: {e}")
         raise
 
+    if version is not None:
+        logger.info(
+            f"save_room_types_to_db: версия каталога {version.version} "
+            f"(+{len(version.added)} ~{len(version.changed)} -{len(version.removed)})"
+        )
+        if publish:
+            await publish_catalog_version(version)
+            mark("publish")
+
+    if not mirror:
+        return
+    # Зеркалируем новые изображения (ошибки не должны ломать синхронизацию)
+    try:
+        await mirror_images(
+            img.get("url") for rt in data.get("roomTypes", []) for img in rt.get("images", [])
+        )
+    except Exception as e:
+        logger.error(f"save_room_types_to_db: ошибка зеркалирования изображений: {e}")
+    mark("mirror_images")
+    # Варианты изображений входят в ответы каталога
+    catalog_calls.clear()
+
 async def fetch_and_save_room_types():
     jwt = await fetch_jwt()
     data = await fetch_property_data(jwt)
-    await save_room_types_to_db(data) 
+    # Сохраняем исходный ответ для офлайн-воспроизведения (replay_sync.py); ошибки не ломают синхронизацию
+    if settings.PAYLOAD_ARCHIVE_ENABLED:
+        try:
+            await archive_payload(data)
+        except Exception as e:
+            logger.error(f"fetch_and_save_room_types: ошибка архивирования payload: {e}")
+    await save_room_types_to_db(data)
+
@@ -0,0 +1,106 @@
+"""
+Офлайн-воспроизведение синхронизации на архивированных ответах TravelLine.
+
+    python replay_sync.py --list
+    python replay_sync.py <sha256 | имя объекта | файл.json[.gz]> --database-url postgresql+asyncpg://... [--repeat 3]
+
+Payload берётся из архива в MinIO (см. archive.py) или из локального файла и
+прогоняется через parser.save_room_types_to_db против указанной БД (схема создаётся
+при необходимости) без зеркалирования изображений и публикации версий каталога.
+Для каждого прогона выводится длительность этапов и количество записанных строк.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("payload", nargs="?", help="sha256 из архива, имя объекта в MinIO или путь к файлу")
+    parser.add_argument("--list", action="store_true", help="показать архивированные payload")
+    parser.add_argument("--database-url", help="БД для прогона (обязательна, чтобы случайно не писать в рабочую)")
+    parser.add_argument("--repeat", type=int, default=1, help="количество прогонов")
+    args = parser.parse_args()
+    if not args.list and not (args.payload and args.database_url):
+        parser.error("нужны payload и --database-url (или --list)")
+    return args
+
+
+async def load_payload(source: str) -> tuple:
+    """(payload, тайминги загрузки)"""
+    from archive import ARCHIVE_PREFIX, decode_payload, payload_object_name
+    from storage import object_storage
+
+    timings = {}
+    started = time.perf_counter()
+    if os.path.exists(source):
+        with open(source, "rb") as f:
+            blob = f.read()
+    else:
+        object_name = source if source.startswith(ARCHIVE_PREFIX) else payload_object_name(source)
+        blob = await object_storage.get_bytes(object_name)
+    timings["download"] = time.perf_counter() - started
+    started = time.perf_counter()
+    data = decode_payload(blob)
+    timings["decode"] = time.perf_counter() - started
+    return data, timings
+
+
+async def list_payloads():
+    from archive import list_archived_payloads
+
+    for obj in await list_archived_payloads():
+        digest = obj.object_name.rsplit("/", 1)[-1].split(".", 1)[0]
+        print(f"{obj.last_modified:%Y-%m-%d %H:%M:%S}  {obj.size:>10}  {digest}")
+
+
+async def replay(args):
+    from sqlalchemy import text
+
+    from database import engine
+    from models import Base, SCHEMA_UPGRADES
+    from parser import save_room_types_to_db
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for statement in SCHEMA_UPGRADES:
+            await conn.execute(text(statement))
+
+    data, load_timings = await load_payload(args.payload)
+    print(f"payload: {len(data.get('roomTypes', []))} roomTypes")
+    for stage, seconds in load_timings.items():
+        print(f"  {stage:<15}{seconds * 1000:>10.1f} мс")
+
+    runs = []
+    for i in range(args.repeat):
+        stats = {}
+        started = time.perf_counter()
+        await save_room_types_to_db(data, stats=stats, mirror=False, publish=False)
+        stats["timings"]["total"] = time.perf_counter() - started
+        runs.append(stats)
+        print(f"\nпрогон {i + 1}:")
+        for stage, seconds in stats["timings"].items():
+            print(f"  {stage:<15}{seconds * 1000:>10.1f} мс")
+        print("  строки: " + ", ".join(f"{table}={count}" for table, count in sorted(stats["rows"].items())))
+
+    if args.repeat > 1:
+        print("\nмедиана по прогонам:")
+        for stage in runs[0]["timings"]:
+            median = statistics.median(run["timings"][stage] for run in runs)
+            print(f"  {stage:<15}{median * 1000:>10.1f} мс")
+    await engine.dispose()
+
+
+def main():
+    args = parse_args()
+    if args.database_url:
+        # Настройки читаются при импорте config, поэтому адрес БД подменяется до импорта модулей приложения
+        os.environ["DATABASE_URL"] = args.database_url
+    sys.exit(asyncio.run(list_payloads() if args.list else replay(args)))
+
+
+if __name__ == "__main__":
+    main()
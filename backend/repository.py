@@ -0,0 +1,638 @@
+import gzip
+import logging
+import os
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, insert, delete, update, func, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from database import async_session
+from images import get_image_variants
+from models import (
+    RoomType, Occupancy, Address, RoomTypeImage, Amenity, AmenityBit, CatalogVersion,
+    Feedback as FeedbackModel, VideoFeedback as VideoFeedbackModel, RatingAggregate,
+)
+from schemas import (
+    RoomTypeRecord, CatalogSnapshot, Feedback, FeedbackCreate, VideoFeedback, VideoFeedbackCreate, RatingSummary,
+)
+
+logger = logging.getLogger(__name__)
+
+FEEDBACK_KIND = "text"
+VIDEO_FEEDBACK_KIND = "video"
+
+SNAPSHOT_OBJECT = "catalog-snapshots/latest.json.gz"
+
+
+class ReadOnlyRepositoryError(Exception):
+    """Запись в репозиторий, открытый только для чтения (снимок на read-only реплике)"""
+
+
+class Repository(ABC):
+    """
+    Доступ к типам номеров и отзывам для service.py.
+    PostgresRepository — основная БД; SnapshotRepository — снимок каталога в памяти
+    (read-only реплики без БД, тесты и бенчмарки без Postgres).
+    """
+
+    # Данные общие для всех процессов: об изменениях отзывов оповещаем через Redis
+    shared: bool = False
+
+    @abstractmethod
+    async def list_room_types(self, ids: Optional[Iterable[str]] = None) -> List[RoomTypeRecord]:
+        """Типы номеров в порядке position; при ids — только найденные из них"""
+
+    @abstractmethod
+    def iter_room_types(self, batch_size: int) -> AsyncIterator[List[RoomTypeRecord]]:
+        """Все типы номеров в порядке position порциями до batch_size (для выгрузки без загрузки всего каталога)"""
+
+    @abstractmethod
+    async def get_image_variants(self, urls: Iterable[str]) -> Dict[str, Dict[str, str]]:
+        """{исходный URL: {ширина: URL варианта}} для зеркалированных изображений"""
+
+    @abstractmethod
+    async def get_amenity_bits(self) -> Dict[str, int]:
+        """{код удобства: номер бита в amenity_mask}"""
+
+    @abstractmethod
+    async def get_catalog_synced_at(self) -> Optional[datetime]:
+        """Время последней синхронизации каталога"""
+
+    @abstractmethod
+    async def get_catalog_version_range(self) -> Tuple[Optional[int], int]:
+        """(самая старая хранимая версия или None, если истории нет; текущая версия)"""
+
+    @abstractmethod
+    async def list_feedbacks(self, kind: str) -> list:
+        """Все отзывы kind от новых к старым"""
+
+    @abstractmethod
+    async def get_feedback_page(
+        self, kind: str, limit: int, cursor: Optional[str], reverse: bool
+    ) -> Tuple[list, Optional[str], Optional[str]]:
+        """Страница отзывов kind от новых к старым: (items, next_cursor, prev_cursor)"""
+
+    @abstractmethod
+    async def get_feedback(self, feedback_id: int) -> Optional[Feedback]:
+        """Текстовый отзыв по id"""
+
+    @abstractmethod
+    async def get_video_feedback(self, feedback_uuid: str) -> Optional[VideoFeedback]:
+        """Видео отзыв по UUID"""
+
+    @abstractmethod
+    async def get_rating(self, kind: str) -> RatingSummary:
+        """Агрегаты рейтинга отзывов kind"""
+
+    @abstractmethod
+    async def create_feedbacks(self, items: List[FeedbackCreate]) -> List[Feedback]:
+        """Создать текстовые отзывы (результат в порядке items)"""
+
+    @abstractmethod
+    async def delete_feedback(self, feedback_id: int) -> bool:
+        """Удалить текстовый отзыв; False, если его нет"""
+
+    @abstractmethod
+    async def create_video_feedback(self, data: VideoFeedbackCreate) -> VideoFeedback:
+        """Создать видео отзыв"""
+
+    @abstractmethod
+    async def delete_video_feedback(self, feedback_uuid: str) -> bool:
+        """Удалить видео отзыв; False, если его нет"""
+
+    @abstractmethod
+    async def update_video_feedback(self, feedback_uuid: str, values: Dict[str, object]):
+        """Обновить поля видео отзыва (telegram_file_id, метаданные, постер)"""
+
+
+# --- Курсоры постраничной выборки (keyset по created_at/id) ---
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def encode_cursor(created_at: datetime, key) -> str:
+    """Курсор вида "<микросекунды с эпохи>_<id>" (компактный, влезает в callback_data)"""
+    micros = (created_at - _EPOCH) // timedelta(microseconds=1)
+    return f"{micros}_{key}"
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Разбирает курсор, при некорректном формате выбрасывает ValueError"""
+    micros, sep, key = cursor.partition("_")
+    if not sep or not key:
+        raise ValueError(f"Некорректный курсор: {cursor}")
+    try:
+        return _EPOCH + timedelta(microseconds=int(micros)), key
+    except OverflowError:
+        raise ValueError(f"Некорректный курсор: {cursor}")
+
+
+def _page(rows: list, key: str, limit: int, cursor: Optional[str], reverse: bool):
+    """
+    rows — до limit + 1 строк в порядке выборки (для reverse — от старых к новым).
+    Возвращает (items, next_cursor, prev_cursor) страницы в порядке от новых к старым.
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not rows:
+        return [], None, None
+    if reverse:
+        rows.reverse()
+        next_row, prev_row = (rows[-1] if cursor else None), (rows[0] if has_more else None)
+    else:
+        next_row, prev_row = (rows[-1] if has_more else None), (rows[0] if cursor else None)
+    return (
+        rows,
+        encode_cursor(next_row.created_at, getattr(next_row, key)) if next_row else None,
+        encode_cursor(prev_row.created_at, getattr(prev_row, key)) if prev_row else None,
+    )
+
+
+def _rating_summary(count: int, total: int, histogram: List[int]) -> RatingSummary:
+    return RatingSummary(
+        count=count,
+        average=round(total / count, 2) if count else None,
+        histogram=histogram,
+    )
+
+
+# --- Postgres ---
+
+async def apply_rating(session: AsyncSession, kind: str, rate: int, delta: int):
+    """Инкрементально обновляет агрегаты рейтинга в рамках текущей транзакции"""
+    await apply_ratings(session, kind, {rate: delta})
+
+
+async def apply_ratings(session: AsyncSession, kind: str, rates: Dict[int, int]):
+    """То же, что apply_rating, для нескольких оценок сразу: {оценка: изменение количества}"""
+    values = {
+        RatingAggregate.count: RatingAggregate.count + sum(rates.values()),
+        RatingAggregate.total: RatingAggregate.total + sum(rate * n for rate, n in rates.items()),
+    }
+    for rate, n in rates.items():
+        bucket = getattr(RatingAggregate, f"rate_{rate}")
+        values[bucket] = bucket + n
+    await session.execute(update(RatingAggregate).where(RatingAggregate.kind == kind).values(values))
+
+
+async def ensure_rating_aggregates():
+    """
+    Создаёт строки агрегатов, если их ещё нет (однократный пересчёт по таблицам отзывов).
+    Вызывается при старте приложения.
+    """
+    async with async_session() as session:
+        existing = set((await session.execute(select(RatingAggregate.kind))).scalars().all())
+        for kind, model in ((FEEDBACK_KIND, FeedbackModel), (VIDEO_FEEDBACK_KIND, VideoFeedbackModel)):
+            if kind in existing:
+                continue
+            result = await session.execute(select(model.rate, func.count()).group_by(model.rate))
+            values = {"kind": kind, "count": 0, "total": 0, **{f"rate_{i}": 0 for i in range(6)}}
+            for rate, count in result.all():
+                values["count"] += count
+                values["total"] += rate * count
+                values[f"rate_{rate}"] = count
+            await session.execute(pg_insert(RatingAggregate).values(**values).on_conflict_do_nothing())
+        await session.commit()
+
+
+class PostgresRepository(Repository):
+    shared = True
+
+    _FEEDBACK_MODELS = {
+        FEEDBACK_KIND: (FeedbackModel, FeedbackModel.id, "id", int, Feedback),
+        VIDEO_FEEDBACK_KIND: (VideoFeedbackModel, VideoFeedbackModel.uuid, "uuid", str, VideoFeedback),
+    }
+
+    _ROOM_COLUMNS = (
+        RoomType.id, RoomType.name, RoomType.description, RoomType.size_value, RoomType.category_name,
+        RoomType.position, RoomType.amenity_mask, Occupancy.adult_bed, Occupancy.extra_bed,
+        Address.latitude, Address.longitude, Address.country_code, Address.region, Address.city_name,
+        Address.address_line, Address.postal_code,
+    )
+
+    def _room_types_query(self):
+        return (
+            select(*self._ROOM_COLUMNS)
+            .outerjoin(Occupancy, RoomType.id == Occupancy.room_type_id)
+            .outerjoin(Address, RoomType.id == Address.room_type_id)
+            .order_by(RoomType.position, RoomType.id)
+        )
+
+    async def _records(self, session: AsyncSession, rows, ids: Optional[List[str]]) -> List[RoomTypeRecord]:
+        """Дополняет строки номеров изображениями и удобствами (по одному запросу на список)"""
+        images_query = select(RoomTypeImage.room_type_id, RoomTypeImage.url).order_by(
+            RoomTypeImage.room_type_id, RoomTypeImage.position
+        )
+        amenities_query = select(Amenity.room_type_id, Amenity.code).order_by(Amenity.room_type_id, Amenity.id)
+        if ids is not None:
+            images_query = images_query.where(RoomTypeImage.room_type_id.in_(ids))
+            amenities_query = amenities_query.where(Amenity.room_type_id.in_(ids))
+        images: Dict[str, List[str]] = {}
+        for room_id, url in (await session.execute(images_query)).all():
+            images.setdefault(room_id, []).append(url)
+        amenities: Dict[str, List[str]] = {}
+        for room_id, code in (await session.execute(amenities_query)).all():
+            amenities.setdefault(room_id, []).append(code)
+
+        return [
+            RoomTypeRecord(
+                id=row.id,
+                name=row.name,
+                description=row.description,
+                size=row.size_value,
+                category=row.category_name,
+                position=row.position,
+                adult_bed=row.adult_bed,
+                extra_bed=row.extra_bed,
+                images=images.get(row.id, []),
+                amenities=amenities.get(row.id, []),
+                amenity_mask=row.amenity_mask,
+                latitude=row.latitude,
+                longitude=row.longitude,
+                country_code=row.country_code,
+                region=row.region,
+                city_name=row.city_name,
+                address_line=row.address_line,
+                postal_code=row.postal_code,
+            )
+            for row in rows
+        ]
+
+    async def list_room_types(self, ids: Optional[Iterable[str]] = None) -> List[RoomTypeRecord]:
+        """Один запрос на номера (с вместимостью и адресом) и по одному на изображения и удобства"""
+        query = self._room_types_query()
+        if ids is not None:
+            ids = list(ids)
+            if not ids:
+                return []
+            query = query.where(RoomType.id.in_(ids))
+        async with async_session() as session:
+            rows = (await session.execute(query)).all()
+            return await self._records(session, rows, ids)
+
+    async def iter_room_types(self, batch_size: int) -> AsyncIterator[List[RoomTypeRecord]]:
+        """
+        Номера читаются серверным курсором (yield_per) порциями по batch_size;
+        изображения и удобства догружаются на каждую порцию.
+        """
+        async with async_session() as session:
+            result = await session.stream(self._room_types_query().execution_options(yield_per=batch_size))
+            async for rows in result.partitions():
+                yield await self._records(session, rows, [row.id for row in rows])
+
+    async def get_image_variants(self, urls: Iterable[str]) -> Dict[str, Dict[str, str]]:
+        async with async_session() as session:
+            return await get_image_variants(session, urls)
+
+    async def get_amenity_bits(self) -> Dict[str, int]:
+        async with async_session() as session:
+            return dict((await session.execute(select(AmenityBit.code, AmenityBit.bit))).all())
+
+    async def get_catalog_synced_at(self) -> Optional[datetime]:
+        # Каталог заменяется целиком в одной транзакции, поэтому это created_at строк room_types
+        async with async_session() as session:
+            return (await session.execute(select(func.max(RoomType.created_at)))).scalar()
+
+    async def get_catalog_version_range(self) -> Tuple[Optional[int], int]:
+        async with async_session() as session:
+            oldest, current = (await session.execute(
+                select(func.min(CatalogVersion.version), func.max(CatalogVersion.version))
+            )).one()
+        return oldest, current or 0
+
+    async def list_feedbacks(self, kind: str) -> list:
+        model, key_column, _, _, schema = self._FEEDBACK_MODELS[kind]
+        async with async_session() as session:
+            rows = (await session.execute(
+                select(model).order_by(model.created_at.desc(), key_column.desc())
+            )).scalars().all()
+        return [schema.model_validate(row) for row in rows]
+
+    async def get_feedback_page(
+        self, kind: str, limit: int, cursor: Optional[str], reverse: bool
+    ) -> Tuple[list, Optional[str], Optional[str]]:
+        model, key_column, key, key_type, schema = self._FEEDBACK_MODELS[kind]
+        sort_key = tuple_(model.created_at, key_column)
+        if reverse:
+            query = select(model).order_by(model.created_at.asc(), key_column.asc())
+        else:
+            query = select(model).order_by(model.created_at.desc(), key_column.desc())
+        if cursor:
+            created_at, cursor_key = decode_cursor(cursor)
+            bound = tuple_(created_at, key_type(cursor_key))
+            query = query.where(sort_key > bound if reverse else sort_key < bound)
+        async with async_session() as session:
+            rows = (await session.execute(query.limit(limit + 1))).scalars().all()
+        return _page([schema.model_validate(row) for row in rows], key, limit, cursor, reverse)
+
+    async def get_feedback(self, feedback_id: int) -> Optional[Feedback]:
+        async with async_session() as session:
+            fb = await session.get(FeedbackModel, feedback_id)
+        return Feedback.model_validate(fb) if fb else None
+
+    async def get_video_feedback(self, feedback_uuid: str) -> Optional[VideoFeedback]:
+        async with async_session() as session:
+            video = await session.get(VideoFeedbackModel, feedback_uuid)
+        return VideoFeedback.model_validate(video) if video else None
+
+    async def get_rating(self, kind: str) -> RatingSummary:
+        async with async_session() as session:
+            agg = await session.get(RatingAggregate, kind)
+        if agg is None:
+            return RatingSummary()
+        return _rating_summary(agg.count, agg.total, [getattr(agg, f"rate_{i}") for i in range(6)])
+
+    async def create_feedbacks(self, items: List[FeedbackCreate]) -> List[Feedback]:
+        """Пакетный INSERT ... RETURNING и одно обновление агрегатов в общей транзакции"""
+        if not items:
+            return []
+        async with async_session() as session:
+            # Порядок id из последовательности не гарантирован: sort_by_parameter_order
+            # возвращает строки RETURNING строго в порядке items
+            result = await session.scalars(
+                insert(FeedbackModel).returning(FeedbackModel, sort_by_parameter_order=True),
+                [{"text": item.text, "rate": item.rate} for item in items],
+            )
+            created = result.all()
+            rates: Dict[int, int] = {}
+            for item in items:
+                rates[item.rate] = rates.get(item.rate, 0) + 1
+            await apply_ratings(session, FEEDBACK_KIND, rates)
+            await session.commit()
+        return [Feedback.model_validate(fb) for fb in created]
+
+    async def delete_feedback(self, feedback_id: int) -> bool:
+        async with async_session() as session:
+            result = await session.execute(
+                delete(FeedbackModel).where(FeedbackModel.id == feedback_id).returning(FeedbackModel.rate)
+            )
+            rate = result.scalar_one_or_none()
+            if rate is None:
+                return False
+            await apply_rating(session, FEEDBACK_KIND, rate, -1)
+            await session.commit()
+            return True
+
+    async def create_video_feedback(self, data: VideoFeedbackCreate) -> VideoFeedback:
+        async with async_session() as session:
+            video = VideoFeedbackModel(file=data.file, rate=data.rate, telegram_file_id=data.telegram_file_id)
+            session.add(video)
+            await apply_rating(session, VIDEO_FEEDBACK_KIND, video.rate, 1)
+            await session.commit()
+            await session.refresh(video)
+            return VideoFeedback.model_validate(video)
+
+    async def delete_video_feedback(self, feedback_uuid: str) -> bool:
+        async with async_session() as session:
+            result = await session.execute(
+                delete(VideoFeedbackModel).where(VideoFeedbackModel.uuid == feedback_uuid).returning(VideoFeedbackModel.rate)
+            )
+            rate = result.scalar_one_or_none()
+            if rate is None:
+                return False
+            await apply_rating(session, VIDEO_FEEDBACK_KIND, rate, -1)
+            await session.commit()
+            return True
+
+    async def update_video_feedback(self, feedback_uuid: str, values: Dict[str, object]):
+        async with async_session() as session:
+            await session.execute(
+                update(VideoFeedbackModel).where(VideoFeedbackModel.uuid == feedback_uuid).values(**values)
+            )
+            await session.commit()
+
+    async def export_snapshot(self) -> CatalogSnapshot:
+        """Снимок текущего каталога и отзывов для SnapshotRepository"""
+        room_types = await self.list_room_types()
+        _, catalog_version = await self.get_catalog_version_range()
+        async with async_session() as session:
+            feedbacks = (await session.execute(
+                select(FeedbackModel).order_by(FeedbackModel.created_at, FeedbackModel.id)
+            )).scalars().all()
+            videos = (await session.execute(
+                select(VideoFeedbackModel).order_by(VideoFeedbackModel.created_at, VideoFeedbackModel.uuid)
+            )).scalars().all()
+        return CatalogSnapshot(
+            generated_at=datetime.now(timezone.utc),
+            catalog_version=catalog_version,
+            synced_at=await self.get_catalog_synced_at(),
+            room_types=room_types,
+            amenity_bits=await self.get_amenity_bits(),
+            image_variants=await self.get_image_variants(url for rt in room_types for url in rt.images),
+            feedbacks=[Feedback.model_validate(fb) for fb in feedbacks],
+            video_feedbacks=[VideoFeedback.model_validate(v) for v in videos],
+        )
+
+
+# --- Снимок в памяти ---
+
+class SnapshotRepository(Repository):
+    """
+    Каталог и отзывы из CatalogSnapshot, без БД. Изменения (writable=True, для тестов
+    и бенчмарков) живут только в памяти; по умолчанию запись запрещена.
+    """
+
+    def __init__(self, snapshot: CatalogSnapshot, writable: bool = False):
+        self.snapshot = snapshot
+        self.writable = writable
+        # Версия источника (snapshot_version), из которого загружен снимок
+        self.version: Optional[str] = None
+        self._room_types = {rt.id: rt for rt in snapshot.room_types}
+        # Отзывы храним от старых к новым по ключу (created_at, id/uuid)
+        self._feedbacks = {
+            FEEDBACK_KIND: sorted(snapshot.feedbacks, key=lambda fb: (fb.created_at, fb.id)),
+            VIDEO_FEEDBACK_KIND: sorted(snapshot.video_feedbacks, key=lambda v: (v.created_at, v.uuid)),
+        }
+
+    async def list_room_types(self, ids: Optional[Iterable[str]] = None) -> List[RoomTypeRecord]:
+        if ids is None:
+            return list(self.snapshot.room_types)
+        wanted = set(ids)
+        return [rt for rt in self.snapshot.room_types if rt.id in wanted]
+
+    async def iter_room_types(self, batch_size: int) -> AsyncIterator[List[RoomTypeRecord]]:
+        room_types = self.snapshot.room_types
+        for start in range(0, len(room_types), batch_size):
+            yield room_types[start:start + batch_size]
+
+    async def get_image_variants(self, urls: Iterable[str]) -> Dict[str, Dict[str, str]]:
+        variants = self.snapshot.image_variants
+        return {url: variants[url] for url in set(urls) if url in variants}
+
+    async def get_amenity_bits(self) -> Dict[str, int]:
+        return dict(self.snapshot.amenity_bits)
+
+    async def get_catalog_synced_at(self) -> Optional[datetime]:
+        return self.snapshot.synced_at
+
+    async def get_catalog_version_range(self) -> Tuple[Optional[int], int]:
+        # История версий в снимок не входит: отстающие клиенты получают полный каталог
+        return None, self.snapshot.catalog_version
+
+    async def list_feedbacks(self, kind: str) -> list:
+        return [row.model_copy() for row in reversed(self._feedbacks[kind])]
+
+    async def get_feedback_page(
+        self, kind: str, limit: int, cursor: Optional[str], reverse: bool
+    ) -> Tuple[list, Optional[str], Optional[str]]:
+        rows = self._feedbacks[kind]
+        key = "id" if kind == FEEDBACK_KIND else "uuid"
+        if cursor:
+            created_at, cursor_key = decode_cursor(cursor)
+            bound = (created_at, int(cursor_key) if kind == FEEDBACK_KIND else cursor_key)
+            if reverse:
+                rows = [row for row in rows if (row.created_at, getattr(row, key)) > bound]
+            else:
+                rows = [row for row in rows if (row.created_at, getattr(row, key)) < bound]
+        selected = rows[:limit + 1] if reverse else rows[::-1][:limit + 1]
+        return _page([row.model_copy() for row in selected], key, limit, cursor, reverse)
+
+    async def get_feedback(self, feedback_id: int) -> Optional[Feedback]:
+        return next((fb.model_copy() for fb in self._feedbacks[FEEDBACK_KIND] if fb.id == feedback_id), None)
+
+    async def get_video_feedback(self, feedback_uuid: str) -> Optional[VideoFeedback]:
+        return next((v.model_copy() for v in self._feedbacks[VIDEO_FEEDBACK_KIND] if v.uuid == feedback_uuid), None)
+
+    async def get_rating(self, kind: str) -> RatingSummary:
+        histogram = [0] * 6
+        for row in self._feedbacks[kind]:
+            histogram[row.rate] += 1
+        return _rating_summary(sum(histogram), sum(rate * n for rate, n in enumerate(histogram)), histogram)
+
+    def _check_writable(self):
+        if not self.writable:
+            raise ReadOnlyRepositoryError("снимок каталога открыт только для чтения")
+
+    async def create_feedbacks(self, items: List[FeedbackCreate]) -> List[Feedback]:
+        self._check_writable()
+        feedbacks = self._feedbacks[FEEDBACK_KIND]
+        next_id = max((fb.id for fb in feedbacks), default=0) + 1
+        now = datetime.now(timezone.utc)
+        created = [
+            Feedback(id=next_id + i, text=item.text, rate=item.rate, created_at=now, updated_at=now)
+            for i, item in enumerate(items)
+        ]
+        feedbacks.extend(created)
+        feedbacks.sort(key=lambda fb: (fb.created_at, fb.id))
+        return [fb.model_copy() for fb in created]
+
+    async def delete_feedback(self, feedback_id: int) -> bool:
+        self._check_writable()
+        feedbacks = self._feedbacks[FEEDBACK_KIND]
+        for i, fb in enumerate(feedbacks):
+            if fb.id == feedback_id:
+                del feedbacks[i]
+                return True
+        return False
+
+    async def create_video_feedback(self, data: VideoFeedbackCreate) -> VideoFeedback:
+        self._check_writable()
+        now = datetime.now(timezone.utc)
+        video = VideoFeedback(
+            uuid=str(uuid.uuid4()), file=data.file, rate=data.rate, telegram_file_id=data.telegram_file_id,
+            created_at=now, updated_at=now,
+        )
+        videos = self._feedbacks[VIDEO_FEEDBACK_KIND]
+        videos.append(video)
+        videos.sort(key=lambda v: (v.created_at, v.uuid))
+        return video.model_copy()
+
+    async def delete_video_feedback(self, feedback_uuid: str) -> bool:
+        self._check_writable()
+        videos = self._feedbacks[VIDEO_FEEDBACK_KIND]
+        for i, video in enumerate(videos):
+            if video.uuid == feedback_uuid:
+                del videos[i]
+                return True
+        return False
+
+    async def update_video_feedback(self, feedback_uuid: str, values: Dict[str, object]):
+        self._check_writable()
+        videos = self._feedbacks[VIDEO_FEEDBACK_KIND]
+        for i, video in enumerate(videos):
+            if video.uuid == feedback_uuid:
+                videos[i] = video.model_copy(update={**values, "updated_at": datetime.now(timezone.utc)})
+
+
+def encode_snapshot(snapshot: CatalogSnapshot) -> bytes:
+    return gzip.compress(snapshot.model_dump_json().encode("utf-8"), compresslevel=6)
+
+
+def decode_snapshot(blob: bytes) -> CatalogSnapshot:
+    if blob[:2] == b"\x1f\x8b":
+        blob = gzip.decompress(blob)
+    return CatalogSnapshot.model_validate_json(blob)
+
+
+async def load_snapshot(source: str) -> CatalogSnapshot:
+    """Снимок из локального файла или объекта MinIO"""
+    if os.path.exists(source):
+        with open(source, "rb") as f:
+            blob = f.read()
+    else:
+        from storage import object_storage
+        blob = await object_storage.get_bytes(source)
+    return decode_snapshot(blob)
+
+
+_repository: Optional[Repository] = None
+
+
+def set_repository(repository: Repository):
+    global _repository
+    _repository = repository
+
+
+def get_repository() -> Repository:
+    """Репозиторий, выбранный REPOSITORY_BACKEND (postgres по умолчанию)"""
+    if _repository is None:
+        if settings.REPOSITORY_BACKEND == "snapshot":
+            raise RuntimeError("Снимок каталога не загружен (load_snapshot_repository)")
+        set_repository(PostgresRepository())
+    return _repository
+
+
+async def snapshot_version(source: str) -> Optional[str]:
+    """Признак версии снимка без его загрузки: mtime и размер файла или etag объекта MinIO"""
+    if os.path.exists(source):
+        stat = os.stat(source)
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+    from storage import object_storage
+    stat = await object_storage.stat_or_none(source)
+    return stat.etag if stat is not None else None
+
+
+async def load_snapshot_repository(source: str) -> SnapshotRepository:
+    # Версию берём до загрузки: снимок, заменённый во время чтения, перечитается при следующей проверке
+    version = await snapshot_version(source)
+    snapshot = await load_snapshot(source)
+    repository = SnapshotRepository(snapshot)
+    repository.version = version
+    set_repository(repository)
+    logger.info(
+        f"load_snapshot_repository: {len(snapshot.room_types)} типов номеров, "
+        f"{len(snapshot.feedbacks)} + {len(snapshot.video_feedbacks)} отзывов, "
+        f"версия каталога {snapshot.catalog_version} от {snapshot.generated_at:%Y-%m-%d %H:%M:%S}"
+    )
+    return repository
+
+
+async def reload_snapshot_repository(source: str) -> bool:
+    """Перечитывает снимок, если он изменился с прошлой загрузки; True — репозиторий заменён"""
+    current = _repository if isinstance(_repository, SnapshotRepository) else None
+    version = await snapshot_version(source)
+    if version is None or (current is not None and version == current.version):
+        return False
+    repository = await load_snapshot_repository(source)
+    if current is not None and repository.snapshot.generated_at < current.snapshot.generated_at:
+        # Источник откатили на более старый снимок — это тоже изменение, но о нём стоит знать
+        logger.warning(
+            f"reload_snapshot_repository: снимок от {repository.snapshot.generated_at:%Y-%m-%d %H:%M:%S} "
+            f"старше загруженного ранее"
+        )
+    return True
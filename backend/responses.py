@@ -0,0 +1,144 @@
+import gzip
+import json
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from uuid import UUID
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from cache import TTLCache
+from config import settings
+
+# Необязательные ускорители: без них ответ кодируется стандартным json и gzip
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def _to_builtin(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    raise TypeError(f"Тип {type(obj).__name__} не сериализуется")
+
+
+def _orjson_default(obj: Any) -> Any:
+    # Даты и UUID внутри model_dump() orjson кодирует сам
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Тип {type(obj).__name__} не сериализуется")
+
+
+def dumps_json(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_orjson_default)
+    return json.dumps(content, default=_to_builtin, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_msgpack(content: Any) -> bytes:
+    return msgpack.packb(content, default=_to_builtin, use_bin_type=True)
+
+
+def _accepted(header: Optional[str]) -> Dict[str, float]:
+    """Разбирает Accept/Accept-Encoding в {значение: q}"""
+    result = {}
+    for part in (header or "").split(","):
+        value, _, params = part.strip().partition(";")
+        if not value:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, raw = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(raw)
+                except ValueError:
+                    q = 0.0
+        result[value.strip().lower()] = q
+    return result
+
+
+def negotiate(request: Request) -> Tuple[str, Optional[str]]:
+    """Выбирает (media type, content-encoding) по заголовкам запроса"""
+    media_type = JSON_MEDIA_TYPE
+    if msgpack is not None:
+        accept = _accepted(request.headers.get("accept"))
+        if any(accept.get(mt, 0) > 0 for mt in MSGPACK_MEDIA_TYPES):
+            media_type = MSGPACK_MEDIA_TYPES[0]
+
+    encodings = _accepted(request.headers.get("accept-encoding"))
+    encoding = None
+    if brotli is not None and encodings.get("br", 0) > 0:
+        encoding = "br"
+    elif encodings.get("gzip", 0) > 0:
+        encoding = "gzip"
+    return media_type, encoding
+
+
+def encode_body(content: Any, media_type: str, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """Сериализует и при необходимости сжимает тело; маленькие ответы не сжимаются"""
+    body = dumps_msgpack(content) if media_type in MSGPACK_MEDIA_TYPES else dumps_json(content)
+    if encoding is None or len(body) < settings.RESPONSE_COMPRESSION_MIN_SIZE:
+        return body, None
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.RESPONSE_BROTLI_QUALITY), encoding
+    return gzip.compress(body, compresslevel=settings.RESPONSE_GZIP_LEVEL), encoding
+
+
+def _build(body: bytes, media_type: str, encoding: Optional[str], headers: Optional[Dict[str, str]]) -> Response:
+    response_headers = {"Vary": "Accept, Accept-Encoding"}
+    if encoding:
+        response_headers["Content-Encoding"] = encoding
+    if headers:
+        response_headers.update(headers)
+    return Response(content=body, media_type=media_type, headers=response_headers)
+
+
+def api_response(request: Request, content: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Ответ для уже провалидированных данных из service.py: возвращая Response напрямую,
+    эндпоинт пропускает повторную валидацию response_model и jsonable_encoder
+    (response_model остаётся только для OpenAPI).
+    """
+    media_type, encoding = negotiate(request)
+    body, encoding = encode_body(content, media_type, encoding)
+    return _build(body, media_type, encoding, headers)
+
+
+async def cached_api_response(
+    request: Request,
+    cache: TTLCache,
+    key: Hashable,
+    produce: Callable[[], Awaitable[Any]],
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """
+    То же, что api_response, но готовое (сжатое) тело кешируется в cache под ключом
+    (key, формат, кодировка) — повторный запрос не трогает ни БД, ни кодировщики.
+    Сбрасывается вместе с cache.
+    """
+    media_type, encoding = negotiate(request)
+    cache_key = ("body", key, media_type, encoding)
+    cached = cache.get(cache_key)
+    if cached is None:
+        cached = encode_body(await produce(), media_type, encoding)
+        cache.set(cache_key, cached)
+    body, encoding = cached
+    return _build(body, media_type, encoding, headers)
@@ -1,13 +1,44 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
-from schemas import MainRoomType, CatalogRoomType, RoomTypeInfo
-from service import get_room_types, get_catalog_room_types, get_catalog_room_types_filtered, get_room_type_info, get_similar_room_types
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, Header, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Tuple, Union
+from datetime import date
+from schemas import (
+    MainRoomType, CatalogRoomType, CatalogRoomTypesWithFacets, RoomTypeInfo, RoomTypeInfoBatch, RoomTypeIdsRequest,
+    AvailableRoomType, GeoRoomType, CatalogChanges,
+    Feedback, FeedbackCreate, FeedbackPage, VideoFeedbackPage, RatingSummary,
+)
+from availability import get_availability_grid
+from search import get_search_index
+from geo import get_geo_index
+from catalog import get_catalog_changes, catalog_event_stream
+from export import EXPORT_FORMATS, start_export, parquet_available
+from service import (
+    get_room_types, get_catalog_room_types, get_catalog_room_types_filtered, get_catalog_room_types_with_facets,
+    get_room_type_info, get_room_type_infos, get_similar_room_types,
+    get_feedbacks_page, get_video_feedbacks_page, get_rating_summary, FEEDBACK_KIND, VIDEO_FEEDBACK_KIND,
+    get_video_feedback_by_uuid, feedback_cache,
+)
+from storage import object_storage
+from responses import api_response, cached_api_response
+from admission import admit, rate_limit, PRIORITY_HIGH, PRIORITY_LOW
+from ingest import BufferFull, get_feedback_buffer
+from repository import ReadOnlyRepositoryError
+from config import settings
+
+# Максимум id в одном пакетном запросе информации о номерах
+ROOM_INFO_BATCH_LIMIT = 200
+
+# Время жизни публичных ответов с отзывами в кеше браузера/CDN
+FEEDBACK_CACHE_CONTROL = "public, max-age=30"
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-@router.get("/main/room-types", response_model=List[MainRoomType])
-async def get_main_room_types():
+@router.get("/main/room-types", response_model=List[MainRoomType], dependencies=[Depends(admit("main", PRIORITY_HIGH))])
+async def get_main_room_types(request: Request):
     """
     Получить список всех типов номеров с основной информацией.
     
@@ -22,19 +53,26 @@ async def get_main_room_types():
     """
     try:
         room_types = await get_room_types()
-        return room_types
+        return api_response(request, room_types)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка получения данных: {str(e)}")
 
-@router.get("/catalog/room-types", response_model=List[CatalogRoomType])
+@router.get(
+    "/catalog/room-types",
+    response_model=Union[List[CatalogRoomType], CatalogRoomTypesWithFacets],
+    dependencies=[Depends(admit("catalog", PRIORITY_LOW))],
+)
 async def get_catalog_room_types_endpoint(
+    request: Request,
     price_from: Optional[int] = Query(None, description="Минимальная цена"),
     price_to: Optional[int] = Query(None, description="Максимальная цена"),
     size_from: Optional[float] = Query(None, description="Минимальный размер номера"),
     size_to: Optional[float] = Query(None, description="Максимальный размер номера"),
     category: Optional[str] = Query(None, description="Категория объекта (например, 'Аппартаменты')"),
     adult_bed: Optional[int] = Query(None, description="Количество взрослых мест"),
-    sort_by: Optional[str] = Query(None, description="Сортировка (price, size)")
+    sort_by: Optional[str] = Query(None, description="Сортировка (price, size)"),
+    amenities: Optional[str] = Query(None, description="Коды удобств через запятую (все должны быть у номера)"),
+    facets: bool = Query(False, description="Вернуть {items, facets} с количеством номеров по удобствам"),
 ):
     """
     Получить каталог типов номеров с фильтрацией и сортировкой:
@@ -45,32 +83,123 @@ async def get_catalog_room_types_endpoint(
     - category: категория
     - adult_bed: количество взрослых мест
     - sort_by: сортировка (price, size)
+    - amenities: коды удобств через запятую
+    - facets: вместо списка вернуть {items, facets}, где facets — {код удобства: количество
+      типов номеров с ним среди items} для построения фильтров
     """
     try:
-        return await get_catalog_room_types_filtered(
+        filters = dict(
             price_from=price_from,
             price_to=price_to,
             size_from=size_from,
             size_to=size_to,
             category=category,
             adult_bed=adult_bed,
-            sort_by=sort_by
+            sort_by=sort_by,
+            amenities=_split_codes(amenities)
         )
+        if facets:
+            return api_response(request, await get_catalog_room_types_with_facets(**filters))
+        catalog = await get_catalog_room_types_filtered(**filters)
+        return api_response(request, catalog)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка получения данных: {str(e)}")
 
-@router.get("/info/room-types/{room_id}", response_model=RoomTypeInfo)
-async def get_room_type_info_endpoint(room_id: str):
+@router.get("/catalog/changes", response_model=CatalogChanges, dependencies=[Depends(admit("changes", PRIORITY_LOW))])
+async def get_catalog_changes_endpoint(
+    request: Request,
+    since: int = Query(0, ge=0, description="Последняя известная клиенту версия каталога"),
+):
+    """
+    Изменения каталога после версии since: актуальная информация о добавленных и
+    изменённых типах номеров (items) и id удалённых (removed). Версия растёт
+    при каждой синхронизации, в которой что-то изменилось.
+    """
+    return api_response(request, await get_catalog_changes(since))
+
+@router.get("/catalog/events")
+async def catalog_events_endpoint(
+    request: Request,
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Server-Sent Events: событие catalog с номером версии (и списками added/changed/removed)
+    при каждом изменении каталога. Получив событие, клиент запрашивает
+    /catalog/changes?since=<своя версия>.
+    """
+    return StreamingResponse(
+        catalog_event_stream(last_event_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/export/room-types")
+async def export_room_types_endpoint(
+    format: str = Query("ndjson", pattern="^(ndjson|csv|parquet)$", description="ndjson, csv или parquet"),
+):
+    """
+    Выгрузка всего каталога для партнёров и аналитики. Строки читаются из БД
+    серверным курсором и отдаются по мере чтения, память не зависит от размера каталога.
+    Адрес разложен по колонкам; images и amenities — списки (в CSV — через «|»).
+
+    Слот admission ("export") держится всё время отдачи тела. Ошибка до первой порции
+    возвращается кодом ответа; если чтение оборвалось позже, выгрузка получается
+    неполной: NDJSON/CSV заканчиваются строкой-маркером "#export-truncated"
+    (в NDJSON — {"error": "#export-truncated"}), соединение закрывается без штатного
+    завершения ответа, а Parquet остаётся без футера и не читается.
+    """
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Выгрузка в Parquet не поддерживается на этом сервере")
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        await start_export(format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="room-types.{extension}"'},
+    )
+
+def _split_codes(value: Optional[str]) -> Optional[List[str]]:
+    if not value:
+        return None
+    return [code.strip() for code in value.split(",") if code.strip()] or None
+
+@router.get("/info/room-types", response_model=RoomTypeInfoBatch, dependencies=[Depends(admit("info_batch", PRIORITY_LOW))])
+async def get_room_type_infos_endpoint(
+    request: Request,
+    ids: str = Query(..., description="room_id через запятую"),
+):
+    """
+    Получить подробную информацию сразу о нескольких типах номеров (избранное, сравнение).
+    Порядок items совпадает с порядком ids; id, которых нет в каталоге, возвращаются в missing.
+    Для длинных списков используйте POST /info/room-types.
+    """
+    return await _room_type_infos_response(request, _split_codes(ids) or [])
+
+@router.post("/info/room-types", response_model=RoomTypeInfoBatch, dependencies=[Depends(admit("info_batch", PRIORITY_LOW))])
+async def post_room_type_infos_endpoint(request: Request, body: RoomTypeIdsRequest):
+    """
+    То же, что GET /info/room-types, но список id передаётся в теле: {"ids": [...]}.
+    """
+    return await _room_type_infos_response(request, [room_id.strip() for room_id in body.ids if room_id.strip()])
+
+async def _room_type_infos_response(request: Request, ids: List[str]) -> Response:
+    if not ids:
+        raise HTTPException(status_code=400, detail="Не передан ни один room_id")
+    if len(ids) > ROOM_INFO_BATCH_LIMIT:
+        raise HTTPException(status_code=400, detail=f"Не более {ROOM_INFO_BATCH_LIMIT} room_id за запрос")
+    return api_response(request, await get_room_type_infos(ids))
+
+@router.get("/info/room-types/{room_id}", response_model=RoomTypeInfo, dependencies=[Depends(admit("info", PRIORITY_HIGH))])
+async def get_room_type_info_endpoint(request: Request, room_id: str):
     """
     Получить подробную информацию о типе номера по его room_id.
     """
     info = await get_room_type_info(room_id)
     if not info:
         raise HTTPException(status_code=404, detail="Room type not found")
-    return info
+    return api_response(request, info)
 
-@router.get("/similar/room-types/{room_id}", response_model=List[MainRoomType])
-async def get_similar_room_types_endpoint(room_id: str):
+@router.get("/similar/room-types/{room_id}", response_model=List[MainRoomType], dependencies=[Depends(admit("similar", PRIORITY_LOW))])
+async def get_similar_room_types_endpoint(request: Request, room_id: str):
     """
     Получить список похожих объектов (максимум 10) по room_id.
     Логика:
@@ -79,4 +208,258 @@ async def get_similar_room_types_endpoint(room_id: str):
     3. Цена похожая (сортировка по разнице цены)
     """
     result = await get_similar_room_types(room_id)
-    return result
+    return api_response(request, result)
+
+
+@router.get("/search/availability", response_model=List[AvailableRoomType])
+async def search_availability_endpoint(
+    request: Request,
+    date_from: date = Query(..., description="Самая ранняя дата заезда"),
+    date_to: Optional[date] = Query(None, description="Самая поздняя дата заезда (по умолчанию date_from)"),
+    nights: int = Query(1, ge=1, description="Количество ночей"),
+    guests: int = Query(1, ge=1, description="Количество гостей"),
+):
+    """
+    Найти типы номеров, свободные на nights ночей с заездом в диапазоне [date_from, date_to]
+    и вмещающие guests гостей (adult_bed + extra_bed).
+
+    Для каждого типа номера возвращаются возможные даты заезда и максимальное
+    количество свободных номеров на весь период проживания.
+
+    На read-only реплике со снимком каталога (REPOSITORY_BACKEND=snapshot) доступность
+    не загружается, и эндпоинт всегда отвечает 503.
+    """
+    grid = get_availability_grid()
+    if grid is None:
+        raise HTTPException(status_code=503, detail="Данные о доступности ещё не загружены")
+    date_to = date_to or date_from
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to не может быть раньше date_from")
+    return api_response(request, grid.search(date_from, date_to, nights, guests))
+
+
+@router.get("/search/room-types", response_model=List[MainRoomType])
+async def search_room_types_endpoint(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200, description="Поисковый запрос"),
+    limit: int = Query(10, ge=1, le=50, description="Максимальное количество результатов"),
+):
+    """
+    Полнотекстовый поиск по типам номеров: название, описание, категория и коды удобств.
+    Результаты ранжируются по релевантности; последнее слово запроса ищется
+    по префиксу (подсказки при вводе). Индекс перестраивается после каждой синхронизации.
+    """
+    index = get_search_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Поисковый индекс ещё не построен")
+    return api_response(request, index.search(q, limit=limit))
+
+@router.get("/search/nearby", response_model=List[GeoRoomType])
+async def search_nearby_endpoint(
+    request: Request,
+    lat: float = Query(..., ge=-90, le=90, description="Широта точки"),
+    lon: float = Query(..., ge=-180, le=180, description="Долгота точки"),
+    radius_km: float = Query(5, gt=0, le=500, description="Радиус поиска, км"),
+    limit: int = Query(20, ge=1, le=100, description="Максимальное количество результатов"),
+):
+    """
+    Типы номеров, адрес которых находится в радиусе radius_km от точки,
+    от ближайших к дальним (distance_km — расстояние по большому кругу).
+    """
+    index = get_geo_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Геоиндекс ещё не построен")
+    return api_response(request, index.nearby(lat, lon, radius_km, limit))
+
+
+@router.get("/search/bbox", response_model=List[GeoRoomType])
+async def search_bbox_endpoint(
+    request: Request,
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    lat: Optional[float] = Query(None, ge=-90, le=90, description="Широта точки для сортировки (по умолчанию центр)"),
+    lon: Optional[float] = Query(None, ge=-180, le=180, description="Долгота точки для сортировки (по умолчанию центр)"),
+    limit: int = Query(100, ge=1, le=500, description="Максимальное количество результатов"),
+):
+    """
+    Типы номеров внутри прямоугольника карты, отсортированные по расстоянию
+    до точки (lat, lon), по умолчанию — до центра прямоугольника.
+    """
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(status_code=400, detail="Некорректные границы: min_* должны быть не больше max_*")
+    index = get_geo_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Геоиндекс ещё не построен")
+    lat = (min_lat + max_lat) / 2 if lat is None else lat
+    lon = (min_lon + max_lon) / 2 if lon is None else lon
+    return api_response(request, index.within_bbox(min_lat, min_lon, max_lat, max_lon, lat, lon, limit))
+
+@router.get("/feedbacks", response_model=FeedbackPage, dependencies=[Depends(admit("feedbacks", PRIORITY_HIGH))])
+async def get_feedbacks_endpoint(
+    request: Request,
+    limit: int = Query(20, ge=1, le=100, description="Размер страницы"),
+    cursor: Optional[str] = Query(None, description="Курсор страницы (next_cursor или prev_cursor)"),
+    reverse: bool = Query(False, description="true — листать к более новым отзывам (вместе с prev_cursor)"),
+):
+    """
+    Получить страницу текстовых отзывов (от новых к старым).
+    Для следующей страницы передайте next_cursor из предыдущего ответа,
+    для предыдущей — prev_cursor и reverse=true.
+    """
+    try:
+        return await cached_api_response(
+            request, feedback_cache, ("feedbacks", limit, cursor, reverse),
+            lambda: get_feedbacks_page(limit=limit, cursor=cursor, reverse=reverse),
+            headers={"Cache-Control": FEEDBACK_CACHE_CONTROL},
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post(
+    "/feedbacks",
+    response_model=Feedback,
+    status_code=201,
+    dependencies=[
+        Depends(rate_limit("feedbacks_write", settings.FEEDBACK_RATE_LIMIT, settings.FEEDBACK_RATE_WINDOW)),
+        Depends(admit("feedbacks_write", PRIORITY_LOW, use_db=False)),
+    ],
+)
+async def create_feedback_endpoint(body: FeedbackCreate):
+    """
+    Оставить текстовый отзыв с сайта. Отзывы пишутся в БД пакетами;
+    ответ приходит после того, как отзыв сохранён. С одного IP — не больше
+    FEEDBACK_RATE_LIMIT отзывов за FEEDBACK_RATE_WINDOW секунд (иначе 429).
+    На реплике со снимком каталога запись недоступна (405).
+    """
+    try:
+        return await get_feedback_buffer().submit(body)
+    except BufferFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Слишком много отзывов, повторите позже",
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)},
+        )
+    except ReadOnlyRepositoryError:
+        raise HTTPException(status_code=405, detail="Отзывы на этой реплике не принимаются", headers={"Allow": "GET"})
+    except Exception as e:
+        logger.error(f"Не удалось сохранить отзыв: {e!r}")
+        raise HTTPException(
+            status_code=503,
+            detail="Не удалось сохранить отзыв, повторите позже",
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)},
+        )
+
+@router.get("/feedbacks/rating", response_model=RatingSummary, dependencies=[Depends(admit("feedbacks", PRIORITY_HIGH))])
+async def get_feedbacks_rating_endpoint(request: Request):
+    """
+    Получить агрегаты рейтинга текстовых отзывов: количество, средняя оценка и гистограмма 0..5.
+    """
+    return await cached_api_response(
+        request, feedback_cache, ("rating", FEEDBACK_KIND),
+        lambda: get_rating_summary(FEEDBACK_KIND),
+        headers={"Cache-Control": FEEDBACK_CACHE_CONTROL},
+    )
+
+@router.get("/video-feedbacks", response_model=VideoFeedbackPage, dependencies=[Depends(admit("feedbacks", PRIORITY_HIGH))])
+async def get_video_feedbacks_endpoint(
+    request: Request,
+    limit: int = Query(20, ge=1, le=100, description="Размер страницы"),
+    cursor: Optional[str] = Query(None, description="Курсор страницы (next_cursor или prev_cursor)"),
+    reverse: bool = Query(False, description="true — листать к более новым отзывам (вместе с prev_cursor)"),
+):
+    """
+    Получить страницу видео отзывов (от новых к старым).
+    Для следующей страницы передайте next_cursor из предыдущего ответа,
+    для предыдущей — prev_cursor и reverse=true.
+    """
+    try:
+        return await cached_api_response(
+            request, feedback_cache, ("video_feedbacks", limit, cursor, reverse),
+            lambda: get_video_feedbacks_page(limit=limit, cursor=cursor, reverse=reverse),
+            headers={"Cache-Control": FEEDBACK_CACHE_CONTROL},
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/video-feedbacks/rating", response_model=RatingSummary, dependencies=[Depends(admit("feedbacks", PRIORITY_HIGH))])
+async def get_video_feedbacks_rating_endpoint(request: Request):
+    """
+    Получить агрегаты рейтинга видео отзывов: количество, средняя оценка и гистограмма 0..5.
+    """
+    return await cached_api_response(
+        request, feedback_cache, ("rating", VIDEO_FEEDBACK_KIND),
+        lambda: get_rating_summary(VIDEO_FEEDBACK_KIND),
+        headers={"Cache-Control": FEEDBACK_CACHE_CONTROL},
+    )
+
+
+def _parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Разбирает заголовок Range вида bytes=start-end, bytes=start- или bytes=-suffix.
+    Возвращает (start, end) включительно или None, если диапазон не поддерживается
+    (несколько диапазонов, другой формат) — тогда отдаётся файл целиком.
+    Для невыполнимого диапазона выбрасывает ValueError.
+    """
+    unit, _, spec = range_header.partition("=")
+    start_str, sep, end_str = spec.strip().partition("-")
+    if unit.strip().lower() != "bytes" or "," in spec or not sep:
+        return None
+    if not (start_str or end_str).isdigit() or (start_str and end_str and not end_str.isdigit()):
+        return None
+    if not start_str:
+        # Последние N байт
+        suffix = int(end_str)
+        if suffix == 0:
+            raise ValueError("Пустой диапазон")
+        return max(size - suffix, 0), size - 1
+    start = int(start_str)
+    end = int(end_str) if end_str else size - 1
+    if end_str and end < start:
+        return None
+    if start >= size:
+        raise ValueError("Диапазон вне файла")
+    return start, min(end, size - 1)
+
+@router.get("/video-feedbacks/{feedback_uuid}/stream")
+async def stream_video_feedback_endpoint(feedback_uuid: str, range_header: Optional[str] = Header(None, alias="Range")):
+    """
+    Потоковая отдача видео отзыва из MinIO с поддержкой HTTP Range (перемотка в браузере).
+    Файл не буферизуется целиком: данные читаются из MinIO и отдаются чанками.
+    """
+    video = await get_video_feedback_by_uuid(feedback_uuid)
+    if not video:
+        raise HTTPException(status_code=404, detail="Video feedback not found")
+    stat = await object_storage.stat_or_none(video.file)
+    if stat is None:
+        # Запись в БД есть, а файла в MinIO нет (удалён или загрузка не завершилась)
+        raise HTTPException(status_code=404, detail="Video file not found")
+    size = stat.size
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{stat.etag}"',
+        "Cache-Control": "public, max-age=3600",
+    }
+    byte_range = None
+    if range_header:
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{size}", "Accept-Ranges": "bytes"})
+
+    if byte_range is None:
+        start, length, status_code = 0, size, 200
+    else:
+        start, end = byte_range
+        length, status_code = end - start + 1, 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(length)
+
+    return StreamingResponse(
+        object_storage.iter_range(video.file, offset=start, length=length),
+        status_code=status_code,
+        media_type=stat.content_type or "video/mp4",
+        headers=headers,
+    )
@@ -0,0 +1,113 @@
+"""
+Отдельный процесс Telegram бота.
+
+    python run_bot.py
+
+Если задан TELEGRAM_WEBHOOK_URL, бот принимает обновления через webhook
+(собственное FastAPI приложение на TELEGRAM_WEBHOOK_HOST:TELEGRAM_WEBHOOK_PORT)
+и может быть запущен в нескольких репликах — состояние диалогов хранится в Redis.
+Иначе используется polling (допускается только одна реплика), а метрики
+отдаются отдельным listener'ом на TELEGRAM_METRICS_PORT.
+"""
+import asyncio
+import logging
+import secrets
+from contextlib import asynccontextmanager
+
+import uvicorn
+from aiogram.types import Update
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from config import settings
+from metrics import render_metrics, start_metrics_server
+from monitoring import loop_monitor
+from service import start_feedback_cache_listener, stop_feedback_cache_listener
+from telegram import get_bot, get_dispatcher, init_minio, start_bot
+from workers import shutdown_process_pool
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Обработка обновлений идёт в фоне, чтобы быстро отвечать Telegram (храним ссылки на задачи)
+_update_tasks: set = set()
+
+
+def create_webhook_app() -> FastAPI:
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if settings.LOOP_MONITOR_ENABLED:
+            loop_monitor.start()
+        await init_minio()
+        start_feedback_cache_listener()
+        bot, dp = get_bot(), get_dispatcher()
+        await bot.set_webhook(
+            settings.TELEGRAM_WEBHOOK_URL,
+            secret_token=settings.TELEGRAM_WEBHOOK_SECRET or None,
+            allowed_updates=dp.resolve_used_update_types(),
+        )
+        logger.info("Webhook установлен: %s", settings.TELEGRAM_WEBHOOK_URL)
+        yield
+        if settings.LOOP_MONITOR_ENABLED:
+            await loop_monitor.stop()
+        await stop_feedback_cache_listener()
+        await dp.storage.close()
+        await bot.session.close()
+        shutdown_process_pool()
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.post(settings.TELEGRAM_WEBHOOK_PATH)
+    async def telegram_webhook(
+        request: Request,
+        secret_token: str = Header("", alias="X-Telegram-Bot-Api-Secret-Token"),
+    ):
+        if settings.TELEGRAM_WEBHOOK_SECRET and not secrets.compare_digest(
+            secret_token, settings.TELEGRAM_WEBHOOK_SECRET
+        ):
+            raise HTTPException(status_code=403, detail="Invalid secret token")
+        bot = get_bot()
+        update = Update.model_validate(await request.json(), context={"bot": bot})
+        task = asyncio.create_task(get_dispatcher().feed_update(bot, update))
+        _update_tasks.add(task)
+        task.add_done_callback(_update_tasks.discard)
+        return {"ok": True}
+
+    @app.get("/health/")
+    async def health():
+        return {"message": "Telegram bot is running"}
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        return render_metrics()
+
+    return app
+
+
+async def run_polling():
+    metrics_server = None
+    if settings.TELEGRAM_METRICS_PORT:
+        metrics_server = await start_metrics_server(settings.TELEGRAM_WEBHOOK_HOST, settings.TELEGRAM_METRICS_PORT)
+        logger.info("Метрики бота: http://%s:%d/metrics", settings.TELEGRAM_WEBHOOK_HOST, settings.TELEGRAM_METRICS_PORT)
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    start_feedback_cache_listener()
+    try:
+        await start_bot()
+    finally:
+        if settings.LOOP_MONITOR_ENABLED:
+            await loop_monitor.stop()
+        if metrics_server is not None:
+            metrics_server.close()
+            await metrics_server.wait_closed()
+        await stop_feedback_cache_listener()
+        await get_dispatcher().storage.close()
+        await get_bot().session.close()
+        shutdown_process_pool()
+
+
+if __name__ == "__main__":
+    if settings.TELEGRAM_WEBHOOK_URL:
+        uvicorn.run(create_webhook_app(), host=settings.TELEGRAM_WEBHOOK_HOST, port=settings.TELEGRAM_WEBHOOK_PORT)
+    else:
+        asyncio.run(run_polling())
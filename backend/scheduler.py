@@ -1,26 +1,97 @@
 import asyncio
 import logging
-from config import Settings
-from parser import fetch_and_save_room_types
+from config import settings
+from availability import refresh_availability
+from search import rebuild_search_index
+from geo import rebuild_geo_index
+from upstream import CircuitOpenError
+from amenities import reset_amenity_index
+from repository import reload_snapshot_repository
+from service import catalog_calls, feedback_cache
 
-settings = Settings()
 logger = logging.getLogger(__name__)
 
 
+async def refresh_indexes():
+    """
+    Поисковый индекс, геоиндекс и доступность. Индексы строятся по БД, поэтому
+    обновляются и при недоступности TravelLine, и в процессах без синхронизации.
+    """
+    try:
+        await rebuild_search_index()
+    except Exception as e:
+        logger.error(f"Ошибка построения поискового индекса: {e}")
+
+    try:
+        await rebuild_geo_index()
+    except Exception as e:
+        logger.error(f"Ошибка построения геоиндекса: {e}")
+
+    try:
+        await refresh_availability()
+    except Exception as e:
+        logger.error(f"Ошибка обновления доступности: {e}")
+
+
 async def sync_task():
     """Задача для периодической синхронизации данных"""
+    from parser import fetch_and_save_room_types
+
     while True:
         try:
             logger.info("Запуск синхронизации данных...")
             await fetch_and_save_room_types()
             logger.info("Синхронизация завершена успешно")
+        except CircuitOpenError as e:
+            logger.warning(f"Синхронизация пропущена, TravelLine недоступен ({e}); отдаётся последний удачный каталог")
         except Exception as e:
             logger.error(f"Ошибка синхронизации: {e}")
+
+        await refresh_indexes()
         
         # Ждем указанное количество минут
         await asyncio.sleep(settings.SYNC_INTERVAL_MINUTES * 60)
 
 
+async def refresh_task():
+    """Без синхронизации (SYNC_ENABLED=false): каталог пишет другой процесс, здесь — только индексы"""
+    while True:
+        await refresh_indexes()
+        await asyncio.sleep(settings.SYNC_INTERVAL_MINUTES * 60)
+
+
 def start_sync_task():
     """Запускает задачу синхронизации в фоне"""
-    asyncio.create_task(sync_task()) 
\ No newline at end of file
+    asyncio.create_task(sync_task())
+
+
+def start_refresh_task():
+    """Запускает в фоне обновление индексов и доступности без синхронизации"""
+    asyncio.create_task(refresh_task())
+
+
+async def apply_snapshot():
+    """После (пере)загрузки снимка: индексы строятся заново, кеши каталога и отзывов сбрасываются"""
+    reset_amenity_index()
+    catalog_calls.clear()
+    feedback_cache.clear()
+    await rebuild_search_index()
+    await rebuild_geo_index()
+
+
+async def snapshot_reload_task():
+    """Read-only реплика: перечитывает CATALOG_SNAPSHOT_SOURCE, когда снимок обновился"""
+    while True:
+        await asyncio.sleep(settings.CATALOG_SNAPSHOT_RELOAD_SECONDS)
+        try:
+            if await reload_snapshot_repository(settings.CATALOG_SNAPSHOT_SOURCE):
+                await apply_snapshot()
+        except Exception as e:
+            # Продолжаем отдавать предыдущий снимок
+            logger.error(f"Ошибка перезагрузки снимка каталога: {e}")
+
+
+def start_snapshot_reload_task():
+    """Запускает в фоне проверку обновлений снимка каталога"""
+    if settings.CATALOG_SNAPSHOT_RELOAD_SECONDS > 0:
+        asyncio.create_task(snapshot_reload_task())
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
-from datetime import datetime
+from typing import Optional, List, Dict
+from datetime import date, datetime
 
 
 class MainRoomType(BaseModel):
@@ -10,10 +10,14 @@ class MainRoomType(BaseModel):
     price: Optional[int] = None
     adult_bed: Optional[int] = None
     image: Optional[str] = None
+    image_variants: Dict[str, str] = {}  # ширина -> URL уменьшенной копии
 
     class Config:
         from_attributes = True
 
+class GeoRoomType(MainRoomType):
+    distance_km: float
+
 class CatalogRoomType(BaseModel):
     id: str
     name: str
@@ -21,6 +25,7 @@ class CatalogRoomType(BaseModel):
     price: int = 2700
     amenities: List[str] = []
     image: Optional[str] = None
+    image_variants: Dict[str, str] = {}  # ширина -> URL уменьшенной копии
     size: Optional[float] = None
     category: Optional[str] = None
     adult_bed: Optional[int] = None
@@ -28,6 +33,10 @@ class CatalogRoomType(BaseModel):
     class Config:
         from_attributes = True
 
+class CatalogRoomTypesWithFacets(BaseModel):
+    items: List[CatalogRoomType] = []
+    facets: Dict[str, int] = {}  # код удобства -> количество типов номеров среди items
+
 class RoomTypeInfo(BaseModel):
     id: str
     name: str
@@ -35,6 +44,7 @@ class RoomTypeInfo(BaseModel):
     price: int = 2700
     amenities: List[str] = []
     images: List[str] = []
+    image_variants: List[Dict[str, str]] = []  # для каждого из images: ширина -> URL
     size: Optional[float] = None
     category: Optional[str] = None
     adult_bed: Optional[int] = None
@@ -42,6 +52,29 @@ class RoomTypeInfo(BaseModel):
     class Config:
         from_attributes = True
 
+class RoomTypeInfoBatch(BaseModel):
+    items: List[RoomTypeInfo] = []
+    missing: List[str] = []  # запрошенные id, которых нет в каталоге
+
+class RoomTypeIdsRequest(BaseModel):
+    ids: List[str]
+
+class CatalogChanges(BaseModel):
+    version: int  # текущая версия каталога — передайте её как since в следующий раз
+    since: int
+    full_resync: bool = False  # since устарела: items содержит весь каталог
+    items: List[RoomTypeInfo] = []  # добавленные и изменённые типы номеров
+    removed: List[str] = []
+
+
+class AvailableRoomType(BaseModel):
+    id: str
+    name: str
+    adult_bed: Optional[int] = None
+    extra_bed: Optional[int] = None
+    free_units: int
+    arrival_dates: List[date] = []
+
 
 class FeedbackBase(BaseModel):
     text: str
@@ -49,7 +82,7 @@ class FeedbackBase(BaseModel):
 
 
 class FeedbackCreate(FeedbackBase):
-    pass
+    text: str = Field(..., min_length=1, max_length=4096)
 
 
 class Feedback(FeedbackBase):
@@ -67,13 +100,72 @@ class VideoFeedbackBase(BaseModel):
 
 
 class VideoFeedbackCreate(VideoFeedbackBase):
-    pass
+    telegram_file_id: Optional[str] = None
 
 
 class VideoFeedback(VideoFeedbackBase):
     uuid: str
     created_at: datetime
     updated_at: datetime
+    url: Optional[str] = None  # presigned URL для просмотра в браузере
+    duration: Optional[float] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    bitrate: Optional[int] = None
+    poster: Optional[str] = None
+    poster_url: Optional[str] = None
+    telegram_file_id: Optional[str] = Field(None, exclude=True)  # только для бота, в API не отдаётся
 
     class Config:
         from_attributes = True
+
+
+class FeedbackPage(BaseModel):
+    items: List[Feedback] = []
+    next_cursor: Optional[str] = None  # страница со старыми отзывами
+    prev_cursor: Optional[str] = None  # страница с более новыми отзывами (reverse=true)
+
+
+class VideoFeedbackPage(BaseModel):
+    items: List[VideoFeedback] = []
+    next_cursor: Optional[str] = None  # страница со старыми отзывами
+    prev_cursor: Optional[str] = None  # страница с более новыми отзывами (reverse=true)
+
+
+class RatingSummary(BaseModel):
+    count: int = 0
+    average: Optional[float] = None
+    histogram: List[int] = Field(default_factory=lambda: [0] * 6, description="Количество оценок 0..5")
+
+
+# Снимок каталога и отзывов для SnapshotRepository (read-only реплики без БД)
+class RoomTypeRecord(BaseModel):
+    id: str
+    name: str
+    description: Optional[str] = None
+    size: Optional[float] = None
+    category: Optional[str] = None
+    position: Optional[int] = None
+    adult_bed: Optional[int] = None
+    extra_bed: Optional[int] = None
+    images: List[str] = []  # в порядке position
+    amenities: List[str] = []
+    amenity_mask: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    country_code: Optional[str] = None
+    region: Optional[str] = None
+    city_name: Optional[str] = None
+    address_line: Optional[str] = None
+    postal_code: Optional[str] = None
+
+
+class CatalogSnapshot(BaseModel):
+    generated_at: datetime
+    catalog_version: int = 0
+    synced_at: Optional[datetime] = None
+    room_types: List[RoomTypeRecord] = []
+    amenity_bits: Dict[str, int] = {}
+    image_variants: Dict[str, Dict[str, str]] = {}
+    feedbacks: List[Feedback] = []
+    video_feedbacks: List[VideoFeedback] = []
@@ -0,0 +1,140 @@
+import bisect
+import logging
+import math
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from schemas import MainRoomType
+from service import get_room_types
+from repository import get_repository
+
+logger = logging.getLogger(__name__)
+
+# Вес совпадения в зависимости от поля
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "category": 2.0,
+    "amenity": 1.5,
+    "description": 1.0,
+}
+# Совпадение по префиксу (type-ahead) весит меньше точного
+PREFIX_WEIGHT = 0.5
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+# Окончания для упрощённого стемминга русских слов (от длинных к коротким)
+_RU_ENDINGS = sorted(
+    [
+        "иями", "ями", "ами", "иях", "ией", "иям", "ием", "ого", "его", "ому", "ему", "ыми", "ими",
+        "ая", "яя", "ое", "ее", "ые", "ие", "ый", "ий", "ой", "ом", "ем", "ам", "ям", "ах", "ях",
+        "ов", "ев", "ей", "ия", "ью", "ию", "а", "я", "о", "е", "ы", "и", "у", "ю", "ь", "й",
+    ],
+    key=len,
+    reverse=True,
+)
+_CYRILLIC_RE = re.compile(r"[а-я]")
+
+
+def normalize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower().replace("ё", "е")) if len(t) > 1]
+
+
+def stem(token: str) -> str:
+    """Упрощённый стемминг: отбрасывает типичное окончание русского слова"""
+    if not _CYRILLIC_RE.search(token):
+        return token
+    for ending in _RU_ENDINGS:
+        if token.endswith(ending) and len(token) - len(ending) >= 3:
+            return token[:-len(ending)]
+    return token
+
+
+class SearchIndex:
+    """
+    Инвертированный индекс по типам номерам: термин -> {room_id: вес}.
+    Термины хранятся отсортированными для поиска по префиксу через bisect.
+    """
+
+    def __init__(self, postings: Dict[str, Dict[str, float]], docs: Dict[str, MainRoomType]):
+        self.postings = postings
+        self.docs = docs
+        self.terms = sorted(postings)
+        total = max(len(docs), 1)
+        self.idf = {term: math.log(1 + total / len(ids)) for term, ids in postings.items()}
+
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self.terms, prefix)
+        end = bisect.bisect_left(self.terms, prefix + "\uffff")
+        return self.terms[start:end]
+
+    def search(self, query: str, limit: int = 10) -> List[MainRoomType]:
+        tokens = normalize(query)
+        if not tokens:
+            return []
+        scores: Dict[str, float] = defaultdict(float)
+        matched: Dict[str, int] = defaultdict(int)
+
+        for i, token in enumerate(tokens):
+            term = stem(token)
+            token_scores: Dict[str, float] = {}
+            for room_id, weight in self.postings.get(term, {}).items():
+                token_scores[room_id] = weight * self.idf[term]
+            # Последнее слово может быть недописанным — ищем по префиксу
+            if i == len(tokens) - 1:
+                for prefix_term in self._prefix_terms(term):
+                    if prefix_term == term:
+                        continue
+                    for room_id, weight in self.postings[prefix_term].items():
+                        score = weight * self.idf[prefix_term] * PREFIX_WEIGHT
+                        if score > token_scores.get(room_id, 0):
+                            token_scores[room_id] = score
+            for room_id, score in token_scores.items():
+                scores[room_id] += score
+                matched[room_id] += 1
+
+        # Сначала документы, в которых нашлись все слова запроса, затем по релевантности
+        ranked = sorted(scores, key=lambda room_id: (-matched[room_id], -scores[room_id]))
+        return [self.docs[room_id] for room_id in ranked if room_id in self.docs][:limit]
+
+
+def build_search_index(room_types: List[MainRoomType], fields: Dict[str, Dict[str, List[str]]]) -> SearchIndex:
+    """
+    room_types: документы, которые возвращаются в выдаче
+    fields: {room_id: {"name": [...], "category": [...], "amenity": [...], "description": [...]}}
+    """
+    postings: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for room_id, room_fields in fields.items():
+        for field, texts in room_fields.items():
+            weight = FIELD_WEIGHTS[field]
+            for text in texts:
+                for token in normalize(text or ""):
+                    postings[stem(token)][room_id] += weight
+    docs = {rt.id: rt for rt in room_types}
+    return SearchIndex({term: dict(ids) for term, ids in postings.items()}, docs)
+
+
+_index: Optional[SearchIndex] = None
+
+
+def get_search_index() -> Optional[SearchIndex]:
+    return _index
+
+
+async def rebuild_search_index():
+    """Перестраивает индекс по текущему каталогу (вызывается после синхронизации)"""
+    global _index
+    room_types = await get_room_types()
+    records = await get_repository().list_room_types()
+
+    fields: Dict[str, Dict[str, List[str]]] = {}
+    for record in records:
+        fields[record.id] = {
+            "name": [record.name],
+            "category": [record.category],
+            "description": [record.description],
+            # Коды вида "free_wifi" индексируем и целиком, и по словам
+            "amenity": [term for code in record.amenities for term in (code, code.replace("_", " "))],
+        }
+
+    _index = build_search_index(room_types, fields)
+    logger.info(f"rebuild_search_index: проиндексировано {len(records)} типов номеров, {len(_index.terms)} терминов")
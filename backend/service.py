@@ -1,93 +1,75 @@
-from typing import List, Optional
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, asc, desc, delete
-from models import RoomType, Occupancy, RoomTypeImage, Amenity, Feedback as FeedbackModel, VideoFeedback as VideoFeedbackModel
-from schemas import MainRoomType, CatalogRoomType, RoomTypeInfo, FeedbackCreate, Feedback, VideoFeedbackCreate, VideoFeedback
-from database import async_session
+import asyncio
+import logging
+from typing import Dict, List, Optional
+import redis.asyncio as redis
+from schemas import (
+    MainRoomType, CatalogRoomType, CatalogRoomTypesWithFacets, RoomTypeInfo, RoomTypeInfoBatch, RoomTypeRecord,
+    FeedbackCreate, Feedback, VideoFeedbackCreate, VideoFeedback, FeedbackPage, VideoFeedbackPage, RatingSummary,
+)
+from cache import TTLCache, SingleFlight
+from config import settings
+from storage import object_storage
+from amenities import get_amenity_index
+from repository import get_repository, FEEDBACK_KIND, VIDEO_FEEDBACK_KIND
 
+logger = logging.getLogger(__name__)
 
+# Кеш публичных списков отзывов и агрегатов рейтинга (сбрасывается при изменениях)
+feedback_cache = TTLCache(maxsize=512, ttl=30)
+# Отзывы пишут и API, и отдельный процесс бота: сброс кеша рассылается всем процессам
+FEEDBACK_CHANNEL = "feedbacks:changes"
+# Объединение одинаковых конкурентных запросов к каталогу + кеш результатов (сбрасывается после синхронизации)
+catalog_calls = SingleFlight(maxsize=settings.CATALOG_CACHE_SIZE, ttl=settings.CATALOG_CACHE_TTL)
+
+
+def _first_image(record: RoomTypeRecord) -> Optional[str]:
+    return record.images[0] if record.images else None
+
+
+def _catalog_item(record: RoomTypeRecord) -> CatalogRoomType:
+    return CatalogRoomType(
+        id=record.id,
+        name=record.name,
+        description=record.description,
+        price=2700,
+        amenities=record.amenities,
+        image=_first_image(record),
+        size=record.size,
+        category=record.category,
+        adult_bed=record.adult_bed,
+    )
+
+
+@catalog_calls
 async def get_room_types() -> List[MainRoomType]:
     """
-    Получает все типы номеров из базы данных с основной информацией
+    Получает все типы номеров с основной информацией
     """
-    async with async_session() as session:
-        # Выполняем JOIN запрос для получения данных room_types и occupancy
-        query = select(RoomType, Occupancy).outerjoin(
-            Occupancy, RoomType.id == Occupancy.room_type_id
+    room_types = [
+        MainRoomType(
+            id=record.id,
+            name=record.name,
+            description=record.description,
+            price=2700,
+            adult_bed=record.adult_bed,
+            image=_first_image(record),
         )
-        
-        result = await session.execute(query)
-        room_types = []
-        
-        for row in result:
-            room_type, occupancy = row
-            
-            # Получаем первое изображение для данного типа номера
-            image_query = select(RoomTypeImage.url).where(
-                RoomTypeImage.room_type_id == room_type.id
-            ).order_by(RoomTypeImage.position).limit(1)
-            
-            image_result = await session.execute(image_query)
-            first_image = image_result.scalar()
-            
-            main_room_type = MainRoomType(
-                id=room_type.id,
-                name=room_type.name,
-                description=room_type.description,
-                price=2700,
-                adult_bed=occupancy.adult_bed if occupancy else None,
-                image=first_image
-            )
-            room_types.append(main_room_type)
-        
-        return room_types
+        for record in await get_repository().list_room_types()
+    ]
+    await _attach_image_variants(room_types)
+    return room_types
 
 
+@catalog_calls
 async def get_catalog_room_types() -> List[CatalogRoomType]:
     """
     Получает все типы номеров для каталога с подробной информацией
     """
-    async with async_session() as session:
-        query = select(RoomType)
-        result = await session.execute(query)
-        room_types = result.scalars().all()
-        catalog = []
-
-        for room_type in room_types:
-            # Первое изображение
-            image_query = select(RoomTypeImage.url).where(
-                RoomTypeImage.room_type_id == room_type.id
-            ).order_by(RoomTypeImage.position).limit(1)
-            image_result = await session.execute(image_query)
-            first_image = image_result.scalar()
-
-            # Удобства
-            amenities_query = select(Amenity.code).where(
-                Amenity.room_type_id == room_type.id
-            )
-            amenities_result = await session.execute(amenities_query)
-            amenities = [row[0] for row in amenities_result.all()]
-
-            # Вместимость
-            occ_query = select(Occupancy.adult_bed).where(
-                Occupancy.room_type_id == room_type.id
-            )
-            occ_result = await session.execute(occ_query)
-            adult_bed = occ_result.scalar()
-
-            catalog.append(CatalogRoomType(
-                id=room_type.id,
-                name=room_type.name,
-                description=room_type.description,
-                price=2700,
-                amenities=amenities,
-                image=first_image,
-                size=room_type.size_value,
-                category=room_type.category_name,
-                adult_bed=adult_bed
-            ))
-        return catalog
+    catalog = [_catalog_item(record) for record in await get_repository().list_room_types()]
+    await _attach_image_variants(catalog)
+    return catalog
 
+@catalog_calls
 async def get_catalog_room_types_filtered(
     price_from: Optional[int] = None,
     price_to: Optional[int] = None,
@@ -95,246 +77,322 @@ async def get_catalog_room_types_filtered(
     size_to: Optional[float] = None,
     category: Optional[str] = None,
     adult_bed: Optional[int] = None,
-    sort_by: Optional[str] = None
+    sort_by: Optional[str] = None,
+    amenities: Optional[List[str]] = None
 ) -> List[CatalogRoomType]:
-    async with async_session() as session:
-        query = select(RoomType)
-        filters = []
-        # Фильтрация по size
-        if size_from is not None:
-            filters.append(RoomType.size_value >= size_from)
-        if size_to is not None:
-            filters.append(RoomType.size_value <= size_to)
-        # Фильтрация по категории
-        if category:
-            filters.append(RoomType.category_name == category)
-        # Применяем фильтры к RoomType
-        if filters:
-            query = query.where(and_(*filters))
-        # Сортировка
-        if sort_by == "price":
-            query = query.order_by(RoomType.position)
-        elif sort_by == "size":
-            query = query.order_by(RoomType.size_value)
-        # Получаем RoomType
-        result = await session.execute(query)
-        room_types = result.scalars().all()
-        catalog = []
-        for room_type in room_types:
-            # Фильтрация по adult_bed
-            occ_query = select(Occupancy.adult_bed).where(
-                Occupancy.room_type_id == room_type.id
-            )
-            occ_result = await session.execute(occ_query)
-            adult_bed_val = occ_result.scalar()
-            if adult_bed is not None and adult_bed_val != adult_bed:
-                continue
-            # Фильтрация по цене (position)
-            price = 2700  # по умолчанию
-            if price_from is not None and price < price_from:
-                continue
-            if price_to is not None and price > price_to:
-                continue
-            # Первое изображение
-            image_query = select(RoomTypeImage.url).where(
-                RoomTypeImage.room_type_id == room_type.id
-            ).order_by(RoomTypeImage.position).limit(1)
-            image_result = await session.execute(image_query)
-            first_image = image_result.scalar()
-            # Удобства
-            amenities_query = select(Amenity.code).where(
-                Amenity.room_type_id == room_type.id
-            )
-            amenities_result = await session.execute(amenities_query)
-            amenities = [row[0] for row in amenities_result.all()]
-            catalog.append(CatalogRoomType(
-                id=room_type.id,
-                name=room_type.name,
-                description=room_type.description,
-                price=price,
-                amenities=amenities,
-                image=first_image,
-                size=room_type.size_value,
-                category=room_type.category_name,
-                adult_bed=adult_bed_val
-            ))
-        # Сортировка по цене (если нужно)
-        if sort_by == "price":
-            catalog.sort(key=lambda x: x.price)
-        elif sort_by == "size":
-            catalog.sort(key=lambda x: (x.size or 0))
-        return catalog
+    # Каталог — десятки номеров: фильтруем в памяти, одинаково для любого репозитория
+    records = await get_repository().list_room_types()
+    # Фильтрация по удобствам: побитовое И по маскам из индекса
+    if amenities:
+        index = await get_amenity_index()
+        required = index.mask_for(amenities)
+        if required is None:
+            return []
+        allowed = set(index.matching(required))
+        records = [r for r in records if r.id in allowed]
+    # Фильтрация по size (номера без площади не проходят, как и в SQL)
+    if size_from is not None:
+        records = [r for r in records if r.size is not None and r.size >= size_from]
+    if size_to is not None:
+        records = [r for r in records if r.size is not None and r.size <= size_to]
+    # Фильтрация по категории
+    if category:
+        records = [r for r in records if r.category == category]
+    # Фильтрация по adult_bed
+    if adult_bed is not None:
+        records = [r for r in records if r.adult_bed == adult_bed]
+    catalog = []
+    for record in records:
+        # Фильтрация по цене (position)
+        price = 2700  # по умолчанию
+        if price_from is not None and price < price_from:
+            continue
+        if price_to is not None and price > price_to:
+            continue
+        catalog.append(_catalog_item(record))
+    # Сортировка: записи уже упорядочены по position
+    if sort_by == "price":
+        catalog.sort(key=lambda x: x.price)
+    elif sort_by == "size":
+        catalog.sort(key=lambda x: (x.size or 0))
+    await _attach_image_variants(catalog)
+    return catalog
+
+async def get_catalog_room_types_with_facets(**filters) -> CatalogRoomTypesWithFacets:
+    """Результат каталога и количество номеров с каждым удобством среди него (по маскам из индекса)"""
+    catalog = await get_catalog_room_types_filtered(**filters)
+    index = await get_amenity_index()
+    return CatalogRoomTypesWithFacets(items=catalog, facets=index.facets(rt.id for rt in catalog))
 
 async def get_room_type_info(room_id: str) -> Optional[RoomTypeInfo]:
-    async with async_session() as session:
-        # Получаем RoomType
-        room_type = await session.get(RoomType, room_id)
-        if not room_type:
-            return None
-        # Все изображения
-        images_query = select(RoomTypeImage.url).where(
-            RoomTypeImage.room_type_id == room_id
-        ).order_by(RoomTypeImage.position)
-        images_result = await session.execute(images_query)
-        images = [row[0] for row in images_result.all()]
-        # Удобства
-        amenities_query = select(Amenity.code).where(
-            Amenity.room_type_id == room_id
-        )
-        amenities_result = await session.execute(amenities_query)
-        amenities = [row[0] for row in amenities_result.all()]
-        # Вместимость
-        occ_query = select(Occupancy.adult_bed).where(
-            Occupancy.room_type_id == room_id
-        )
-        occ_result = await session.execute(occ_query)
-        adult_bed = occ_result.scalar()
-        return RoomTypeInfo(
-            id=room_type.id,
-            name=room_type.name,
-            description=room_type.description,
+    # Кешируется и объединяется get_room_type_infos — второй записи в кеше не нужно
+    batch = await get_room_type_infos([room_id])
+    return batch.items[0] if batch.items else None
+
+@catalog_calls
+async def get_room_type_infos(room_ids: List[str]) -> RoomTypeInfoBatch:
+    """
+    Подробная информация сразу о нескольких типах номеров: одна выборка из
+    репозитория и один запрос вариантов изображений на весь список.
+    Найденные возвращаются в порядке room_ids, отсутствующие id — в missing.
+    """
+    room_ids = list(dict.fromkeys(room_ids))
+    if not room_ids:
+        return RoomTypeInfoBatch()
+    repository = get_repository()
+    records = {record.id: record for record in await repository.list_room_types(room_ids)}
+    variants = await repository.get_image_variants(url for record in records.values() for url in record.images)
+
+    infos, missing = [], []
+    for room_id in room_ids:
+        record = records.get(room_id)
+        if record is None:
+            missing.append(room_id)
+            continue
+        infos.append(RoomTypeInfo(
+            id=record.id,
+            name=record.name,
+            description=record.description,
             price=2700,
-            amenities=amenities,
-            images=images,
-            size=room_type.size_value,
-            category=room_type.category_name,
-            adult_bed=adult_bed
-        )
+            amenities=record.amenities,
+            images=record.images,
+            image_variants=[variants.get(url, {}) for url in record.images],
+            size=record.size,
+            category=record.category,
+            adult_bed=record.adult_bed
+        ))
+    return RoomTypeInfoBatch(items=infos, missing=missing)
 
+@catalog_calls
 async def get_similar_room_types(room_id: str, limit: int = 10) -> List[MainRoomType]:
-    async with async_session() as session:
-        # Получаем исходный объект
-        room_type = await session.get(RoomType, room_id)
-        if not room_type:
-            return []
-        occ_query = select(Occupancy.adult_bed).where(Occupancy.room_type_id == room_id)
-        occ_result = await session.execute(occ_query)
-        base_adult_bed = occ_result.scalar() or 0
-        base_size = room_type.size_value or 0
-        base_price = room_type.position or 0
-        # Получаем все остальные объекты
-        query = select(RoomType, Occupancy).outerjoin(
-            Occupancy, RoomType.id == Occupancy.room_type_id
-        ).where(RoomType.id != room_id)
-        result = await session.execute(query)
-        candidates = []
-        for rtype, occ in result:
-            adult_bed = occ.adult_bed if occ else 0
-            if adult_bed < base_adult_bed:
-                continue  # только >= по местам
-            size = rtype.size_value or 0
-            price = rtype.position or 0
-            # Считаем разницу для сортировки
-            diff_adult_bed = adult_bed - base_adult_bed
-            diff_size = abs(size - base_size)
-            diff_price = abs((price or 0) - (base_price or 0))
-            # Получаем первое изображение
-            image_query = select(RoomTypeImage.url).where(
-                RoomTypeImage.room_type_id == rtype.id
-            ).order_by(RoomTypeImage.position).limit(1)
-            image_result = await session.execute(image_query)
-            first_image = image_result.scalar()
-            candidates.append({
-                "obj": MainRoomType(
-                    id=rtype.id,
-                    name=rtype.name,
-                    description=rtype.description,
-                    price=price,
-                    adult_bed=adult_bed,
-                    image=first_image
-                ),
-                "diff_adult_bed": diff_adult_bed,
-                "diff_size": diff_size,
-                "diff_price": diff_price
-            })
-        # Сортировка: сначала по diff_adult_bed, потом по diff_size, потом по diff_price
-        candidates.sort(key=lambda x: (x["diff_adult_bed"], x["diff_size"], x["diff_price"]))
-        return [c["obj"] for c in candidates[:limit]]
+    records = await get_repository().list_room_types()
+    # Исходный объект
+    base = next((record for record in records if record.id == room_id), None)
+    if base is None:
+        return []
+    base_adult_bed = base.adult_bed or 0
+    base_size = base.size or 0
+    base_price = base.position or 0
+    candidates = []
+    for record in records:
+        if record.id == room_id:
+            continue
+        adult_bed = record.adult_bed or 0
+        if adult_bed < base_adult_bed:
+            continue  # только >= по местам
+        size = record.size or 0
+        price = record.position or 0
+        candidates.append({
+            "obj": MainRoomType(
+                id=record.id,
+                name=record.name,
+                description=record.description,
+                price=price,
+                adult_bed=adult_bed,
+                image=_first_image(record)
+            ),
+            # Разница для сортировки
+            "diff_adult_bed": adult_bed - base_adult_bed,
+            "diff_size": abs(size - base_size),
+            "diff_price": abs(price - base_price)
+        })
+    # Сортировка: сначала по diff_adult_bed, потом по diff_size, потом по diff_price
+    candidates.sort(key=lambda x: (x["diff_adult_bed"], x["diff_size"], x["diff_price"]))
+    similar = [c["obj"] for c in candidates[:limit]]
+    await _attach_image_variants(similar)
+    return similar
+
+
+async def _attach_image_variants(room_types: list):
+    """Заполняет image_variants по первому изображению (один запрос на весь список)"""
+    variants = await get_repository().get_image_variants(rt.image for rt in room_types)
+    for rt in room_types:
+        rt.image_variants = variants.get(rt.image, {})
+
+
+async def invalidate_feedback_cache():
+    """Сбрасывает кеш отзывов в этом процессе и оповещает остальные (ошибки Redis не ломают запись)"""
+    feedback_cache.clear()
+    if not get_repository().shared:
+        # Снимок в памяти принадлежит только этому процессу
+        return
+    client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+    try:
+        await client.publish(FEEDBACK_CHANNEL, "1")
+    except Exception as e:
+        logger.error(f"invalidate_feedback_cache: ошибка публикации в {FEEDBACK_CHANNEL}: {e}")
+    finally:
+        await client.close()
+
+
+async def _listen_feedback_changes():
+    while True:
+        client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+        pubsub = client.pubsub()
+        try:
+            await pubsub.subscribe(FEEDBACK_CHANNEL)
+            # Пока подписки не было, сообщения могли потеряться
+            feedback_cache.clear()
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    feedback_cache.clear()
+        except Exception as e:
+            logger.error(f"Ошибка подписки на {FEEDBACK_CHANNEL}: {e}")
+        finally:
+            await pubsub.close()
+            await client.close()
+        await asyncio.sleep(1)
+
+
+_feedback_listener: Optional[asyncio.Task] = None
+
+
+def start_feedback_cache_listener():
+    """Подписка на сброс кеша отзывов другими процессами (запускается в API и в процессе бота)"""
+    global _feedback_listener
+    if _feedback_listener is None or _feedback_listener.done():
+        _feedback_listener = asyncio.create_task(_listen_feedback_changes())
+
+
+async def stop_feedback_cache_listener():
+    global _feedback_listener
+    if _feedback_listener is not None:
+        _feedback_listener.cancel()
+        await asyncio.gather(_feedback_listener, return_exceptions=True)
+        _feedback_listener = None
 
 
 # CRUD операции для текстовых отзывов
 async def get_feedbacks() -> List[Feedback]:
     """Получить все текстовые отзывы"""
-    async with async_session() as session:
-        query = select(FeedbackModel).order_by(FeedbackModel.created_at.desc())
-        result = await session.execute(query)
-        feedbacks = result.scalars().all()
-        return [Feedback.model_validate(feedback) for feedback in feedbacks]
+    return await get_repository().list_feedbacks(FEEDBACK_KIND)
 
 
 async def create_feedback(feedback_data: FeedbackCreate) -> Feedback:
     """Создать новый текстовый отзыв"""
     try:
-        async with async_session() as session:
-            feedback = FeedbackModel(
-                text=feedback_data.text,
-                rate=feedback_data.rate
-            )
-            session.add(feedback)
-            await session.commit()
-            await session.refresh(feedback)
-            return Feedback.model_validate(feedback)
+        return (await create_feedbacks([feedback_data]))[0]
     except Exception as e:
         print(f"Ошибка при создании отзыва: {e}")
         raise
 
 
+async def create_feedbacks(items: List[FeedbackCreate]) -> List[Feedback]:
+    """
+    Создать несколько текстовых отзывов за одну запись в репозиторий
+    (в Postgres — один многострочный INSERT в одной транзакции).
+    Результат в порядке items.
+    """
+    if not items:
+        return []
+    created = await get_repository().create_feedbacks(items)
+    await invalidate_feedback_cache()
+    return created
+
+
 async def delete_feedback(feedback_id: int) -> bool:
     try:
-        async with async_session() as session:
-            result = await session.execute(
-                delete(FeedbackModel).where(FeedbackModel.id == feedback_id)
-            )
-            await session.commit()
-            affected = getattr(result, "rowcount", None)
-            return (affected or 0) > 0
+        deleted = await get_repository().delete_feedback(feedback_id)
     except Exception as e:
         print(f"Ошибка при удалении отзыва: {e}")
         return False
+    if deleted:
+        await invalidate_feedback_cache()
+    return deleted
 
 
 async def get_feedback_by_id(feedback_id: int) -> Optional[Feedback]:
     """Получить текстовый отзыв по ID"""
-    async with async_session() as session:
-        query = select(FeedbackModel).where(FeedbackModel.id == feedback_id)
-        result = await session.execute(query)
-        fb = result.scalar_one_or_none()
-        return Feedback.model_validate(fb) if fb else None
+    return await get_repository().get_feedback(feedback_id)
 
 
-# CRUD операции для видео отзывов
+# CRUD операции для видео отзывов (запись — только из бота)
 async def get_video_feedbacks() -> List[VideoFeedback]:
     """Получить все видео отзывы"""
-    async with async_session() as session:
-        query = select(VideoFeedbackModel).order_by(VideoFeedbackModel.created_at.desc())
-        result = await session.execute(query)
-        return result.scalars().all()
+    return await get_repository().list_feedbacks(VIDEO_FEEDBACK_KIND)
 
 
 async def create_video_feedback(feedback_data: VideoFeedbackCreate) -> VideoFeedback:
     """Создать новый видео отзыв"""
-    async with async_session() as session:
-        feedback = VideoFeedbackModel(
-            file=feedback_data.file,
-            rate=feedback_data.rate
-        )
-        session.add(feedback)
-        await session.commit()
-        await session.refresh(feedback)
-        return feedback
+    feedback = await get_repository().create_video_feedback(feedback_data)
+    await invalidate_feedback_cache()
+    return feedback
 
 
 async def delete_video_feedback(feedback_uuid: str) -> bool:
     """Удалить видео отзыв по UUID"""
-    async with async_session() as session:
-        result = await session.execute(delete(VideoFeedbackModel).where(VideoFeedbackModel.uuid == feedback_uuid))
-        await session.commit()
-        return result.rowcount > 0
+    deleted = await get_repository().delete_video_feedback(feedback_uuid)
+    if deleted:
+        await invalidate_feedback_cache()
+    return deleted
+
+
+async def set_video_feedback_file_id(feedback_uuid: str, file_id: str):
+    """Сохранить Telegram file_id видео отзыва для повторной отправки без загрузки из MinIO"""
+    await get_repository().update_video_feedback(feedback_uuid, {"telegram_file_id": file_id})
+    await invalidate_feedback_cache()
+
+
+async def set_video_feedback_metadata(
+    feedback_uuid: str,
+    duration: Optional[float] = None,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    bitrate: Optional[int] = None,
+    poster: Optional[str] = None,
+):
+    """Сохранить метаданные видео отзыва, извлечённые после загрузки"""
+    await get_repository().update_video_feedback(feedback_uuid, {
+        "duration": duration, "width": width, "height": height, "bitrate": bitrate, "poster": poster,
+    })
+    await invalidate_feedback_cache()
 
 
 async def get_video_feedback_by_uuid(feedback_uuid: str) -> Optional[VideoFeedback]:
     """Получить видео отзыв по UUID"""
-    async with async_session() as session:
-        query = select(VideoFeedbackModel).where(VideoFeedbackModel.uuid == feedback_uuid)
-        result = await session.execute(query)
-        return result.scalar_one_or_none()
+    return await get_repository().get_video_feedback(feedback_uuid)
+
+
+# Постраничная выборка (keyset по created_at/id, см. repository) и агрегаты рейтинга
+async def get_feedbacks_page(limit: int = 20, cursor: Optional[str] = None, reverse: bool = False) -> FeedbackPage:
+    """Получить страницу текстовых отзывов (от новых к старым)"""
+    cache_key = ("feedbacks", limit, cursor, reverse)
+    cached = feedback_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    items, next_cursor, prev_cursor = await get_repository().get_feedback_page(FEEDBACK_KIND, limit, cursor, reverse)
+    page = FeedbackPage(items=items, next_cursor=next_cursor, prev_cursor=prev_cursor)
+    feedback_cache.set(cache_key, page)
+    return page
+
+
+async def get_video_feedbacks_page(limit: int = 20, cursor: Optional[str] = None, reverse: bool = False) -> VideoFeedbackPage:
+    """Получить страницу видео отзывов (от новых к старым)"""
+    cache_key = ("video_feedbacks", limit, cursor, reverse)
+    cached = feedback_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    items, next_cursor, prev_cursor = await get_repository().get_feedback_page(
+        VIDEO_FEEDBACK_KIND, limit, cursor, reverse
+    )
+    for item in items:
+        item.url = object_storage.presigned_get_url(item.file)
+        if item.poster:
+            item.poster_url = object_storage.presigned_get_url(item.poster)
+    page = VideoFeedbackPage(items=items, next_cursor=next_cursor, prev_cursor=prev_cursor)
+    feedback_cache.set(cache_key, page)
+    return page
+
+
+async def get_rating_summary(kind: str) -> RatingSummary:
+    """Получить агрегаты рейтинга для текстовых ("text") или видео ("video") отзывов"""
+    cache_key = ("rating", kind)
+    cached = feedback_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    summary = await get_repository().get_rating(kind)
+    feedback_cache.set(cache_key, summary)
+    return summary
@@ -0,0 +1,390 @@
+import asyncio
+import functools
+import io
+import json
+import logging
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Optional
+
+from cache import TTLCache
+from config import settings
+from metrics import Summary, Counter, Gauge
+
+if TYPE_CHECKING:
+    from minio import Minio
+
+logger = logging.getLogger(__name__)
+
+# --- MinIO ---
+
+def create_minio_client() -> "Minio":
+    from minio import Minio
+
+    return Minio(
+        settings.MINIO_ENDPOINT,
+        access_key=settings.MINIO_ACCESS_KEY,
+        secret_key=settings.MINIO_SECRET_KEY,
+        secure=settings.MINIO_SECURE,
+        region=settings.MINIO_REGION,
+    )
+
+
+def create_public_minio_client() -> "Minio":
+    """
+    Клиент только для подписи URL: подпись включает хост, поэтому нужен публичный адрес.
+    Регион задан явно, чтобы подпись не требовала сетевых запросов.
+    """
+    from minio import Minio
+
+    return Minio(
+        settings.MINIO_PUBLIC_ENDPOINT,
+        access_key=settings.MINIO_ACCESS_KEY,
+        secret_key=settings.MINIO_SECRET_KEY,
+        secure=settings.MINIO_PUBLIC_SECURE,
+        region=settings.MINIO_REGION,
+    )
+
+STORAGE_LATENCY = Summary("storage_operation_seconds", "Длительность операций с объектным хранилищем")
+STORAGE_ERRORS = Counter("storage_operation_errors_total", "Ошибки операций с объектным хранилищем")
+STORAGE_IN_FLIGHT = Gauge("storage_operations_in_flight", "Выполняющиеся операции с объектным хранилищем")
+
+
+class PipeClosed(Exception):
+    """Читатель канала завершился раньше писателя (например, из-за ошибки загрузки)"""
+
+
+class ChunkPipe(io.RawIOBase):
+    """
+    Ограниченный по размеру канал между асинхронным источником чанков (event loop)
+    и блокирующим читателем в отдельном потоке (minio put_object).
+    В памяти одновременно находится не более max_chunks чанков.
+    """
+
+    _EOF = object()
+
+    def __init__(self, max_chunks: int):
+        super().__init__()
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_chunks)
+        self._buffer = bytearray()
+        self._eof = False
+        self._reader_closed = False
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            item = self._queue.get()
+            if item is self._EOF:
+                self._eof = True
+            elif isinstance(item, BaseException):
+                raise item
+            else:
+                self._buffer += item
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def close_reader(self):
+        """Вызывается потоком-читателем по завершении, чтобы писатель не завис на полной очереди"""
+        self._reader_closed = True
+
+    def _put_blocking(self, item):
+        while True:
+            if self._reader_closed:
+                raise PipeClosed()
+            try:
+                self._queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    async def put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            await asyncio.to_thread(self._put_blocking, item)
+
+    async def finish(self, error: Optional[BaseException] = None):
+        await self.put(error if error is not None else self._EOF)
+
+
+def _as_list(value) -> list:
+    return value if isinstance(value, list) else [value]
+
+
+def _allows_public_read(statement: dict, resource: str) -> bool:
+    """Правило политики бакета уже разрешает анонимный GetObject для resource"""
+    principal = statement.get("Principal")
+    if isinstance(principal, dict):
+        principal = principal.get("AWS")
+    return (
+        statement.get("Effect") == "Allow"
+        and "*" in _as_list(principal)
+        and any(action in ("s3:GetObject", "s3:*") for action in _as_list(statement.get("Action")))
+        and resource in _as_list(statement.get("Resource"))
+    )
+
+
+class ObjectStorage:
+    """
+    Асинхронная обёртка над MinIO: все блокирующие вызовы выполняются
+    в выделенном ограниченном пуле потоков, а не в event loop.
+    Количество одновременных операций ограничено, длительность каждой
+    операции пишется в метрику storage_operation_seconds.
+    Клиенты MinIO создаются при первом обращении, а не при импорте модуля.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], "Minio"],
+        bucket: str,
+        max_workers: int,
+        upload_concurrency: int,
+        public_client_factory: Optional[Callable[[], "Minio"]] = None,
+    ):
+        self._client_factory = client_factory
+        self._public_client_factory = public_client_factory
+        self._client = None
+        self._public_client = None
+        self.bucket = bucket
+        # URL переиспользуются, пока до истечения подписи остаётся больше 10%
+        self._presigned_cache = TTLCache(maxsize=4096, ttl=settings.STORAGE_PRESIGNED_URL_TTL * 0.9)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage")
+        self._semaphore = asyncio.Semaphore(max_workers)
+        self._upload_semaphore = asyncio.Semaphore(upload_concurrency)
+        self._public_prefixes: set = set()
+        self._policy_lock = asyncio.Lock()
+
+    @property
+    def client(self) -> "Minio":
+        if self._client is None:
+            self._client = self._client_factory()
+        return self._client
+
+    @property
+    def public_client(self) -> "Minio":
+        if self._public_client is None:
+            self._public_client = self._public_client_factory() if self._public_client_factory else self.client
+        return self._public_client
+
+    async def _run(self, operation: str, fn, *args, **kwargs):
+        async with self._semaphore:
+            STORAGE_IN_FLIGHT.inc(operation=operation)
+            start = time.perf_counter()
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+            except Exception:
+                STORAGE_ERRORS.inc(operation=operation)
+                raise
+            finally:
+                STORAGE_LATENCY.observe(time.perf_counter() - start, operation=operation)
+                STORAGE_IN_FLIGHT.dec(operation=operation)
+
+    async def ensure_bucket(self) -> bool:
+        """Создаёт бакет, если его нет. Возвращает True, если бакет был создан"""
+        def ensure() -> bool:
+            if self.client.bucket_exists(self.bucket):
+                return False
+            self.client.make_bucket(self.bucket)
+            return True
+
+        return await self._run("ensure_bucket", ensure)
+
+    async def set_public_read(self, prefix: str):
+        """
+        Открывает анонимное чтение объектов с префиксом prefix: разрешение добавляется
+        в текущую политику бакета, остальные её правила (других реплик, операторов) сохраняются.
+        """
+        if prefix in self._public_prefixes:
+            return
+        resource = f"arn:aws:s3:::{self.bucket}/{prefix}/*"
+
+        def update_policy():
+            from minio.error import S3Error
+
+            try:
+                policy = json.loads(self.client.get_bucket_policy(self.bucket))
+            except S3Error as e:
+                if e.code != "NoSuchBucketPolicy":
+                    raise
+                policy = {"Version": "2012-10-17", "Statement": []}
+            statements = policy.setdefault("Statement", [])
+            if any(_allows_public_read(statement, resource) for statement in statements):
+                return
+            statements.append({
+                "Effect": "Allow",
+                "Principal": {"AWS": ["*"]},
+                "Action": ["s3:GetObject"],
+                "Resource": [resource],
+            })
+            self.client.set_bucket_policy(self.bucket, json.dumps(policy))
+
+        async with self._policy_lock:
+            if prefix in self._public_prefixes:
+                return
+            await self._run("set_bucket_policy", update_policy)
+            # Только после успеха: при ошибке следующий вызов повторит попытку
+            self._public_prefixes.add(prefix)
+
+    async def get_bytes(self, object_name: str) -> bytes:
+        def read() -> bytes:
+            obj = self.client.get_object(self.bucket, object_name)
+            try:
+                return obj.read()
+            finally:
+                obj.close()
+                obj.release_conn()
+
+        return await self._run("get_object", read)
+
+    async def stat(self, object_name: str):
+        """Метаданные объекта (size, etag, content_type)"""
+        return await self._run("stat_object", self.client.stat_object, self.bucket, object_name)
+
+    async def stat_or_none(self, object_name: str):
+        """Метаданные объекта или None, если объекта нет"""
+        from minio.error import S3Error
+
+        try:
+            return await self.stat(object_name)
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchObject"):
+                return None
+            raise
+
+    async def exists(self, object_name: str) -> bool:
+        return await self.stat_or_none(object_name) is not None
+
+    async def list_objects(self, prefix: str) -> list:
+        """Все объекты с префиксом (object_name, size, last_modified)"""
+        return await self._run(
+            "list_objects", lambda: list(self.client.list_objects(self.bucket, prefix=prefix, recursive=True))
+        )
+
+    async def iter_range(
+        self,
+        object_name: str,
+        offset: int = 0,
+        length: int = 0,
+        chunk_size: Optional[int] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Потоково читает объект (или его диапазон) чанками, не загружая его целиком в память.
+        length=0 — до конца объекта. Чанки по STORAGE_STREAM_READ_SIZE: каждый чанк —
+        отдельный переход в пул потоков, поэтому мелкие чанки дороже крупных.
+        """
+        response = await self._run(
+            "get_object", self.client.get_object, self.bucket, object_name, offset=offset, length=length
+        )
+        try:
+            chunks = response.stream(chunk_size or settings.STORAGE_STREAM_READ_SIZE)
+            while True:
+                chunk = await self._run("read_chunk", next, chunks, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            response.close()
+            response.release_conn()
+
+    def presigned_get_url(self, object_name: str) -> str:
+        """Presigned GET URL для прямой загрузки объекта браузером (кешируется)"""
+        url = self._presigned_cache.get(object_name)
+        if url is None:
+            url = self.public_client.presigned_get_object(
+                self.bucket,
+                object_name,
+                expires=timedelta(seconds=settings.STORAGE_PRESIGNED_URL_TTL),
+            )
+            self._presigned_cache.set(object_name, url)
+        return url
+
+    async def put_bytes(self, object_name: str, data: bytes, content_type: str = "application/octet-stream"):
+        await self._run(
+            "put_object",
+            self.client.put_object,
+            self.bucket,
+            object_name,
+            io.BytesIO(data),
+            length=len(data),
+            content_type=content_type,
+        )
+
+    async def download_file(self, object_name: str, file_path: str):
+        """Скачивает объект в локальный файл (потоково, без загрузки в память)"""
+        await self._run("fget_object", self.client.fget_object, self.bucket, object_name, file_path)
+
+    async def upload_file(self, object_name: str, file_path: str, content_type: str = "application/octet-stream"):
+        await self._run(
+            "fput_object", self.client.fput_object, self.bucket, object_name, file_path, content_type=content_type
+        )
+
+    async def remove(self, object_name: str):
+        await self._run("remove_object", self.client.remove_object, self.bucket, object_name)
+
+    async def put_stream(
+        self,
+        object_name: str,
+        chunks: AsyncIterator[bytes],
+        content_type: str = "application/octet-stream",
+    ) -> int:
+        """
+        Потоково загружает данные в MinIO (multipart upload частями STORAGE_UPLOAD_PART_SIZE)
+        без буферизации всего файла в памяти. Возвращает количество загруженных байт.
+        """
+        async with self._upload_semaphore:
+            pipe = ChunkPipe(settings.STORAGE_UPLOAD_QUEUE_CHUNKS)
+
+            def upload():
+                try:
+                    self.client.put_object(
+                        self.bucket,
+                        object_name,
+                        pipe,
+                        length=-1,
+                        part_size=settings.STORAGE_UPLOAD_PART_SIZE,
+                        content_type=content_type,
+                    )
+                finally:
+                    pipe.close_reader()
+
+            upload_task = asyncio.create_task(self._run("put_object_stream", upload))
+            total = 0
+            try:
+                async for chunk in chunks:
+                    if upload_task.done():
+                        break
+                    total += len(chunk)
+                    await pipe.put(chunk)
+                else:
+                    await pipe.finish()
+            except PipeClosed:
+                # Ошибка загрузки в MinIO — пробрасываем её ниже из upload_task
+                pass
+            except BaseException as e:
+                if not upload_task.done():
+                    try:
+                        await pipe.finish(e if isinstance(e, Exception) else RuntimeError("Загрузка отменена"))
+                    except PipeClosed:
+                        pass
+                await asyncio.gather(upload_task, return_exceptions=True)
+                raise
+            await upload_task
+            logger.info("put_stream: '%s' загружен (%d байт)", object_name, total)
+            return total
+
+
+object_storage = ObjectStorage(
+    create_minio_client,
+    settings.MINIO_BUCKET_NAME,
+    max_workers=settings.STORAGE_MAX_WORKERS,
+    upload_concurrency=settings.STORAGE_UPLOAD_CONCURRENCY,
+    public_client_factory=create_public_minio_client,
+)
@@ -1,29 +1,41 @@
 import asyncio
+import html
 import logging
-from minio import Minio
 from minio.error import S3Error
-from aiogram import Bot, Dispatcher, F
+from typing import Optional
+from aiogram import Bot, Dispatcher, F, Router
 from aiogram.enums import ParseMode
+from aiogram.fsm.storage.base import BaseStorage
 from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import RedisStorage
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton, BufferedInputFile
+from aiogram.types import (
+    Message,
+    CallbackQuery,
+    InlineKeyboardMarkup,
+    InlineKeyboardButton,
+    BufferedInputFile,
+    InputMediaVideo,
+)
 from aiogram.filters import Command, StateFilter
-from config import Settings
+from config import settings
 from service import (
-    get_feedbacks,
+    get_feedbacks_page,
     create_feedback,
     delete_feedback,
-    get_video_feedbacks,
+    get_video_feedbacks_page,
     create_video_feedback,
     delete_video_feedback,
     get_video_feedback_by_uuid,
+    set_video_feedback_file_id,
 )
 from schemas import FeedbackCreate, VideoFeedbackCreate
-import io
+from storage import object_storage
+from media import schedule_video_metadata_extraction
+from cache import TTLCache
 import uuid as uuid_lib
 
-settings = Settings()
 logger = logging.getLogger(__name__)
 
 # --- FSM ---
@@ -35,17 +47,32 @@ class FeedbackStates(StatesGroup):
 class VideoStates(StatesGroup):
     waiting_for_file = State()
 
-# --- MinIO ---
-minio_client = Minio(
-    settings.MINIO_ENDPOINT,
-    access_key=settings.MINIO_ACCESS_KEY,
-    secret_key=settings.MINIO_SECRET_KEY,
-    secure=settings.MINIO_SECURE,
-)
-
 # --- Bot/Dispatcher ---
-bot = Bot(token=settings.TELEGRAM_BOT_TOKEN, parse_mode=ParseMode.HTML)
-dp = Dispatcher(storage=MemoryStorage())
+
+def create_fsm_storage() -> BaseStorage:
+    """Состояние диалогов в Redis переживает рестарт и общее для всех реплик бота"""
+    if settings.TELEGRAM_FSM_STORAGE == "redis":
+        return RedisStorage.from_url(settings.REDIS_URL)
+    return MemoryStorage()
+
+# Обработчики регистрируются на router; Bot и Dispatcher (с подключением к Redis)
+# создаются при первом обращении, а не при импорте модуля
+router = Router()
+_bot: Optional[Bot] = None
+_dp: Optional[Dispatcher] = None
+
+def get_bot() -> Bot:
+    global _bot
+    if _bot is None:
+        _bot = Bot(token=settings.TELEGRAM_BOT_TOKEN, parse_mode=ParseMode.HTML)
+    return _bot
+
+def get_dispatcher() -> Dispatcher:
+    global _dp
+    if _dp is None:
+        _dp = Dispatcher(storage=create_fsm_storage())
+        _dp.include_router(router)
+    return _dp
 
 # --- Helpers ---
 
@@ -54,8 +81,7 @@ def is_admin(user_id: int) -> bool:
 
 async def init_minio():
     try:
-        if not minio_client.bucket_exists(settings.MINIO_BUCKET_NAME):
-            minio_client.make_bucket(settings.MINIO_BUCKET_NAME)
+        if await object_storage.ensure_bucket():
             logger.info("MinIO bucket '%s' создан", settings.MINIO_BUCKET_NAME)
         else:
             logger.info("MinIO bucket '%s' уже существует", settings.MINIO_BUCKET_NAME)
@@ -88,7 +114,7 @@ def get_rate_keyboard() -> InlineKeyboardMarkup:
         ],
     ])
 
-def get_delete_feedbacks_keyboard(feedbacks) -> InlineKeyboardMarkup:
+def get_delete_feedbacks_keyboard(feedbacks, nav_row=None) -> InlineKeyboardMarkup:
     buttons = []
     for i in range(0, len(feedbacks), 3):
         row = []
@@ -103,37 +129,170 @@ def get_delete_feedbacks_keyboard(feedbacks) -> InlineKeyboardMarkup:
                 )
         if row:
             buttons.append(row)
+    if nav_row:
+        buttons.append(nav_row)
     buttons.append([InlineKeyboardButton(text="🔙 Назад", callback_data="text_reviews")])
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
-async def send_long_text(message_or_callback, text: str, **kwargs):
+def get_delete_videos_keyboard(videos, nav_row=None) -> InlineKeyboardMarkup:
+    buttons = [
+        [InlineKeyboardButton(text=v.uuid, callback_data=f"delete_video_{v.uuid}") for v in videos[i:i+2]]
+        for i in range(0, len(videos), 2)
+    ]
+    if nav_row:
+        buttons.append(nav_row)
+    buttons.append([InlineKeyboardButton(text="🔙 Назад", callback_data="video_reviews")])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+# --- Постраничные списки ---
+
+# Размер страницы (для видео — не больше media group)
+PAGE_SIZE = 10
+# Длина текста отзыва на странице просмотра (страница должна влезть в одно сообщение)
+PAGE_ITEM_TEXT_LIMIT = 350
+# Отрисованные страницы кешируются на каждого админа ненадолго
+page_cache = TTLCache(maxsize=512, ttl=15)
+
+def page_callback(mode: str, category: str, direction: str, cursor: str) -> str:
+    """callback_data вида pg:<v|d>:<t|v>:<n|p>:<cursor> (укладывается в лимит 64 байта)"""
+    return f"pg:{mode}:{category[0]}:{direction}:{cursor}"
+
+def get_page_nav_row(mode: str, category: str, page) -> list:
+    row = []
+    if page.prev_cursor:
+        row.append(InlineKeyboardButton(text="⬅️ Новее", callback_data=page_callback(mode, category, "p", page.prev_cursor)))
+    if page.next_cursor:
+        row.append(InlineKeyboardButton(text="Старее ➡️", callback_data=page_callback(mode, category, "n", page.next_cursor)))
+    return row
+
+def with_nav_row(markup: InlineKeyboardMarkup, nav_row: list) -> InlineKeyboardMarkup:
+    if not nav_row:
+        return markup
+    return InlineKeyboardMarkup(inline_keyboard=[nav_row, *markup.inline_keyboard])
+
+def render_page(mode: str, category: str, page):
+    """Возвращает (текст, клавиатура) для страницы просмотра ("v") или удаления ("d")"""
+    nav_row = get_page_nav_row(mode, category, page)
+    if mode == "d":
+        if category == "video":
+            text = "📹 <b>Удаление видео-отзыва</b>\n\nВыберите видео (по UUID), которое хотите удалить:"
+            return text, get_delete_videos_keyboard(page.items, nav_row)
+        text = "⭐ <b>Удаление отзыва</b>\n\nВыберите отзыв, который хотите удалить:"
+        return text, get_delete_feedbacks_keyboard(page.items, nav_row)
+
+    if category == "video":
+        text = "📹 <b>Видео-отзывы</b>\n\nОтправляю видео этой страницы..."
+    else:
+        lines = []
+        for fb in page.items:
+            body = fb.text if len(fb.text) <= PAGE_ITEM_TEXT_LIMIT else fb.text[:PAGE_ITEM_TEXT_LIMIT] + "…"
+            lines.append(f"{fb.id}) {html.escape(body)}")
+        text = "⭐ <b>Просмотр отзывов</b>\n\n" + "\n".join(lines)
+    return text, with_nav_row(get_actions_keyboard(category), nav_row)
+
+async def show_page(callback: CallbackQuery, mode: str, category: str, cursor=None, reverse: bool = False):
+    """Показывает страницу отзывов: keyset-запрос с LIMIT вместо выборки всей таблицы"""
+    cache_key = (callback.from_user.id, mode, category, cursor, reverse)
+    rendered = page_cache.get(cache_key)
+    if rendered is None:
+        if category == "video":
+            page = await get_video_feedbacks_page(limit=PAGE_SIZE, cursor=cursor, reverse=reverse)
+        else:
+            page = await get_feedbacks_page(limit=PAGE_SIZE, cursor=cursor, reverse=reverse)
+        rendered = (*render_page(mode, category, page), page.items) if page.items else None
+        if rendered is not None:
+            page_cache.set(cache_key, rendered)
+
+    if rendered is None:
+        empty = {
+            ("v", "video"): "📹 <b>Просмотр видео-отзывов</b>\n\nВидео-отзывов пока нет.",
+            ("v", "text"): "⭐ <b>Просмотр отзывов</b>\n\nОтзывов пока нет.",
+            ("d", "video"): "📹 <b>Удаление видео-отзыва</b>\n\nВидео-отзывов для удаления нет.",
+            ("d", "text"): "⭐ <b>Удаление отзыва</b>\n\nОтзывов для удаления нет.",
+        }[(mode, category)]
+        await callback.message.edit_text(empty, reply_markup=get_actions_keyboard(category))
+        return
+
+    text, markup, items = rendered
+    if mode == "v" and category == "video":
+        # Навигация отправляется отдельным сообщением после видео, чтобы оставаться внизу
+        await send_video_feedbacks(callback.message, items)
+        await callback.message.answer(text.replace("Отправляю видео этой страницы...", "Выберите действие:"), reply_markup=markup)
+        return
+    try:
+        await callback.message.edit_text(text, reply_markup=markup)
+    except Exception:
+        await callback.message.answer(text, reply_markup=markup)
+
+# Максимальный размер media group в Telegram
+MEDIA_GROUP_SIZE = 10
+
+async def fetch_video_bytes(object_name: str, semaphore: asyncio.Semaphore) -> bytes:
+    """Загружает видео из MinIO, ограничивая параллелизм семафором"""
+    async with semaphore:
+        return await object_storage.get_bytes(object_name)
+
+async def prefetch_videos(videos, semaphore: asyncio.Semaphore) -> dict:
+    """Параллельно загружает из MinIO видео без сохранённого file_id: {uuid: bytes | Exception}"""
+    uncached = [v for v in videos if not v.telegram_file_id]
+    results = await asyncio.gather(
+        *(fetch_video_bytes(v.file, semaphore) for v in uncached),
+        return_exceptions=True,
+    )
+    return {v.uuid: data for v, data in zip(uncached, results)}
+
+async def send_video_feedbacks(message: Message, videos):
     """
-    Безопасная отправка/редактирование длинного текста (разбивка по 4096).
-    message_or_callback: Message или CallbackQuery
+    Отправляет видео-отзывы группами до 10 штук.
+    Видео с сохранённым file_id отправляются без обращения к MinIO,
+    остальные загружаются заранее (следующая группа качается, пока отправляется текущая),
+    а полученный после отправки file_id сохраняется в БД.
     """
-    MAX = 4096
-    chunks = [text[i:i+MAX] for i in range(0, len(text), MAX)] or [""]
-    # Если это ответ на callback и можно редактировать — редактируем первый кусок,
-    # остальное досылаем как новые сообщения
-    if isinstance(message_or_callback, CallbackQuery):
-        cb = message_or_callback
+    semaphore = asyncio.Semaphore(settings.TELEGRAM_VIDEO_PREFETCH_CONCURRENCY)
+    groups = [videos[i:i + MEDIA_GROUP_SIZE] for i in range(0, len(videos), MEDIA_GROUP_SIZE)]
+    next_prefetch = asyncio.create_task(prefetch_videos(groups[0], semaphore))
+
+    for index, group in enumerate(groups):
+        payloads = await next_prefetch
+        if index + 1 < len(groups):
+            next_prefetch = asyncio.create_task(prefetch_videos(groups[index + 1], semaphore))
+
+        media, sendable = [], []
+        for v in group:
+            if v.telegram_file_id:
+                source = v.telegram_file_id
+            else:
+                data = payloads.get(v.uuid)
+                if isinstance(data, Exception) or data is None:
+                    logger.error("Ошибка загрузки видео %s из MinIO: %s", v.uuid, data)
+                    await message.answer(f"{v.uuid}: не удалось отправить видео")
+                    continue
+                source = BufferedInputFile(data, filename=f"{v.uuid}.mp4")
+            media.append(InputMediaVideo(media=source, caption=v.uuid))
+            sendable.append(v)
+        if not media:
+            continue
+
         try:
-            await cb.message.edit_text(chunks[0], **kwargs)
-        except Exception:
-            await cb.message.answer(chunks[0], **kwargs)
-        for chunk in chunks[1:]:
-            await cb.message.answer(chunk)
-    else:
-        msg = message_or_callback
-        for i, chunk in enumerate(chunks):
-            if i == 0:
-                await msg.answer(chunk, **kwargs)
+            if len(media) == 1:
+                sent = [await message.answer_video(video=media[0].media, caption=sendable[0].uuid)]
             else:
-                await msg.answer(chunk)
+                sent = await message.answer_media_group(media=media)
+        except Exception as e:
+            logger.exception("Ошибка отправки видео: %s", e)
+            for v in sendable:
+                await message.answer(f"{v.uuid}: не удалось отправить видео")
+            continue
+
+        for v, msg in zip(sendable, sent):
+            if not v.telegram_file_id and msg.video:
+                await set_video_feedback_file_id(v.uuid, msg.video.file_id)
+                # Обновляем и объект из кеша страниц, чтобы повторный просмотр не загружал видео
+                v.telegram_file_id = msg.video.file_id
 
 # --- Handlers ---
 
-@dp.message(Command("start"))
+@router.message(Command("start"))
 async def start_handler(message: Message):
     if not is_admin(message.from_user.id):
         await message.answer("❌ У вас нет доступа к этому боту.")
@@ -142,7 +301,7 @@ async def start_handler(message: Message):
     welcome = "👋 Добро пожаловать в панель администратора!\n\nВыберите нужный раздел:"
     await message.answer(welcome, reply_markup=get_main_menu_keyboard())
 
-@dp.callback_query(F.data == "main_menu")
+@router.callback_query(F.data == "main_menu")
 async def main_menu_handler(callback: CallbackQuery):
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ У вас нет доступа к этому боту.")
@@ -154,7 +313,7 @@ async def main_menu_handler(callback: CallbackQuery):
     finally:
         await callback.answer()
 
-@dp.callback_query(F.data == "video_reviews")
+@router.callback_query(F.data == "video_reviews")
 async def video_reviews_handler(callback: CallbackQuery):
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ У вас нет доступа к этому боту.")
@@ -164,7 +323,7 @@ async def video_reviews_handler(callback: CallbackQuery):
     await callback.message.edit_text(text, reply_markup=get_actions_keyboard("video"))
     await callback.answer()
 
-@dp.callback_query(F.data == "text_reviews")
+@router.callback_query(F.data == "text_reviews")
 async def text_reviews_handler(callback: CallbackQuery):
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ У вас нет доступа к этому боту.")
@@ -174,51 +333,28 @@ async def text_reviews_handler(callback: CallbackQuery):
     await callback.message.edit_text(text, reply_markup=get_actions_keyboard("text"))
     await callback.answer()
 
-@dp.callback_query(F.data.startswith("view_"))
+@router.callback_query(F.data.startswith("view_"))
 async def view_handler(callback: CallbackQuery):
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ У вас нет доступа к этому боту.")
         return
 
     category = callback.data.split("_", 1)[1]
-    if category == "video":
-        videos = await get_video_feedbacks()
-        if not videos:
-            text = "📹 <b>Просмотр видео-отзывов</b>\n\nВидео-отзывов пока нет."
-            await callback.message.edit_text(text, reply_markup=get_actions_keyboard(category))
-        else:
-            header = "📹 <b>Видео-отзывы</b>\n\nОтправляю доступные видео..."
-            try:
-                await callback.message.edit_text(header, reply_markup=get_actions_keyboard(category))
-            except Exception:
-                await callback.message.answer(header, reply_markup=get_actions_keyboard(category))
-            # Отправляем каждое видео отдельным сообщением (через загрузку из MinIO)
-            for v in videos:
-                try:
-                    obj = minio_client.get_object(settings.MINIO_BUCKET_NAME, v.file)
-                    data = obj.read()
-                    obj.close()
-                    obj.release_conn()
-                    tg_file = BufferedInputFile(data, filename=f"{v.uuid}.mp4")
-                    await callback.message.answer_video(video=tg_file, caption=v.uuid)
-                except Exception:
-                    await callback.message.answer(f"{v.uuid}: не удалось отправить видео")
-    else:
-        feedbacks = await get_feedbacks()
-        if not feedbacks:
-            text = "⭐ <b>Просмотр отзывов</b>\n\nОтзывов пока нет."
-            await callback.message.edit_text(text, reply_markup=get_actions_keyboard(category))
-        else:
-            header = "⭐ <b>Просмотр отзывов</b>\n\n"
-            body = "\n".join(f"{fb.id}) {fb.text}" for fb in feedbacks)
-            await send_long_text(
-                callback,
-                header + body,
-                reply_markup=get_actions_keyboard(category),
-            )
+    await show_page(callback, "v", category)
     await callback.answer()
 
-@dp.callback_query(F.data.startswith("add_"))
+@router.callback_query(F.data.startswith("pg:"))
+async def page_handler(callback: CallbackQuery):
+    if not is_admin(callback.from_user.id):
+        await callback.answer("❌ У вас нет доступа к этому боту.")
+        return
+
+    _, mode, category, direction, cursor = callback.data.split(":", 4)
+    category = "video" if category == "v" else "text"
+    await show_page(callback, mode, category, cursor or None, reverse=direction == "p")
+    await callback.answer()
+
+@router.callback_query(F.data.startswith("add_"))
 async def add_handler(callback: CallbackQuery, state: FSMContext):
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ У вас нет доступа к этому боту.")
@@ -235,50 +371,18 @@ async def add_handler(callback: CallbackQuery, state: FSMContext):
         await state.set_state(FeedbackStates.waiting_for_text)
     await callback.answer()
 
-@dp.callback_query(F.data.in_({"delete_text", "delete_video"}))
+@router.callback_query(F.data.in_({"delete_text", "delete_video"}))
 async def delete_handler(callback: CallbackQuery):
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ У вас нет доступа к этому боту.")
         return
 
     category = callback.data.split("_", 1)[1]  # "text" | "video"
-    if category == "video":
-        videos = await get_video_feedbacks()
-        if not videos:
-            text = "📹 <b>Удаление видео-отзыва</b>\n\nВидео-отзывов для удаления нет."
-            await callback.message.edit_text(text, reply_markup=get_actions_keyboard(category))
-        else:
-            text = "📹 <b>Удаление видео-отзыва</b>\n\nВыберите видео (по UUID), которое хотите удалить:"
-            kb = InlineKeyboardMarkup(
-                inline_keyboard=[
-                    [
-                        InlineKeyboardButton(text=v.uuid, callback_data=f"delete_video_{v.uuid}")
-                        for v in videos[i:i+2]
-                    ]
-                    for i in range(0, len(videos), 2)
-                ]
-            )
-            kb.inline_keyboard.append([InlineKeyboardButton(text="🔙 Назад", callback_data="video_reviews")])
-            try:
-                await callback.message.edit_text(text, reply_markup=kb)
-            except Exception:
-                await callback.message.answer(text, reply_markup=kb)
-    else:
-        feedbacks = await get_feedbacks()
-        if not feedbacks:
-            text = "⭐ <b>Удаление отзыва</b>\n\nОтзывов для удаления нет."
-            await callback.message.edit_text(text, reply_markup=get_actions_keyboard(category))
-        else:
-            text = "⭐ <b>Удаление отзыва</b>\n\nВыберите отзыв, который хотите удалить:"
-            try:
-                await callback.message.edit_text(text, reply_markup=get_delete_feedbacks_keyboard(feedbacks))
-            except Exception:
-                await callback.message.answer(text, reply_markup=get_delete_feedbacks_keyboard(feedbacks))
-
+    await show_page(callback, "d", category)
     await callback.answer()
 
 # --- ВВОД ТЕКСТА ОТЗЫВА (stateful) ---
-@dp.message(StateFilter(FeedbackStates.waiting_for_text))
+@router.message(StateFilter(FeedbackStates.waiting_for_text))
 async def process_feedback_text(message: Message, state: FSMContext):
     if not is_admin(message.from_user.id):
         await message.answer("❌ У вас нет доступа к этому боту.")
@@ -290,30 +394,30 @@ async def process_feedback_text(message: Message, state: FSMContext):
     await state.set_state(FeedbackStates.waiting_for_rate)
 
 # --- ВВОД ВИДЕО (stateful) ---
-@dp.message(StateFilter(VideoStates.waiting_for_file), F.video)
+@router.message(StateFilter(VideoStates.waiting_for_file), F.video)
 async def process_video_upload(message: Message, state: FSMContext):
     if not is_admin(message.from_user.id):
         await message.answer("❌ У вас нет доступа к этому боту.")
         return
     try:
-        # Скачиваем файл из Telegram в память
-        buf = io.BytesIO()
-        await message.bot.download(message.video, destination=buf)
-        buf.seek(0)
+        # Потоково перекладываем файл из Telegram в MinIO (без буферизации целиком в памяти)
+        tg_file = await message.bot.get_file(message.video.file_id)
+        url = message.bot.session.api.file_url(message.bot.token, tg_file.file_path)
+        chunks = message.bot.session.stream_content(url, chunk_size=settings.STORAGE_STREAM_CHUNK_SIZE)
 
-        # Генерируем имя и кладём в MinIO
         uid = str(uuid_lib.uuid4())
         object_name = f"videos/{uid}.mp4"
-        minio_client.put_object(
-            settings.MINIO_BUCKET_NAME,
-            object_name,
-            buf,
-            length=len(buf.getbuffer()),
-            content_type="video/mp4",
-        )
+        await object_storage.put_stream(object_name, chunks, content_type="video/mp4")
 
         # Пишем запись в БД (по умолчанию rate=0)
-        await create_video_feedback(VideoFeedbackCreate(file=object_name, rate=0))
+        video_feedback = await create_video_feedback(VideoFeedbackCreate(
+            file=object_name,
+            rate=0,
+            telegram_file_id=message.video.file_id,
+        ))
+        page_cache.clear()
+        # Длительность, размеры, битрейт и постер извлекаются в фоне
+        schedule_video_metadata_extraction(video_feedback.uuid, object_name)
 
         await state.clear()
         await message.answer("✅ Видео-отзыв сохранён!", reply_markup=get_actions_keyboard("video"))
@@ -322,7 +426,7 @@ async def process_video_upload(message: Message, state: FSMContext):
         await state.clear()
         await message.answer("❌ Не удалось сохранить видео. Попробуйте ещё раз.", reply_markup=get_actions_keyboard("video"))
 
-@dp.callback_query(StateFilter(FeedbackStates.waiting_for_rate), F.data.startswith("rate_"))
+@router.callback_query(StateFilter(FeedbackStates.waiting_for_rate), F.data.startswith("rate_"))
 async def process_feedback_rate(callback: CallbackQuery, state: FSMContext):
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ У вас нет доступа к этому боту.")
@@ -333,6 +437,7 @@ async def process_feedback_rate(callback: CallbackQuery, state: FSMContext):
         data = await state.get_data()
         feedback_data = FeedbackCreate(text=data["text"], rate=rate)
         await create_feedback(feedback_data)
+        page_cache.clear()
         await state.clear()
 
         text = "⭐ <b>Отзывы</b>\n\n✅ Отзыв успешно добавлен!\n\nВыберите действие:"
@@ -350,7 +455,7 @@ async def process_feedback_rate(callback: CallbackQuery, state: FSMContext):
             await callback.message.answer(text, reply_markup=get_actions_keyboard("text"))
     await callback.answer()
 
-@dp.callback_query(F.data.startswith("delete_feedback_"))
+@router.callback_query(F.data.startswith("delete_feedback_"))
 async def delete_feedback_handler(callback: CallbackQuery):
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ У вас нет доступа к этому боту.")
@@ -359,6 +464,7 @@ async def delete_feedback_handler(callback: CallbackQuery):
     try:
         feedback_id = int(callback.data.split("_")[2])
         success = await delete_feedback(feedback_id)
+        page_cache.clear()
 
         if success:
             text = "⭐ <b>Отзывы</b>\n\n✅ Отзыв успешно удалён!\n\nВыберите действие:"
@@ -380,7 +486,7 @@ async def delete_feedback_handler(callback: CallbackQuery):
 
     await callback.answer()
 
-@dp.callback_query(F.data.startswith("delete_video_"))
+@router.callback_query(F.data.startswith("delete_video_"))
 async def delete_video_handler(callback: CallbackQuery):
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ У вас нет доступа к этому боту.")
@@ -393,10 +499,13 @@ async def delete_video_handler(callback: CallbackQuery):
         else:
             # Удаляем из MinIO, затем из БД
             try:
-                minio_client.remove_object(settings.MINIO_BUCKET_NAME, video.file)
+                await object_storage.remove(video.file)
+                if video.poster:
+                    await object_storage.remove(video.poster)
             except Exception:
                 pass
             success = await delete_video_feedback(uuid_val)
+            page_cache.clear()
             text = (
                 "📹 <b>Видео-отзывы</b>\n\n✅ Видео успешно удалено!"
                 if success else
@@ -415,7 +524,7 @@ async def delete_video_handler(callback: CallbackQuery):
     await callback.answer()
 
 # --- Фолбэк ---
-@dp.message()
+@router.message()
 async def message_handler(message: Message):
     if not is_admin(message.from_user.id):
         await message.answer("❌ У вас нет доступа к этому боту.")
@@ -425,11 +534,15 @@ async def message_handler(message: Message):
 # --- Start/Task ---
 
 async def start_bot():
+    """Запуск бота в режиме polling (в отдельном процессе run_bot.py или встроенным в API)"""
     try:
         logger.info("Инициализация MinIO...")
         await init_minio()
         logger.info("Запуск Telegram бота...")
-        await dp.start_polling(bot)
+        # Если ранее был установлен webhook, polling без его удаления не получит обновления
+        bot = get_bot()
+        await bot.delete_webhook()
+        await get_dispatcher().start_polling(bot)
     except Exception as e:
         logger.error("Ошибка при запуске бота: %s", e)
 
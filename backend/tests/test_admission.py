@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from admission import ClientRateLimiter, Overloaded, PriorityLimiter, PRIORITY_HIGH, PRIORITY_LOW
+
+
+async def _start(limiter: PriorityLimiter, priority: int, timeout: float = 1.0) -> asyncio.Task:
+    task = asyncio.create_task(limiter.acquire(priority, timeout))
+    # Даём задаче встать в очередь
+    await asyncio.sleep(0)
+    return task
+
+
+async def test_acquire_within_limit_does_not_wait():
+    limiter = PriorityLimiter("test", limit=2, max_queue=1)
+
+    await limiter.acquire(PRIORITY_LOW, timeout=0)
+    await limiter.acquire(PRIORITY_LOW, timeout=0)
+
+    assert limiter._in_use == 2
+
+
+async def test_release_hands_slot_to_most_important_waiter():
+    limiter = PriorityLimiter("test", limit=1, max_queue=10)
+    await limiter.acquire(PRIORITY_LOW, timeout=0)
+    low_first = await _start(limiter, PRIORITY_LOW)
+    low_second = await _start(limiter, PRIORITY_LOW)
+    high = await _start(limiter, PRIORITY_HIGH)
+
+    limiter.release()
+    await asyncio.sleep(0.01)
+    assert high.done() and not low_first.done()
+
+    limiter.release()
+    await asyncio.sleep(0.01)
+    assert low_first.done() and not low_second.done()
+    assert limiter._in_use == 1
+
+    limiter.release()
+    await low_second
+
+
+async def test_full_queue_evicts_less_important_waiter():
+    limiter = PriorityLimiter("test", limit=1, max_queue=1)
+    await limiter.acquire(PRIORITY_LOW, timeout=0)
+    low = await _start(limiter, PRIORITY_LOW)
+    high = await _start(limiter, PRIORITY_HIGH)
+
+    with pytest.raises(Overloaded) as error:
+        await low
+    assert error.value.reason == "evicted"
+
+    limiter.release()
+    await high
+    assert limiter._waiters == []
+
+
+async def test_full_queue_rejects_equal_priority_immediately():
+    limiter = PriorityLimiter("test", limit=1, max_queue=1)
+    await limiter.acquire(PRIORITY_HIGH, timeout=0)
+    waiting = await _start(limiter, PRIORITY_HIGH)
+
+    with pytest.raises(Overloaded) as error:
+        await limiter.acquire(PRIORITY_HIGH, timeout=1)
+    assert error.value.reason == "queue_full"
+
+    limiter.release()
+    await waiting
+
+
+async def test_timeout_leaves_queue():
+    limiter = PriorityLimiter("test", limit=1, max_queue=10)
+    await limiter.acquire(PRIORITY_LOW, timeout=0)
+
+    with pytest.raises(Overloaded) as error:
+        await limiter.acquire(PRIORITY_LOW, timeout=0.01)
+    assert error.value.reason == "timeout"
+    assert limiter._waiters == []
+
+    # Освобождённый слот не уходит вышедшему по таймауту
+    limiter.release()
+    assert limiter._in_use == 0
+
+
+async def test_cancelled_waiter_passes_granted_slot_on():
+    limiter = PriorityLimiter("test", limit=1, max_queue=10)
+    await limiter.acquire(PRIORITY_LOW, timeout=0)
+    cancelled = await _start(limiter, PRIORITY_HIGH)
+    next_waiter = await _start(limiter, PRIORITY_LOW)
+
+    # Слот передан первому ожидающему, но его запрос отменили раньше, чем он проснулся
+    limiter.release()
+    cancelled.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+
+    await asyncio.wait_for(next_waiter, 1)
+    assert limiter._in_use == 1
+    limiter.release()
+    assert limiter._in_use == 0
+
+
+async def test_cancelled_waiter_leaves_queue():
+    limiter = PriorityLimiter("test", limit=1, max_queue=10)
+    await limiter.acquire(PRIORITY_LOW, timeout=0)
+    cancelled = await _start(limiter, PRIORITY_LOW)
+
+    cancelled.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+
+    assert limiter._waiters == []
+    limiter.release()
+    assert limiter._in_use == 0
+
+
+def test_rate_limiter_counts_each_client_separately(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("admission.time.monotonic", lambda: now[0])
+    limiter = ClientRateLimiter("test", limit=2, window=60)
+
+    assert limiter.hit("10.0.0.1") == 0
+    now[0] += 10
+    assert limiter.hit("10.0.0.1") == 0
+    assert limiter.hit("10.0.0.1") == 50
+    assert limiter.hit("10.0.0.2") == 0
+
+    # Первый запрос вышел из окна — разрешён ещё один
+    now[0] += 51
+    assert limiter.hit("10.0.0.1") == 0
+    assert limiter.hit("10.0.0.1") > 0
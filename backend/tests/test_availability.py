@@ -0,0 +1,98 @@
+import json
+from datetime import date
+from pathlib import Path
+
+import httpx
+import pytest
+
+import upstream
+from availability import build_availability_grid, fetch_availability_data
+from config import settings
+
+FIXTURE = Path(__file__).parent / "fixtures" / "availability.json"
+
+START = date(2026, 3, 1)
+DAYS = 5
+# (id, name, adult_bed, extra_bed) — как строки из БД в refresh_availability
+ROOMS = [
+    ("double", "Двухместный", 2, 0),
+    ("family", "Семейный", 2, 2),
+    ("suite", "Люкс", 1, None),
+]
+
+
+@pytest.fixture
+async def availability_api(monkeypatch):
+    """Локальная заглушка API доступности TravelLine: отдаёт fixtures/availability.json"""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json=json.loads(FIXTURE.read_text(encoding="utf-8")))
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(upstream, "_client", client)
+    yield requests
+    await client.aclose()
+
+
+@pytest.fixture
+async def grid(availability_api):
+    data = await fetch_availability_data("jwt", START, date(2026, 3, 5))
+    return build_availability_grid(START, DAYS, ROOMS, data)
+
+
+async def test_fetch_availability_data_request(availability_api):
+    await fetch_availability_data("jwt", START, date(2026, 3, 5))
+
+    request, = availability_api
+    assert str(request.url).startswith(
+        f"{settings.TRAVELINE_AVAILABILITY_API_BASE_URL}/v1/properties/{settings.PROPERTY_ID}/availability"
+    )
+    assert request.url.params["startDate"] == "2026-03-01"
+    assert request.url.params["endDate"] == "2026-03-05"
+    assert request.headers["Authorization"] == "Bearer jwt"
+
+
+async def test_build_grid(grid):
+    assert grid.room_ids == ["double", "family", "suite"]
+    assert grid.capacity.tolist() == [[2, 0], [2, 2], [1, 0]]
+    assert grid.free.tolist() == [
+        [2, 1, 0, 3, 3],
+        [1, 1, 1, 1, 1],
+        # Отрицательные, пустые, некорректные и вне горизонта значения не учитываются
+        [0, 0, 0, 0, 0],
+    ]
+
+
+async def test_search_skips_zero_free_days_inside_window(grid):
+    result = {rt.id: rt for rt in grid.search(START, date(2026, 3, 4), nights=2, guests=1)}
+
+    # У double 3 марта свободных нет: заезды 2 и 3 марта не подходят
+    assert result["double"].arrival_dates == [date(2026, 3, 1), date(2026, 3, 4)]
+    assert result["double"].free_units == 3
+    assert result["family"].arrival_dates == [date(2026, 3, 1), date(2026, 3, 2), date(2026, 3, 3), date(2026, 3, 4)]
+    assert result["family"].free_units == 1
+    assert "suite" not in result
+
+
+async def test_search_guests_use_adult_and_extra_beds(grid):
+    assert {rt.id for rt in grid.search(START, START, nights=1, guests=2)} == {"double", "family"}
+    # 3–4 гостя помещаются только с дополнительными местами
+    assert [rt.id for rt in grid.search(START, START, nights=1, guests=4)] == ["family"]
+    assert grid.search(START, START, nights=1, guests=5) == []
+
+
+async def test_search_nights_beyond_horizon(grid):
+    assert [rt.id for rt in grid.search(START, START, nights=DAYS, guests=1)] == ["family"]
+    assert grid.search(START, START, nights=DAYS + 1, guests=1) == []
+    # Заезд, после которого проживание выходит за горизонт кеша
+    assert grid.search(date(2026, 3, 4), date(2026, 3, 5), nights=3, guests=1) == []
+
+
+async def test_search_clamps_past_arrivals(grid):
+    result = grid.search(date(2026, 2, 20), date(2026, 3, 1), nights=1, guests=1)
+    assert {rt.id: rt.arrival_dates for rt in result} == {
+        "double": [date(2026, 3, 1)],
+        "family": [date(2026, 3, 1)],
+    }
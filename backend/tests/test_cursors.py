@@ -0,0 +1,17 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from repository import decode_cursor, encode_cursor
+
+
+def test_cursor_roundtrip():
+    created_at = datetime(2026, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, "42")
+    assert decode_cursor(encode_cursor(created_at, "a_b")) == (created_at, "a_b")
+
+
+@pytest.mark.parametrize("cursor", ["", "123", "123_", "abc_1", f"{10 ** 30}_1", f"-{10 ** 17}_1"])
+def test_decode_cursor_rejects_invalid(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
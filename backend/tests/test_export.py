@@ -0,0 +1,138 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+import pyarrow.parquet as pq
+import pytest
+from fastapi import HTTPException
+
+import admission
+import repository
+from export import EXPORT_ERROR_MARKER, export_room_types, start_export
+from repository import SnapshotRepository
+from schemas import CatalogSnapshot, RoomTypeRecord
+
+ROOMS = [
+    RoomTypeRecord(
+        id=f"room-{i}", name=f"Номер {i}", position=i, size=20 + i, adult_bed=2,
+        images=[f"https://img.example/{i}.jpg"], amenities=["wifi", "balcony"] if i % 2 else ["wifi"],
+        city_name="Казань", latitude=55.79, longitude=49.12,
+    )
+    for i in range(7)
+]
+
+
+class FailingRepository(SnapshotRepository):
+    """Первые fail_after порций читаются, затем соединение с БД обрывается"""
+
+    fail_after = 1
+
+    async def iter_room_types(self, batch_size):
+        sent = 0
+        async for batch in super().iter_room_types(batch_size):
+            if sent == self.fail_after:
+                raise ConnectionError("соединение с БД потеряно")
+            sent += 1
+            yield batch
+
+
+class UnavailableRepository(FailingRepository):
+    fail_after = 0
+
+
+@pytest.fixture
+def use_repository(monkeypatch):
+    def use(cls=SnapshotRepository):
+        snapshot = CatalogSnapshot(generated_at=datetime(2026, 3, 1, tzinfo=timezone.utc), room_types=ROOMS)
+        monkeypatch.setattr(repository, "_repository", cls(snapshot))
+
+    return use
+
+
+def _export_slots():
+    limiter = admission._route_limiter("export")
+    return limiter._in_use, admission.db_limiter._in_use
+
+
+async def _read(chunks) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+async def test_ndjson_and_csv(use_repository):
+    use_repository()
+
+    lines = (await _read(await start_export("ndjson", batch_size=3))).decode("utf-8").splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [rt.id for rt in ROOMS]
+
+    rows = list(csv.DictReader(io.StringIO((await _read(await start_export("csv", batch_size=3))).decode("utf-8"))))
+    assert [row["id"] for row in rows] == [rt.id for rt in ROOMS]
+    assert rows[1]["amenities"] == "wifi|balcony"
+
+
+async def test_parquet_row_groups(use_repository):
+    use_repository()
+
+    table = pq.read_table(io.BytesIO(await _read(await start_export("parquet", batch_size=3))))
+
+    assert table.column("id").to_pylist() == [rt.id for rt in ROOMS]
+    assert pq.ParquetFile(io.BytesIO(await _read(export_room_types("parquet", batch_size=3)))).num_row_groups == 3
+
+
+async def test_admission_slot_held_while_streaming(use_repository):
+    use_repository()
+    before = _export_slots()
+
+    chunks = await start_export("ndjson", batch_size=3)
+    assert _export_slots() == (before[0] + 1, before[1] + 1)
+    await _read(chunks)
+    assert _export_slots() == before
+
+    # Клиент ушёл посреди выгрузки
+    chunks = await start_export("csv", batch_size=3)
+    await anext(chunks)
+    await chunks.aclose()
+    assert _export_slots() == before
+
+
+async def test_export_rejected_when_overloaded(use_repository, monkeypatch):
+    use_repository()
+    monkeypatch.setattr(admission.settings, "ADMISSION_QUEUE_TIMEOUT", 0.01)
+    limiter = admission._route_limiter("export")
+    monkeypatch.setattr(limiter, "_in_use", limiter.limit)
+
+    with pytest.raises(HTTPException) as error:
+        await start_export("ndjson")
+
+    assert error.value.status_code == 503
+    assert "Retry-After" in error.value.headers
+
+
+@pytest.mark.parametrize("fmt, marker", [
+    ("ndjson", json.dumps({"error": EXPORT_ERROR_MARKER})),
+    ("csv", EXPORT_ERROR_MARKER),
+])
+async def test_failure_mid_stream_ends_with_marker(use_repository, caplog, fmt, marker):
+    use_repository(FailingRepository)
+    before = _export_slots()
+    received = []
+
+    with pytest.raises(ConnectionError):
+        async for chunk in await start_export(fmt, batch_size=3):
+            received.append(chunk)
+
+    lines = b"".join(received).decode("utf-8").splitlines()
+    assert lines[-1].replace(" ", "") == marker.replace(" ", "")
+    assert len(lines) == 3 + (fmt == "csv") + 1
+    assert "прервана" in caplog.text
+    assert _export_slots() == before
+
+
+async def test_failure_before_first_chunk_raises_before_response(use_repository):
+    use_repository(UnavailableRepository)
+    before = _export_slots()
+
+    # Ответ ещё не начат: без маркера, ошибку обработает FastAPI
+    with pytest.raises(ConnectionError):
+        await start_export("csv", batch_size=3)
+    assert _export_slots() == before
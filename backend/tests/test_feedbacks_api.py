@@ -0,0 +1,76 @@
+import itertools
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import router as router_module
+from ingest import BufferFull
+from repository import ReadOnlyRepositoryError
+from schemas import Feedback
+
+BODY = {"text": "Отличный номер", "rate": 5}
+
+# Лимит частоты общий на процесс: каждому тесту — свой адрес клиента
+_hosts = (f"10.0.0.{i}" for i in itertools.count(1))
+
+
+class FakeBuffer:
+    def __init__(self, error=None):
+        self.error = error
+
+    async def submit(self, data):
+        if self.error is not None:
+            raise self.error
+        now = datetime.now(timezone.utc)
+        return Feedback(id=1, text=data.text, rate=data.rate, created_at=now, updated_at=now)
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(router_module.router, prefix="/api")
+    return TestClient(app, client=(next(_hosts), 50000))
+
+
+def _use_buffer(monkeypatch, buffer):
+    monkeypatch.setattr(router_module, "get_feedback_buffer", lambda: buffer)
+
+
+def test_create_feedback(client, monkeypatch):
+    _use_buffer(monkeypatch, FakeBuffer())
+
+    response = client.post("/api/feedbacks", json=BODY)
+
+    assert response.status_code == 201
+    assert response.json()["text"] == BODY["text"]
+
+
+def test_create_feedback_read_only_replica(client, monkeypatch):
+    _use_buffer(monkeypatch, FakeBuffer(ReadOnlyRepositoryError("только чтение")))
+
+    response = client.post("/api/feedbacks", json=BODY)
+
+    assert response.status_code == 405
+    assert response.headers["Allow"] == "GET"
+
+
+@pytest.mark.parametrize("error", [BufferFull("буфер переполнен"), ConnectionError("БД недоступна")])
+def test_create_feedback_unavailable_sets_retry_after(client, monkeypatch, error):
+    _use_buffer(monkeypatch, FakeBuffer(error))
+
+    response = client.post("/api/feedbacks", json=BODY)
+
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+
+
+def test_create_feedback_rate_limited_per_client(client, monkeypatch):
+    _use_buffer(monkeypatch, FakeBuffer())
+    limit = router_module.settings.FEEDBACK_RATE_LIMIT
+
+    statuses = [client.post("/api/feedbacks", json=BODY).status_code for _ in range(limit + 1)]
+
+    assert statuses == [201] * limit + [429]
+    assert int(client.post("/api/feedbacks", json=BODY).headers["Retry-After"]) > 0
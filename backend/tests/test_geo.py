@@ -0,0 +1,41 @@
+from geo import GeoIndex, _lon_ranges
+from schemas import MainRoomType
+
+# Эгвекинот и Уэлен — восточнее 180° по долготе, то есть с отрицательной долготой
+POINTS = [
+    ("anadyr", 64.73, 177.51),
+    ("egvekinot", 66.32, -179.12),
+    ("uelen", 66.16, -169.81),
+    ("moscow", 55.75, 37.62),
+]
+
+
+def make_index(cell_deg: float = 0.05) -> GeoIndex:
+    docs = {room_id: MainRoomType(id=room_id, name=room_id) for room_id, _, _ in POINTS}
+    return GeoIndex(POINTS, docs, cell_deg)
+
+
+def test_lon_ranges_split_at_antimeridian():
+    assert _lon_ranges(10, 20) == [(10, 20)]
+    assert _lon_ranges(175, 185) == [(-180.0, -175), (175, 180.0)]
+    assert _lon_ranges(-185, -175) == [(175, 180.0), (-180.0, -175)]
+    assert _lon_ranges(-180, 180) == [(-180.0, 180.0)]
+
+
+def test_nearby_finds_rooms_across_antimeridian():
+    index = make_index()
+
+    from_west = index.nearby(65.0, 179.5, radius_km=200, limit=10)
+    from_east = index.nearby(66.0, -179.5, radius_km=200, limit=10)
+
+    assert [rt.id for rt in from_west] == ["anadyr", "egvekinot"]
+    assert [rt.id for rt in from_east] == ["egvekinot", "anadyr"]
+    assert from_west[1].distance_km == 159.814
+
+
+def test_nearby_large_radius_covers_all_longitudes():
+    index = make_index(cell_deg=10)
+
+    assert {rt.id for rt in index.nearby(66.0, 179.0, radius_km=20000, limit=10)} == {
+        "anadyr", "egvekinot", "uelen", "moscow",
+    }
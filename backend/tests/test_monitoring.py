@@ -0,0 +1,41 @@
+import asyncio
+import threading
+
+import pytest
+import urllib3
+
+import monitoring
+from monitoring import BLOCKING_CALLS
+
+
+@pytest.fixture
+def blocking_detector():
+    monitoring._install_blocking_io_detector(threading.get_ident())
+    yield
+    monitoring._blocking_detector["thread_id"] = None
+
+
+def test_detects_file_open_in_loop_thread(blocking_detector, tmp_path):
+    before = BLOCKING_CALLS.value(event="open")
+    (tmp_path / "data.bin").write_bytes(b"x")
+
+    assert BLOCKING_CALLS.value(event="open") > before
+
+
+def test_detects_urllib3_request_on_pooled_connection(blocking_detector):
+    before = BLOCKING_CALLS.value(event="urllib3.urlopen")
+    pool = urllib3.HTTPConnectionPool("127.0.0.1", 1, retries=False, timeout=0.1)
+    with pytest.raises(urllib3.exceptions.HTTPError):
+        pool.urlopen("GET", "/")
+
+    assert BLOCKING_CALLS.value(event="urllib3.urlopen") == before + 1
+
+
+async def test_ignores_io_in_worker_threads(blocking_detector, tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"x")
+    before = BLOCKING_CALLS.value(event="open")
+
+    await asyncio.to_thread(path.read_bytes)
+
+    assert BLOCKING_CALLS.value(event="open") == before
@@ -0,0 +1,210 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import repository
+import service
+from amenities import build_mask, encode_mask, reset_amenity_index
+from repository import (
+    FEEDBACK_KIND, VIDEO_FEEDBACK_KIND, ReadOnlyRepositoryError, SnapshotRepository,
+    encode_snapshot, load_snapshot_repository, reload_snapshot_repository,
+)
+from schemas import CatalogSnapshot, Feedback, FeedbackCreate, RoomTypeRecord, VideoFeedback, VideoFeedbackCreate
+from scheduler import apply_snapshot
+from search import get_search_index
+
+GENERATED_AT = datetime(2026, 3, 1, 12, tzinfo=timezone.utc)
+BITS = {"balcony": 0, "wifi": 1, "kitchen": 2}
+
+
+def _room(room_id, name, position, size, adult_bed, amenities, category="Стандарт"):
+    return RoomTypeRecord(
+        id=room_id, name=name, position=position, size=size, adult_bed=adult_bed, category=category,
+        amenities=amenities, amenity_mask=encode_mask(build_mask(BITS, amenities)),
+        images=[f"https://img.example/{room_id}.jpg"],
+    )
+
+
+ROOMS = [
+    _room("single", "Одноместный", 1, 14, 1, ["wifi"]),
+    _room("double", "Двухместный", 2, 20, 2, ["wifi", "balcony"]),
+    _room("twin", "Твин", 3, 22, 2, ["wifi"]),
+    _room("family", "Семейный", 4, 35, 4, ["wifi", "balcony", "kitchen"], category="Семейный"),
+    _room("suite", "Люкс", 5, 45, 2, ["balcony", "kitchen"], category="Люкс"),
+]
+
+
+def _feedbacks(count: int):
+    # Двое с одинаковым created_at: порядок внутри — по id
+    times = [GENERATED_AT - timedelta(hours=count - i) for i in range(count)]
+    times[3] = times[2]
+    return [
+        Feedback(id=i + 1, text=f"Отзыв {i + 1}", rate=i % 6, created_at=t, updated_at=t)
+        for i, t in enumerate(times)
+    ]
+
+
+def _snapshot(**changes) -> CatalogSnapshot:
+    video_at = GENERATED_AT - timedelta(days=1)
+    values = dict(
+        generated_at=GENERATED_AT,
+        catalog_version=7,
+        room_types=ROOMS,
+        amenity_bits=BITS,
+        image_variants={"https://img.example/double.jpg": {"480": "https://cdn.example/double-480.webp"}},
+        feedbacks=_feedbacks(7),
+        video_feedbacks=[
+            VideoFeedback(uuid="v1", file="videos/v1.mp4", rate=5, created_at=video_at, updated_at=video_at),
+        ],
+    )
+    values.update(changes)
+    return CatalogSnapshot(**values)
+
+
+def _reset_caches():
+    reset_amenity_index()
+    service.catalog_calls.clear()
+    service.feedback_cache.clear()
+
+
+@pytest.fixture
+def use_repository(monkeypatch):
+    def use(repo):
+        monkeypatch.setattr(repository, "_repository", repo)
+        _reset_caches()
+        return repo
+
+    yield use
+    _reset_caches()
+
+
+@pytest.fixture
+def repo(use_repository) -> SnapshotRepository:
+    return use_repository(SnapshotRepository(_snapshot(), writable=True))
+
+
+async def test_filtered_catalog_with_facets(repo):
+    result = await service.get_catalog_room_types_with_facets(amenities=["balcony"], size_from=21)
+
+    assert [rt.id for rt in result.items] == ["family", "suite"]
+    assert result.facets == {"balcony": 2, "kitchen": 2, "wifi": 1}
+
+
+async def test_filtered_catalog(repo):
+    assert [rt.id for rt in await service.get_catalog_room_types_filtered(adult_bed=2, sort_by="size")] == [
+        "double", "twin", "suite",
+    ]
+    assert [rt.id for rt in await service.get_catalog_room_types_filtered(category="Люкс")] == ["suite"]
+    assert await service.get_catalog_room_types_filtered(amenities=["sauna"]) == []
+
+    double = (await service.get_catalog_room_types_filtered(amenities=["wifi", "balcony"], size_to=20))[0]
+    assert double.id == "double"
+    assert double.image_variants == {"480": "https://cdn.example/double-480.webp"}
+
+
+async def test_similar_room_types(repo):
+    similar = await service.get_similar_room_types("double", limit=3)
+
+    # Не меньше мест, затем ближе по площади и по position
+    assert [rt.id for rt in similar] == ["twin", "suite", "family"]
+    assert await service.get_similar_room_types("missing") == []
+
+
+async def test_feedback_pages_both_ways(repo):
+    first = await service.get_feedbacks_page(limit=3)
+    assert [fb.id for fb in first.items] == [7, 6, 5]
+    assert first.prev_cursor is None
+
+    second = await service.get_feedbacks_page(limit=3, cursor=first.next_cursor)
+    assert [fb.id for fb in second.items] == [4, 3, 2]
+    third = await service.get_feedbacks_page(limit=3, cursor=second.next_cursor)
+    assert [fb.id for fb in third.items] == [1]
+    assert third.next_cursor is None
+
+    back = await service.get_feedbacks_page(limit=3, cursor=third.prev_cursor, reverse=True)
+    assert [fb.id for fb in back.items] == [4, 3, 2]
+    back = await service.get_feedbacks_page(limit=3, cursor=back.prev_cursor, reverse=True)
+    assert [fb.id for fb in back.items] == [7, 6, 5]
+    assert back.prev_cursor is None
+
+
+async def test_rating_summary(repo):
+    summary = await service.get_rating_summary(FEEDBACK_KIND)
+
+    # Оценки 0, 1, 2, 3, 4, 5, 0
+    assert summary.count == 7
+    assert summary.histogram == [2, 1, 1, 1, 1, 1]
+    assert summary.average == pytest.approx(15 / 7, abs=0.01)
+    assert (await service.get_rating_summary(VIDEO_FEEDBACK_KIND)).count == 1
+
+
+async def test_create_and_delete_feedbacks_invalidate_cache(repo):
+    assert (await service.get_rating_summary(FEEDBACK_KIND)).count == 7
+
+    created = await service.create_feedbacks([FeedbackCreate(text="Новый", rate=5), FeedbackCreate(text="Ещё", rate=4)])
+
+    assert [(fb.id, fb.text) for fb in created] == [(8, "Новый"), (9, "Ещё")]
+    assert (await service.get_rating_summary(FEEDBACK_KIND)).count == 9
+    assert [fb.id for fb in (await service.get_feedbacks_page(limit=2)).items] == [9, 8]
+
+    assert await service.delete_feedback(8)
+    assert not await service.delete_feedback(8)
+    assert await service.get_feedback_by_id(8) is None
+    assert [fb.id for fb in await service.get_feedbacks()][:2] == [9, 7]
+
+
+async def test_video_feedback_writes(repo):
+    created = await service.create_video_feedback(VideoFeedbackCreate(file="videos/v2.mp4", rate=4))
+    await service.set_video_feedback_file_id(created.uuid, "tg-file")
+    await service.set_video_feedback_metadata(created.uuid, duration=12.5, width=1280, height=720)
+
+    video = await service.get_video_feedback_by_uuid(created.uuid)
+    assert (video.telegram_file_id, video.duration, video.width) == ("tg-file", 12.5, 1280)
+    assert [v.uuid for v in await service.get_video_feedbacks()] == [created.uuid, "v1"]
+
+    assert await service.delete_video_feedback(created.uuid)
+    assert [v.uuid for v in await service.get_video_feedbacks()] == ["v1"]
+
+
+async def test_read_only_snapshot_rejects_writes(use_repository):
+    repo = use_repository(SnapshotRepository(_snapshot()))
+
+    with pytest.raises(ReadOnlyRepositoryError):
+        await repo.create_feedbacks([FeedbackCreate(text="Отзыв", rate=5)])
+    with pytest.raises(ReadOnlyRepositoryError):
+        await repo.delete_feedback(1)
+    with pytest.raises(ReadOnlyRepositoryError):
+        await repo.create_video_feedback(VideoFeedbackCreate(file="videos/v2.mp4", rate=4))
+    with pytest.raises(ReadOnlyRepositoryError):
+        await repo.delete_video_feedback("v1")
+    with pytest.raises(ReadOnlyRepositoryError):
+        await repo.update_video_feedback("v1", {"telegram_file_id": "tg-file"})
+    assert len(await repo.list_feedbacks(FEEDBACK_KIND)) == 7
+
+
+async def test_reload_snapshot_rebuilds_indexes(use_repository, tmp_path):
+    source = tmp_path / "latest.json.gz"
+    source.write_bytes(encode_snapshot(_snapshot()))
+    use_repository(None)
+    await load_snapshot_repository(str(source))
+    await apply_snapshot()
+    assert not await reload_snapshot_repository(str(source))
+    assert [rt.id for rt in get_search_index().search("студия")] == []
+
+    studio = _room("studio", "Студия", 6, 25, 2, ["wifi", "kitchen"])
+    source.write_bytes(encode_snapshot(_snapshot(generated_at=GENERATED_AT + timedelta(hours=1), room_types=ROOMS + [studio])))
+
+    assert await reload_snapshot_repository(str(source))
+    await apply_snapshot()
+    assert [rt.id for rt in get_search_index().search("студия")] == ["studio"]
+    assert [rt.id for rt in await service.get_catalog_room_types_filtered(amenities=["kitchen", "wifi"])] == [
+        "family", "studio",
+    ]
+
+
+def test_repository_backends_implement_every_method():
+    with pytest.raises(TypeError):
+        repository.Repository()
+    # Абстрактных методов не осталось: экземпляры создаются
+    repository.PostgresRepository()
+    SnapshotRepository(_snapshot())
@@ -0,0 +1,219 @@
+import asyncio
+import io
+import json
+import time
+
+import pytest
+from minio.error import S3Error
+
+from storage import ObjectStorage
+
+PAYLOAD_SIZE = 8 * 1024 * 1024
+CHUNK_SIZE = 256 * 1024
+# Сколько блокирующий клиент «передаёт» один чанк
+CHUNK_DELAY = 0.005
+# Допустимая задержка event loop во время передачи
+MAX_LOOP_LAG = 0.05
+
+
+class _BlockingObject:
+    """Ответ get_object: чтение блокирует поток, как сетевой ввод-вывод urllib3"""
+
+    def __init__(self, data: bytes):
+        self._data = data
+        self._position = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0:
+            size = len(self._data) - self._position
+        end = min(self._position + size, len(self._data))
+        chunk = b""
+        while self._position < end:
+            step = min(CHUNK_SIZE, end - self._position)
+            time.sleep(CHUNK_DELAY)
+            chunk += self._data[self._position:self._position + step]
+            self._position += step
+        return chunk
+
+    def stream(self, amt: int):
+        while True:
+            chunk = self.read(amt)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+
+class FakeMinio:
+    """Блокирующий клиент MinIO в памяти: каждая операция спит на каждом чанке данных"""
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, bucket, object_name, data, length, content_type="application/octet-stream", part_size=0):
+        received = bytearray()
+        while True:
+            chunk = data.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            time.sleep(CHUNK_DELAY)
+            received += chunk
+        self.objects[object_name] = bytes(received)
+
+    def stat_object(self, bucket, object_name):
+        if object_name not in self.objects:
+            raise S3Error("NoSuchKey", "Object does not exist", object_name, "", "", None)
+        return len(self.objects[object_name])
+
+    def get_object(self, bucket, object_name, offset=0, length=0):
+        data = self.objects[object_name]
+        return _BlockingObject(data[offset:offset + length] if length else data[offset:])
+
+
+class LoopLagProbe:
+    """Как проба LoopMonitor: засыпает на interval и запоминает максимальное опоздание"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.max_lag = 0.0
+        self.samples = 0
+        self._task = None
+
+    def _observe(self):
+        self.max_lag = max(self.max_lag, asyncio.get_running_loop().time() - self._started - self.interval)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._started = loop.time()
+            await asyncio.sleep(self.interval)
+            self._observe()
+            self.samples += 1
+
+    async def __aenter__(self):
+        self._started = asyncio.get_running_loop().time()
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc):
+        # Учитываем и незавершённый сон: loop мог быть занят до самого конца передачи
+        self._observe()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+@pytest.fixture
+def payload() -> bytes:
+    return bytes(range(256)) * (PAYLOAD_SIZE // 256)
+
+
+@pytest.fixture
+def storage():
+    client = FakeMinio()
+    storage = ObjectStorage(lambda: client, "test", max_workers=4, upload_concurrency=2)
+    yield storage
+    storage._executor.shutdown(wait=False)
+
+
+async def test_put_and_get_bytes_do_not_block_loop(storage, payload):
+    async with LoopLagProbe() as probe:
+        await storage.put_bytes("video.mp4", payload)
+        data = await storage.get_bytes("video.mp4")
+
+    assert data == payload
+    assert probe.samples > 10
+    assert probe.max_lag < MAX_LOOP_LAG
+
+
+async def test_put_stream_does_not_block_loop(storage, payload):
+    async def chunks():
+        for start in range(0, len(payload), 64 * 1024):
+            yield payload[start:start + 64 * 1024]
+
+    async with LoopLagProbe() as probe:
+        total = await storage.put_stream("video.mp4", chunks())
+
+    assert total == len(payload)
+    assert storage.client.objects["video.mp4"] == payload
+    assert probe.max_lag < MAX_LOOP_LAG
+
+
+async def test_iter_range_does_not_block_loop(storage, payload):
+    storage.client.objects["video.mp4"] = payload
+    offset, length = 1000, 5 * 1024 * 1024
+
+    async with LoopLagProbe() as probe:
+        received = io.BytesIO()
+        async for chunk in storage.iter_range("video.mp4", offset=offset, length=length):
+            received.write(chunk)
+
+    assert received.getvalue() == payload[offset:offset + length]
+    assert probe.max_lag < MAX_LOOP_LAG
+
+
+async def test_stat_or_none_for_missing_object(storage):
+    storage.client.objects["video.mp4"] = b"data"
+
+    assert await storage.stat_or_none("video.mp4") == 4
+    assert await storage.stat_or_none("missing.mp4") is None
+    assert not await storage.exists("missing.mp4")
+
+
+class PolicyMinio:
+    def __init__(self, policy=None, fail_set=0):
+        self.policy = policy
+        self.fail_set = fail_set
+        self.set_calls = 0
+
+    def get_bucket_policy(self, bucket):
+        if self.policy is None:
+            raise S3Error("NoSuchBucketPolicy", "The bucket policy does not exist", bucket, "", "", None)
+        return self.policy
+
+    def set_bucket_policy(self, bucket, policy):
+        self.set_calls += 1
+        if self.fail_set:
+            self.fail_set -= 1
+            raise S3Error("InternalError", "try again", bucket, "", "", None)
+        self.policy = policy
+
+
+def _storage(client) -> ObjectStorage:
+    return ObjectStorage(lambda: client, "test", max_workers=1, upload_concurrency=1)
+
+
+async def test_set_public_read_merges_into_existing_policy():
+    operator_statement = {
+        "Effect": "Allow",
+        "Principal": {"AWS": ["arn:aws:iam::123:root"]},
+        "Action": ["s3:PutObject"],
+        "Resource": ["arn:aws:s3:::test/uploads/*"],
+    }
+    client = PolicyMinio(json.dumps({"Version": "2012-10-17", "Statement": [operator_statement]}))
+
+    await _storage(client).set_public_read("images")
+    # Другая реплика с тем же префиксом политику не переписывает
+    await _storage(client).set_public_read("images")
+
+    statements = json.loads(client.policy)["Statement"]
+    assert statements[0] == operator_statement
+    assert statements[1]["Resource"] == ["arn:aws:s3:::test/images/*"]
+    assert len(statements) == 2
+    assert client.set_calls == 1
+
+
+async def test_set_public_read_retries_after_failure():
+    client = PolicyMinio(fail_set=1)
+    storage = _storage(client)
+
+    with pytest.raises(S3Error):
+        await storage.set_public_read("images")
+    await storage.set_public_read("images")
+
+    assert client.set_calls == 2
+    assert json.loads(client.policy)["Statement"][0]["Action"] == ["s3:GetObject"]
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Optional
+
+import httpx
+
+from config import settings
+from metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM_REQUESTS = Counter("upstream_requests_total", "Запросы к TravelLine API по результату")
+UPSTREAM_RETRIES = Counter("upstream_retries_total", "Повторные попытки запросов к TravelLine API")
+CIRCUIT_STATE = Gauge("upstream_circuit_state", "Состояние circuit breaker: 0 — closed, 1 — half-open, 2 — open")
+
+# Ответы, после которых имеет смысл повторить запрос
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Circuit breaker открыт: запрос к upstream не выполнялся"""
+
+
+class CircuitBreaker:
+    """
+    Размыкается после failure_threshold неудач подряд и reset_timeout секунд
+    отклоняет вызовы без обращения к upstream. Затем пропускает один пробный
+    вызов (half-open): успех замыкает цепь, неудача снова размыкает.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._set_state(self.CLOSED)
+
+    def _set_state(self, state: str):
+        self.state = state
+        CIRCUIT_STATE.set(self._STATE_VALUES[state], upstream=self.name)
+
+    def before_call(self):
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError(f"{self.name}: circuit breaker открыт")
+            self._set_state(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                raise CircuitOpenError(f"{self.name}: выполняется пробный запрос")
+            self._probe_in_flight = True
+
+    def release(self):
+        """Вызов прерван без результата (отмена) — не считается ни успехом, ни неудачей"""
+        self._probe_in_flight = False
+
+    def record_success(self):
+        self._probe_in_flight = False
+        self.failures = 0
+        if self.state != self.CLOSED:
+            logger.info("%s: circuit breaker замкнут", self.name)
+            self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        self._probe_in_flight = False
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning("%s: circuit breaker разомкнут на %.0f с", self.name, self.reset_timeout)
+            self.opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+
+def _breaker(name: str) -> CircuitBreaker:
+    return CircuitBreaker(name, settings.TRAVELINE_BREAKER_FAILURES, settings.TRAVELINE_BREAKER_RESET_SECONDS)
+
+
+auth_breaker = _breaker("traveline_auth")
+content_breaker = _breaker("traveline_content")
+search_breaker = _breaker("traveline_search")
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Общий клиент с ограниченными таймаутами и пулом соединений (создаётся при первом обращении)"""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                settings.TRAVELINE_READ_TIMEOUT,
+                connect=settings.TRAVELINE_CONNECT_TIMEOUT,
+                pool=settings.TRAVELINE_CONNECT_TIMEOUT,
+            ),
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+        )
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _backoff(attempt: int) -> float:
+    """Экспоненциальная задержка с полным джиттером"""
+    ceiling = min(settings.TRAVELINE_RETRY_BACKOFF_MAX, settings.TRAVELINE_RETRY_BACKOFF * 2 ** attempt)
+    return random.uniform(0, ceiling)
+
+
+async def traveline_request(breaker: CircuitBreaker, method: str, url: str, **kwargs) -> httpx.Response:
+    """
+    Запрос к TravelLine через circuit breaker: сетевые ошибки, таймауты и ответы
+    429/5xx повторяются до TRAVELINE_RETRIES раз с джиттером; прочие 4xx не повторяются.
+    Для breaker весь вызов с повторами — одна попытка.
+    """
+    breaker.before_call()
+    try:
+        return await _request_with_retries(breaker, method, url, **kwargs)
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+
+
+async def _request_with_retries(breaker: CircuitBreaker, method: str, url: str, **kwargs) -> httpx.Response:
+    client = get_http_client()
+    attempts = settings.TRAVELINE_RETRIES + 1
+    for attempt in range(attempts):
+        try:
+            resp = await client.request(method, url, **kwargs)
+            if resp.status_code in RETRY_STATUS_CODES and attempt + 1 < attempts:
+                raise httpx.HTTPStatusError(f"HTTP {resp.status_code}", request=resp.request, response=resp)
+            resp.raise_for_status()
+        except (httpx.TransportError, httpx.HTTPStatusError) as e:
+            status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else None
+            retryable = status is None or status in RETRY_STATUS_CODES
+            if retryable and attempt + 1 < attempts:
+                UPSTREAM_RETRIES.inc(upstream=breaker.name)
+                delay = _backoff(attempt)
+                logger.warning("%s: %s %s не удался (%s), повтор через %.1f с", breaker.name, method, url, e, delay)
+                await asyncio.sleep(delay)
+                continue
+            UPSTREAM_REQUESTS.inc(upstream=breaker.name, result="error")
+            # Ошибки клиента (кроме 429) — не признак недоступности upstream
+            if retryable:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+        except Exception:
+            UPSTREAM_REQUESTS.inc(upstream=breaker.name, result="error")
+            breaker.record_failure()
+            raise
+        UPSTREAM_REQUESTS.inc(upstream=breaker.name, result="ok")
+        breaker.record_success()
+        return resp
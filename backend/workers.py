@@ -0,0 +1,34 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Общий пул процессов для CPU-тяжёлых задач (разбор медиа, обработка изображений)
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Создаёт пул процессов при первом обращении"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=settings.PROCESS_POOL_WORKERS)
+        logger.info("Пул процессов запущен (%d воркеров)", settings.PROCESS_POOL_WORKERS)
+    return _process_pool
+
+
+async def run_in_process(fn, *args, **kwargs):
+    """Выполняет функцию в пуле процессов, не блокируя event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), functools.partial(fn, *args, **kwargs))
+
+
+def shutdown_process_pool():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None